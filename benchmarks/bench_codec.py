@@ -0,0 +1,76 @@
+""" Compare JSON codecs encoding insert payloads and decoding search results.
+
+Times each available codec in harperdb.codec over payloads of several sizes,
+the insert payload is encoded as a request body and the search result is
+decoded from response bytes, as HarperDB.insert and HarperDB.search_by_value
+do.
+
+Usage:
+    python3 benchmarks/bench_codec.py
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from harperdb import codec  # noqa: E402
+
+
+SIZES = [10, 1000, 100000]
+
+
+def make_records(count):
+    return [
+        {
+            'id': index,
+            'dog_name': 'Penny {}'.format(index),
+            'owner_name': 'Kyle',
+            'breed_id': index % 350,
+            'age': 5,
+            'weight_lbs': 35.5,
+            'adorable': True,
+            'tags': ['good', 'dog'],
+            '__createdtime__': 1234567890000 + index,
+            '__updatedtime__': 1234567890002 + index,
+        }
+        for index in range(count)]
+
+
+def available_codecs():
+    codecs = [codec.JSONCodec()]
+    if codec.ujson is not None:
+        codecs.append(codec.UjsonCodec())
+    if codec.orjson is not None:
+        codecs.append(codec.OrjsonCodec())
+    return codecs
+
+
+def bench(function, records):
+    number = max(1, 100000 // len(records))
+    return min(timeit.repeat(function, number=number, repeat=3)) / number
+
+
+def main():
+    print('{:<8}{:>9}{:>16}{:>16}'.format(
+        'codec', 'records', 'insert (ms)', 'search (ms)'))
+    for count in SIZES:
+        records = make_records(count)
+        insert = {
+            'operation': 'insert',
+            'schema': 'dev',
+            'table': 'dog',
+            'records': records,
+        }
+        search_body = codec.JSONCodec().dumps(records)
+        for json_codec in available_codecs():
+            encode = bench(lambda: json_codec.dumps(insert), records)
+            decode = bench(lambda: json_codec.loads(search_body), records)
+            print('{:<8}{:>9}{:>16.3f}{:>16.3f}'.format(
+                json_codec.name,
+                count,
+                encode * 1000,
+                decode * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+""" Compare round trips per second with and without connection pooling.
+
+Starts a local HTTP/1.1 stub server which answers every POST with a small JSON
+body, then times describe_all() calls made through a pooled HarperDB instance
+against the same calls made with a new connection each time.
+
+Usage:
+    python3 benchmarks/bench_connection_pool.py [requests]
+"""
+import http.server
+import json
+import os
+import sys
+import threading
+import time
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import harperdb  # noqa: E402
+
+
+BODY = json.dumps({'dev': {}}).encode('utf-8')
+
+
+class StubHandler(http.server.BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, *args):
+        pass
+
+
+def unpooled(url, count):
+    for _ in range(count):
+        requests.request(
+            'POST',
+            url,
+            headers={'Content-Type': 'application/json'},
+            data=json.dumps({'operation': 'describe_all'}),
+            timeout=10).json()
+
+
+def pooled(url, count):
+    with harperdb.HarperDB(url) as db:
+        for _ in range(count):
+            db.describe_all()
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = 'http://127.0.0.1:{}'.format(server.server_address[1])
+    try:
+        for name, function in [('new connection', unpooled),
+                               ('pooled session', pooled)]:
+            start = time.perf_counter()
+            function(url, count)
+            elapsed = time.perf_counter() - start
+            print('{:<16}{:>10.0f} round trips/s'.format(
+                name,
+                count / elapsed))
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
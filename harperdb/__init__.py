@@ -1,3 +1,8 @@
 from .exceptions import *
 from .harperdb import *
+try:
+    from .harperdb_async import *
+except ImportError:
+    # asyncio support is optional, see harperdb[async]
+    pass
 from .wrappers import *
@@ -0,0 +1,125 @@
+import collections
+import threading
+import time
+
+
+class LRUCache():
+
+    """ A thread-safe, least recently used cache, bounded by a number of
+    entries and optionally by their total size in bytes.
+
+    Entries may be tagged, to discard every entry with a tag at once, and
+    expire after ttl seconds. tag_ttls overrides ttl for entries with a tag,
+    the last of an entry's tags found in tag_ttls is used.
+
+    Instance Parameters:
+      - max_entries (int): Most entries kept, default 1000
+      - max_bytes (int): Most bytes kept, by the size given to put(), default
+        None (unbounded)
+      - ttl (float): Seconds entries are kept for, default None (until
+        evicted or invalidated)
+      - tag_ttls (dict): Seconds entries with a tag are kept for, by tag
+
+    Instance Attributes:
+      - evictions (int): Entries discarded to stay within bounds
+      - hits (int): Reads served from the cache
+      - misses (int): Reads not served from the cache
+      - size (int): Bytes kept
+
+    Instance Methods:
+      - clear(): Discard every entry
+      - get(key, default=None): Returns a value, or default
+      - invalidate(tag): Discard every entry with tag
+      - put(key, value, size=0, tags=()): Add or replace an entry
+    """
+
+    def __init__(
+            self,
+            max_entries=1000,
+            max_bytes=None,
+            ttl=None,
+            tag_ttls=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.tag_ttls = tag_ttls or dict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.size = 0
+        # key: (value, size, expiry time, tags), least recently used first
+        self.__entries = collections.OrderedDict()
+        self.__tags = collections.defaultdict(set)
+        self.__lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def __contains__(self, key):
+        with self.__lock:
+            entry = self.__entries.get(key)
+            return entry is not None and not self.__expired(entry)
+
+    def get(self, key, default=None):
+        """ Returns the value of key, or default if it is not cached.
+        """
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is None or self.__expired(entry):
+                if entry is not None:
+                    self.__remove(key)
+                self.misses += 1
+                return default
+            self.__entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value, size=0, tags=()):
+        """ Add or replace the value of key, size is counted towards
+        max_bytes. Entries which exceed max_bytes on their own are not kept.
+        """
+        ttl = self.ttl
+        for tag in tags:
+            ttl = self.tag_ttls.get(tag, ttl)
+        expires = None if ttl is None else time.monotonic() + ttl
+        with self.__lock:
+            if key in self.__entries:
+                self.__remove(key)
+            if self.max_bytes is not None and size > self.max_bytes:
+                return
+            self.__entries[key] = (value, size, expires, tuple(tags))
+            self.size += size
+            for tag in tags:
+                self.__tags[tag].add(key)
+            while len(self.__entries) > self.max_entries or (
+                    self.max_bytes is not None
+                    and self.size > self.max_bytes):
+                self.__remove(next(iter(self.__entries)))
+                self.evictions += 1
+
+    def invalidate(self, tag):
+        """ Discard every entry with tag.
+        """
+        with self.__lock:
+            for key in list(self.__tags.get(tag, ())):
+                self.__remove(key)
+
+    def clear(self):
+        """ Discard every entry.
+        """
+        with self.__lock:
+            self.__entries.clear()
+            self.__tags.clear()
+            self.size = 0
+
+    def __expired(self, entry):
+        return entry[2] is not None and time.monotonic() >= entry[2]
+
+    def __remove(self, key):
+        value, size, expires, tags = self.__entries.pop(key)
+        self.size -= size
+        for tag in tags:
+            keys = self.__tags[tag]
+            keys.discard(key)
+            if not keys:
+                del self.__tags[tag]
@@ -0,0 +1,144 @@
+import threading
+import time
+
+
+def _table_list(tables):
+    """ Returns a list of table metadata from a describe_schema response.
+    """
+    if not isinstance(tables, list):
+        # older versions of HarperDB return a list of tables in a schema,
+        # newer versions a dictionary
+        tables = list(tables.values())
+    return tables
+
+
+class HarperDBCatalog():
+
+    """ Caches schema and table metadata read from a database instance.
+
+    One describe_all fills a snapshot of every schema and table. Schemas and
+    tables missing from the snapshot, or invalidated since, are read on
+    their own with describe_schema or describe_table, so the snapshot is
+    refreshed incrementally.
+
+    Entries are kept for ttl seconds. Operations which change a table through
+    the same client, such as create_table, drop_attribute or insert, discard
+    its metadata and the list of tables in its schema.
+
+    Instance Attributes:
+      - database (HarperDBBase): Instance metadata is read from
+      - ttl (float): Seconds metadata is cached for. 0 disables caching, None
+        caches metadata until it is invalidated
+
+    Instance Methods:
+      - describe_table(schema, table): Returns table metadata, as returned by
+        describe_table
+      - invalidate(schema=None, table=None): Discard cached metadata of a
+        table, a schema, or everything
+      - refresh(schema=None, table=None): Read metadata of a table, a schema,
+        or everything from the server now
+      - schemas(): Returns a list of schema names
+      - tables(schema): Returns a list of table metadata in a schema
+    """
+
+    def __init__(self, database, ttl=0):
+        self.database = database
+        self.ttl = ttl
+        # each entry is a tuple of (read time, value)
+        self.__schemas = None
+        self.__schema_tables = dict()
+        self.__tables = dict()
+        self.__lock = threading.Lock()
+
+    def schemas(self):
+        """ Returns a list of schema names.
+        """
+        with self.__lock:
+            entry = self.__schemas
+        if self.__fresh(entry):
+            return entry[1]
+        return self.refresh()
+
+    def tables(self, schema):
+        """ Returns a list of table metadata in a schema.
+        """
+        with self.__lock:
+            entry = self.__schema_tables.get(schema)
+            if self.__fresh(entry):
+                # tables read on their own since may be more recent
+                return [
+                    self.__tables.get((schema, table), (None, metadata))[1]
+                    for table, metadata in entry[1]]
+        return self.refresh(schema)
+
+    def describe_table(self, schema, table):
+        """ Returns table metadata, as returned by describe_table.
+        """
+        with self.__lock:
+            entry = self.__tables.get((schema, table))
+        if self.__fresh(entry):
+            return entry[1]
+        return self.refresh(schema, table)
+
+    def refresh(self, schema=None, table=None):
+        """ Read metadata of a table, every table of a schema, or every schema
+        from the server, and return it.
+        """
+        read_time = time.monotonic()
+        if table is not None:
+            metadata = self.database._describe_table(
+                schema=schema,
+                table=table)
+            if self.ttl != 0:
+                with self.__lock:
+                    self.__tables[(schema, table)] = (read_time, metadata)
+            return metadata
+        if schema is not None:
+            tables = _table_list(self.database._describe_schema(schema))
+            if self.ttl != 0:
+                with self.__lock:
+                    self.__store_schema(schema, tables, read_time)
+            return tables
+        schemas = self.database._describe_all()
+        if self.ttl != 0:
+            with self.__lock:
+                self.__schemas = (read_time, list(schemas))
+                for name, tables in schemas.items():
+                    self.__store_schema(name, _table_list(tables), read_time)
+        return list(schemas)
+
+    def invalidate(self, schema=None, table=None):
+        """ Discard cached metadata of a table, a schema, or everything when
+        no schema is given. The list of tables in the table's schema is
+        discarded too, as the table may have been created or dropped.
+        """
+        with self.__lock:
+            if schema is None:
+                self.__schemas = None
+                self.__schema_tables.clear()
+                self.__tables.clear()
+                return
+            self.__schema_tables.pop(schema, None)
+            if table is not None:
+                self.__tables.pop((schema, table), None)
+                return
+            self.__schemas = None
+            for key in list(self.__tables):
+                if key[0] == schema:
+                    del self.__tables[key]
+
+    def __store_schema(self, schema, tables, read_time):
+        self.__schema_tables[schema] = (
+            read_time,
+            [(metadata.get('name'), metadata) for metadata in tables])
+        for metadata in tables:
+            self.__tables[(schema, metadata.get('name'))] = (
+                read_time,
+                metadata)
+
+    def __fresh(self, entry):
+        if entry is None or self.ttl == 0:
+            return False
+        if self.ttl is None:
+            return True
+        return time.monotonic() - entry[0] < self.ttl
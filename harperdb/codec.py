@@ -0,0 +1,192 @@
+import json
+import re
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+
+class JSONCodec():
+
+    """ Encodes request bodies to bytes, and decodes response bodies from
+    bytes, with the standard library json module.
+
+    Subclass and replace dumps and loads to plug in another implementation,
+    then pass an instance to HarperDB as the codec keyword argument.
+    """
+
+    name = 'json'
+
+    def dumps(self, obj):
+        return json.dumps(obj, separators=(',', ':')).encode('utf-8')
+
+    def loads(self, data):
+        # json.loads detects the encoding of bytes, no need to decode first
+        return json.loads(data)
+
+
+class OrjsonCodec(JSONCodec):
+
+    """ JSONCodec implemented with orjson.
+    """
+
+    name = 'orjson'
+
+    def dumps(self, obj):
+        # the standard library converts non-string keys, so does this
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+
+    def loads(self, data):
+        return orjson.loads(data)
+
+
+class UjsonCodec(JSONCodec):
+
+    """ JSONCodec implemented with ujson.
+    """
+
+    name = 'ujson'
+
+    def dumps(self, obj):
+        return ujson.dumps(obj, ensure_ascii=False).encode('utf-8')
+
+    def loads(self, data):
+        return ujson.loads(data)
+
+
+def get_codec():
+    """ Returns the fastest JSONCodec available: orjson, ujson, or the
+    standard library, in that order.
+    """
+    if orjson is not None:
+        return OrjsonCodec()
+    if ujson is not None:
+        return UjsonCodec()
+    return JSONCodec()
+
+
+# a complete string, or a character which changes nesting. A lone quote
+# starts a string which continues in the next chunk
+_STRING = rb'"[^"\\]*(?:\\.[^"\\]*)*"'
+_STRUCTURE = re.compile(_STRING + rb'|[][{},"]')
+# an object without nested objects or arrays, and the separator after it
+_FLAT_ITEM = re.compile(
+    rb'\s*(\{[^][{}"]*(?:' + _STRING + rb'[^][{}"]*)*\})\s*([,\]])')
+_WHITESPACE = b' \t\r\n'
+
+
+class _JSONArrayParser():
+
+    """ Decodes the items of a JSON array incrementally, from chunks of bytes
+    passed to feed(), so only one item is held decoded and undecoded at
+    once. Items are decoded by codec.
+
+    A document which is not an array is decoded whole by close(), and
+    returned as one item.
+    """
+
+    def __init__(self, codec):
+        self.codec = codec
+        self.__buffer = bytearray()
+        # position to continue scanning from
+        self.__position = 0
+        # start of the item being read, after the last separator
+        self.__start = 0
+        # 0 before the array, 1 between items, more inside an item
+        self.__depth = 0
+        self.__is_array = None
+        self.__done = False
+
+    def feed(self, chunk):
+        """ Returns a list of the items completed by chunk.
+        """
+        buffer = self.__buffer
+        if self.__start:
+            # drop bytes of items already decoded, once per chunk
+            del buffer[:self.__start]
+            self.__position -= self.__start
+            self.__start = 0
+        buffer += chunk
+        if self.__is_array is None:
+            stripped = buffer.lstrip(_WHITESPACE)
+            if not stripped:
+                return []
+            self.__is_array = stripped[:1] == b'['
+        if not self.__is_array or self.__done:
+            return []
+        return self.__scan()
+
+    def close(self):
+        """ Returns a list of any items left at the end of the document.
+        """
+        if self.__is_array is False:
+            value = self.codec.loads(bytes(self.__buffer))
+            self.__buffer = bytearray()
+            return [value]
+        if self.__is_array and not self.__done:
+            raise ValueError('JSON array is incomplete')
+        return []
+
+    def __scan(self):
+        buffer = self.__buffer
+        loads = self.codec.loads
+        position = self.__position
+        items = list()
+        while True:
+            if self.__depth == 1 and position == self.__start:
+                # most records are flat objects, read them in one match
+                match = _FLAT_ITEM.match(buffer, position)
+                if match is not None:
+                    items.append(loads(match.group(1)))
+                    position = self.__start = match.end()
+                    if match.group(2) == b']':
+                        self.__depth = 0
+                        self.__done = True
+                        break
+                    continue
+            match = _STRUCTURE.search(buffer, position)
+            if match is None:
+                position = len(buffer)
+                break
+            index = match.start()
+            character = buffer[index]
+            if character == 0x22 and match.end() == index + 1:
+                # a string which is not complete yet
+                position = index
+                break
+            position = match.end()
+            if character == 0x22:  # "
+                continue
+            if character in b'[{':
+                self.__depth += 1
+                if self.__depth == 1:
+                    self.__start = position
+            elif self.__depth == 1 and character in b',]':
+                item = bytes(buffer[self.__start:index]).strip(_WHITESPACE)
+                if item:
+                    items.append(loads(item))
+                self.__start = position
+                if character == 0x5d:  # ]
+                    self.__depth = 0
+                    self.__done = True
+                    break
+            elif character in b']}':
+                self.__depth -= 1
+        self.__position = position
+        return items
+
+
+def _iter_json_array(chunks, codec):
+    """ Yields each item of a JSON array read from an iterable of bytes
+    chunks, decoding one item at a time with codec.
+    """
+    parser = _JSONArrayParser(codec)
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+    yield from parser.close()
@@ -4,3 +4,10 @@ class HarperDBError(Exception):
 
     This is the only Exception raised explicitly.
     """
+
+
+class HarperDBConflictError(HarperDBError):
+
+    """ Raised when a record is not written because it was modified since it
+    was read, see HarperDBTable.compare_and_set.
+    """
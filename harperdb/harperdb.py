@@ -13,14 +13,36 @@ class HarperDB(HarperDBBase):
       - username (string): (optional) Basic Auth username
       - password (string): (optional) Basic Auth password
       - timeout (float): Seconds to wait for a server response, default 10
+      - pool_connections (int): Number of hosts to keep connection pools for,
+        default 10
+      - pool_maxsize (int): Connections kept open per host, default 10
+      - idle_timeout (float): Seconds a connection may sit idle in the pool
+        before the pool is reset, default None (never)
+      - codec (JSONCodec): Encodes requests and decodes responses, default
+        is the fastest available, see harperdb.codec.get_codec
+      - record_cache (LRUCache): Serves search_by_hash from memory, default
+        None (not cached), see harperdb.cache.LRUCache
+      - sql_cache (LRUCache): Serves SELECT statements passed to sql from
+        memory, default None (not cached), see harperdb.cache.LRUCache
+      - group_commit_ms (float): Milliseconds concurrent insert and update
+        calls for a table wait to be sent together, default None (off)
+      - group_commit_max_records (int): Records per group commit, default
+        1000
 
     Instance Attributes:
+      - codec (JSONCodec): Encodes requests and decodes responses
       - token (string): Value used in Authorization header, or None. The value
         is generated automatically when instantiated with both username and
         password
+      - idle_timeout (float): Seconds a connection may sit idle in the pool
+      - jobs (JobPoller): Waits for jobs started with future=True
+      - record_cache (LRUCache): Records read with search_by_hash, or None
+      - session (requests.Session): Pooled, keep-alive connections to url
       - timeout (float): Seconds to wait for a server response
       - url (string): Full URL of HarperDB instance
 
+    Instances are context managers, close() releases pooled connections.
+
     Instance Methods:
     These methods expose the HarperDB API functions, and return JSON from the
     target database instance at HarperDB.url
@@ -36,19 +58,65 @@ class HarperDB(HarperDBBase):
       NoSQL Operations:
         - insert(schema, table, [records])
         - update(schema, table, [records])
+        - upsert(schema, table, [records])
         - delete(schema, table, [hashes])
         - search_by_hash(schema, table, [hashes], get_attributes=['*'])
         - search_by_value(schema,
                           table,
                           search_attribute,
                           search_value,
-                          get_attributes=['*'])
+                          get_attributes=['*'],
+                          stream=False)
+        - search_by_conditions(schema,
+                               table,
+                               conditions,
+                               operator='and',
+                               get_attributes=['*'],
+                               offset=None,
+                               limit=None,
+                               sort=None,
+                               stream=False)
+      Bulk Operations:
+        - insert_many(schema,
+                      table,
+                      records,
+                      chunk_size=1000,
+                      max_bytes=None,
+                      max_workers=4)
+        - update_many(schema,
+                      table,
+                      records,
+                      chunk_size=1000,
+                      max_bytes=None,
+                      max_workers=4)
+        - delete_many(schema,
+                      table,
+                      hash_values,
+                      chunk_size=1000,
+                      max_bytes=None,
+                      max_workers=4)
       SQL Operations:
-        - sql(SQL)
+        - sql(SQL, params=None, stream=False)
+        - sql_many(SQL, param_sets, max_workers=4)
       CSV Operations:
-        - csv_data_load(schema, table, path, action="insert")
-        - csv_file_load(schema, table, file_path, action="insert")
-        - csv_url_load(schema, table, csv_url, action="insert")
+        - csv_data_load(schema, table, path, action="insert", future=False)
+        - csv_file_load(schema,
+                        table,
+                        file_path,
+                        action="insert",
+                        future=False)
+        - csv_url_load(schema,
+                       table,
+                       csv_url,
+                       action="insert",
+                       future=False)
+        - csv_bulk_load(schema,
+                      table,
+                      path,
+                      action="insert",
+                      chunk_size=10000,
+                      max_workers=4,
+                      timeout=None)
       Users and Roles:
         - add_user(role id, username, password, active=True)
         - add_role(name, permission)
@@ -69,14 +137,15 @@ class HarperDB(HarperDBBase):
         - get_fingerprint()
         - set_license(key, company)
       Utilities:
-        - delete_files_before(schema, table, date)
+        - delete_files_before(schema, table, date, future=False)
         - export_local(path,
                        search_operation,
                        search_attribute=None,
                        search_value=None,
                        hash_values=None,
                        sql=None,
-                       format="json")
+                       format="json",
+                       future=False)
         - export_to_s3(aws_access_key_id,
                        aws_secret_access_key,
                        bucket,
@@ -86,7 +155,8 @@ class HarperDB(HarperDBBase):
                        search_value=None,
                        hash_value=None,
                        sql=None,
-                       format="json")
+                       format="json",
+                       future=False)
         - read_log(limit=1000,
                    start=0,
                    from_date=None,
@@ -110,13 +180,20 @@ class HarperDB(HarperDBBase):
         self.drop_attribute = self._drop_attribute
         self.insert = self._insert
         self.update = self._update
+        self.upsert = self._upsert
         self.delete = self._delete
         self.search_by_hash = self._search_by_hash
         self.search_by_value = self._search_by_value
+        self.search_by_conditions = self._search_by_conditions
+        self.insert_many = self._insert_many
+        self.update_many = self._update_many
+        self.delete_many = self._delete_many
         self.sql = self._sql
+        self.sql_many = self._sql_many
         self.csv_data_load = self._csv_data_load
         self.csv_file_load = self._csv_file_load
         self.csv_url_load = self._csv_url_load
+        self.csv_bulk_load = self._csv_bulk_load
         self.get_job = self._get_job
         self.search_jobs_by_start_date = self._search_jobs_by_start_date
         self.add_user = self._add_user
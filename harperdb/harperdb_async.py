@@ -0,0 +1,684 @@
+import asyncio
+import collections
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from .codec import _JSONArrayParser
+from .exceptions import HarperDBError
+from .harperdb import HarperDB
+from .harperdb_base import (
+    HarperDBBase,
+    _STREAM_CHUNK_SIZE,
+    _bulk_response,
+    _chunk_result,
+    _chunks,
+    _csv_bulk_response,
+    _csv_chunks,
+    _job_id,
+    _merge_response)
+from .sql import _scan_statement, prepare
+from .wrappers import _is_unsupported_operation
+
+
+class AsyncHarperDBBase(HarperDBBase):
+
+    """ Extensible base class implements HarperDB API functions as coroutines.
+
+    Every operation of HarperDBBase is available, and returns an awaitable
+    instead of JSON. Requests are sent through a pooled aiohttp session, with
+    at most max_concurrency requests in flight at once.
+    """
+
+    def __init__(
+            self,
+            url,
+            username=None,
+            password=None,
+            timeout=10,
+            pool_maxsize=100,
+            idle_timeout=None,
+            max_concurrency=100,
+            codec=None):
+        if aiohttp is None:
+            raise ImportError(
+                'aiohttp is required for asyncio support, '
+                'install it with "pip3 install harperdb[async]"')
+        super().__init__(url, username, password, timeout, codec=codec)
+        self.pool_maxsize = pool_maxsize
+        self.idle_timeout = idle_timeout
+        self.max_concurrency = max_concurrency
+        self.__semaphore = None
+
+    def __enter__(self):
+        raise TypeError('use "async with" with {}'.format(
+            type(self).__name__))
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def close(self):
+        """ Close all pooled connections. The instance remains usable, new
+        connections are opened as needed.
+        """
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+            self.__semaphore = None
+
+    def _create_session(self, pool_connections, pool_maxsize):
+        # requests are sent through aiohttp, the session is created lazily
+        # because it must belong to the running event loop
+        return None
+
+    def _request(self, data, stream=False):
+        # every operation of HarperDBBase returns self._request(...),
+        # overriding it makes each return an awaitable, or an async
+        # generator with stream=True
+        if stream:
+            return self.__stream(data)
+        return self.__make_request(data)
+
+    def __get_session(self):
+        if self.session is None or self.session.closed:
+            connector_kwargs = {
+                'limit': self.pool_maxsize,
+                'limit_per_host': self.pool_maxsize,
+            }
+            if self.idle_timeout is not None:
+                connector_kwargs['keepalive_timeout'] = self.idle_timeout
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(**connector_kwargs),
+                timeout=aiohttp.ClientTimeout(total=self.timeout))
+            self.__semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self.session
+
+    async def _insert_many(
+            self,
+            schema,
+            table,
+            records,
+            chunk_size=1000,
+            max_bytes=None,
+            max_workers=4):
+        merged, count = await self.__map_chunks(
+            self._insert,
+            schema,
+            table,
+            records,
+            chunk_size,
+            max_bytes,
+            max_workers)
+        return _bulk_response(
+            'inserted {} of {} records',
+            'inserted_hashes',
+            merged,
+            count)
+
+    async def _update_many(
+            self,
+            schema,
+            table,
+            records,
+            chunk_size=1000,
+            max_bytes=None,
+            max_workers=4):
+        merged, count = await self.__map_chunks(
+            self._update,
+            schema,
+            table,
+            records,
+            chunk_size,
+            max_bytes,
+            max_workers)
+        return _bulk_response(
+            'updated {} of {} records',
+            'update_hashes',
+            merged,
+            count)
+
+    async def _delete_many(
+            self,
+            schema,
+            table,
+            hash_values,
+            chunk_size=1000,
+            max_bytes=None,
+            max_workers=4):
+        merged, count = await self.__map_chunks(
+            self._delete,
+            schema,
+            table,
+            hash_values,
+            chunk_size,
+            max_bytes,
+            max_workers)
+        return _bulk_response(
+            '{} of {} records successfully deleted',
+            'deleted_hashes',
+            merged,
+            count)
+
+    async def __map_chunks(
+            self,
+            operation,
+            schema,
+            table,
+            items,
+            chunk_size,
+            max_bytes,
+            max_workers):
+        """ Await operation(schema, table, chunk) for each chunk of items, with
+        at most max_workers chunks in flight.
+
+        Returns a dictionary of merged hash lists, and the number of items.
+        """
+        merged = dict()
+        count = 0
+        pending = collections.deque()
+        try:
+            for chunk in _chunks(items, chunk_size, max_bytes, self.codec):
+                count += len(chunk)
+                pending.append(
+                    asyncio.ensure_future(operation(schema, table, chunk)))
+                if len(pending) >= max_workers:
+                    _merge_response(merged, await pending.popleft())
+            while pending:
+                _merge_response(merged, await pending.popleft())
+        except BaseException:
+            for future in pending:
+                future.cancel()
+            raise
+        return merged, count
+
+    async def _sql_many(self, sql_string, param_sets, max_workers=4):
+        template = prepare(sql_string)
+        responses = list()
+        pending = collections.deque()
+        try:
+            for params in param_sets:
+                pending.append(
+                    asyncio.ensure_future(self._sql(template.render(params))))
+                if len(pending) >= max_workers:
+                    responses.append(await pending.popleft())
+            while pending:
+                responses.append(await pending.popleft())
+        except BaseException:
+            for future in pending:
+                future.cancel()
+            raise
+        return responses
+
+    async def _csv_bulk_load(
+            self,
+            schema,
+            table,
+            path,
+            action='insert',
+            chunk_size=10000,
+            max_workers=4,
+            timeout=None):
+        results = list()
+        rows = 0
+        pending = collections.deque()
+        with open(path, newline='') as csv_file:
+            try:
+                chunks = _csv_chunks(csv_file, chunk_size)
+                for index, (row_count, data) in enumerate(chunks):
+                    rows += row_count
+                    pending.append(asyncio.ensure_future(
+                        self.__load_csv_chunk(
+                            schema,
+                            table,
+                            action,
+                            data,
+                            index,
+                            row_count,
+                            timeout)))
+                    if len(pending) > max_workers:
+                        results.append(await pending.popleft())
+                while pending:
+                    results.append(await pending.popleft())
+            except BaseException:
+                for future in pending:
+                    future.cancel()
+                raise
+        return _csv_bulk_response(results, rows)
+
+    async def __load_csv_chunk(
+            self,
+            schema,
+            table,
+            action,
+            data,
+            index,
+            rows,
+            timeout):
+        """ Load CSV data as a csv_data_load job, and wait for the job to
+        finish. Returns a summary of the job.
+        """
+        job_id = None
+        try:
+            response = await self.__make_request({
+                'operation': 'csv_data_load',
+                'action': action,
+                'schema': schema,
+                'table': table,
+                'data': data,
+            })
+            job_id = _job_id(response)
+            job = await self.__wait_for_job(job_id, timeout)
+        except HarperDBError as error:
+            return _chunk_result(index, rows, job_id, error=str(error))
+        return _chunk_result(index, rows, job_id, job=job)
+
+    def _job_future(self, response):
+        """ Returns an asyncio.Task for the job started by an operation, which
+        is done when the job has finished on the server.
+        """
+        return asyncio.ensure_future(self.__job_result(response))
+
+    async def __job_result(self, response):
+        job = await self.__wait_for_job(_job_id(await response), None)
+        if job['status'] != 'COMPLETE':
+            raise HarperDBError(
+                job.get('message') or 'job "{}" failed'.format(job['id']))
+        return job
+
+    async def __wait_for_job(self, id, timeout):
+        """ Poll get_job until the job is complete or has failed, doubling the
+        time between requests from jobs.poll_interval up to
+        jobs.max_poll_interval seconds.
+
+        Returns the job, raises HarperDBError after timeout seconds.
+        """
+        loop = asyncio.get_event_loop()
+        deadline = None
+        if timeout is not None:
+            deadline = loop.time() + timeout
+        interval = self.jobs.poll_interval
+        while True:
+            job = (await self._get_job(id))[0]
+            if job['status'] in ('COMPLETE', 'ERROR'):
+                return job
+            if deadline is not None and loop.time() >= deadline:
+                raise HarperDBError(
+                    'job "{}" did not finish within {} seconds'.format(
+                        id,
+                        timeout))
+            await asyncio.sleep(interval)
+            interval = min(interval * 2, self.jobs.max_poll_interval)
+
+    async def __make_request(self, data):
+        """ Make a POST request to the database instance with JSON data.
+
+        Returns JSON response, raises HarperDBError if the server returns 500.
+        """
+        try:
+            return await self.__post(data)
+        finally:
+            self._invalidate_request(data)
+
+    def __headers(self):
+        headers = {
+            'Content-Type': 'application/json',
+        }
+        if self.token:
+            headers['Authorization'] = self.token
+        return headers
+
+    async def __post(self, data):
+        session = self.__get_session()
+        async with self.__semaphore:
+            async with session.post(
+                    self.url,
+                    headers=self.__headers(),
+                    data=self.codec.dumps(data)) as response:
+                body = self.codec.loads(await response.read())
+                if response.status >= 400:
+                    raise HarperDBError(
+                        body.get('error', 'An unknown error occurred'))
+        return body
+
+    async def __stream(self, data):
+        """ Yields the items of a JSON array response as they are read. The
+        request counts towards max_concurrency until the response is read.
+        """
+        session = self.__get_session()
+        try:
+            async with self.__semaphore:
+                async with session.post(
+                        self.url,
+                        headers=self.__headers(),
+                        data=self.codec.dumps(data),
+                        # timeout limits each read, not the whole response
+                        timeout=aiohttp.ClientTimeout(
+                            sock_connect=self.timeout,
+                            sock_read=self.timeout)) as response:
+                    if response.status >= 400:
+                        body = self.codec.loads(await response.read())
+                        raise HarperDBError(
+                            body.get('error', 'An unknown error occurred'))
+                    parser = _JSONArrayParser(self.codec)
+                    async for chunk in response.content.iter_chunked(
+                            _STREAM_CHUNK_SIZE):
+                        for item in parser.feed(chunk):
+                            yield item
+                    for item in parser.close():
+                        yield item
+        finally:
+            self._invalidate_request(data)
+
+
+class AsyncHarperDB(AsyncHarperDBBase, HarperDB):
+
+    """ Each instance of AsyncHarperDB represents a running HarperDB instance
+    at a URL, passed to the constructor. Instance methods are the same as
+    HarperDB, but are coroutines which must be awaited.
+
+    Instance Parameters:
+      - url (string): Full URL of HarperDB instance
+      - username (string): (optional) Basic Auth username
+      - password (string): (optional) Basic Auth password
+      - timeout (float): Seconds to wait for a server response, default 10
+      - pool_maxsize (int): Connections kept open to the server, default 100
+      - idle_timeout (float): Seconds a connection may sit idle in the pool,
+        default None (aiohttp's default)
+      - max_concurrency (int): Requests allowed in flight at once,
+        default 100
+      - codec (JSONCodec): Encodes requests and decodes responses, default
+        is the fastest available, see harperdb.codec.get_codec
+
+    Instances are async context managers, close() releases pooled
+    connections.
+    """
+
+
+class AsyncHarperDBWrapper(AsyncHarperDBBase):
+
+    """ AsyncHarperDBWrapper provides the high-level interface of
+    HarperDBWrapper for asyncio applications. Schemas are subscriptable by
+    name. Methods which reach the server are coroutines, and records are
+    returned as dictionaries.
+
+    Low-level methods are the same as HarperDBWrapper, but are coroutines.
+
+    Instance Attributes:
+      - native_upsert (bool): Use the HarperDB upsert operation in
+        AsyncHarperDBTable.upsert, default True. Set to False automatically
+        when the server does not support it
+
+    High-Level Methods:
+      - create_schema(name): Create a schema, returns AsyncHarperDBSchema
+      - drop_schema(name): Drop a schema
+      - schemas(): Returns a list of AsyncHarperDBSchema
+    """
+
+    native_upsert = True
+
+    def __getitem__(self, key):
+        return AsyncHarperDBSchema(key, self)
+
+    async def create_schema(self, name):
+        """ Create a schema in this database.
+        """
+        await self._create_schema(name)
+        return AsyncHarperDBSchema(name, self)
+
+    async def drop_schema(self, name):
+        """ Drop a schema from this database.
+        """
+        await self._drop_schema(name)
+
+    async def schemas(self):
+        """ Returns a list of all schemas in this database.
+        """
+        schemas = await self._describe_all()
+        return [AsyncHarperDBSchema(schema, self) for schema in schemas]
+
+
+class AsyncHarperDBSchema():
+
+    """ Tables are subscriptable by name.
+
+    You should never need to instantiate this class directly, use
+    AsyncHarperDBWrapper.create_schema instead.
+
+    Instance Attributes:
+      - name (string): Name of this schema
+      - database (AsyncHarperDBWrapper): Instance of the parent database
+
+    Instance Methods:
+      - create_table(name, hash_attribute): Create a table, returns
+        AsyncHarperDBTable
+      - drop(): Drop this schema
+      - drop_table(name): Drop a table
+      - tables(): Returns a list of AsyncHarperDBTable
+    """
+
+    def __init__(self, name, database):
+        assert isinstance(database, AsyncHarperDBWrapper)
+        self.name = name
+        self.database = database
+
+    def __getitem__(self, key):
+        return AsyncHarperDBTable(name=key, schema=self)
+
+    async def create_table(self, name, hash_attribute):
+        """ Create a table in this schema.
+        """
+        await self.database._create_table(
+            schema=self.name,
+            table=name,
+            hash_attribute=hash_attribute)
+        return AsyncHarperDBTable(
+            name=name,
+            schema=self,
+            hash_attribute=hash_attribute)
+
+    async def drop(self):
+        """ Drop this schema.
+        """
+        await self.database._drop_schema(self.name)
+
+    async def drop_table(self, name):
+        """ Drop a table from this schema.
+        """
+        await self.database._drop_table(schema=self.name, table=name)
+
+    async def tables(self):
+        """ Returns a list of all tables in this schema.
+        """
+        tables = await self.database._describe_schema(self.name)
+        if not isinstance(tables, list):
+            tables = [table for table in tables.values()]
+        return [
+            AsyncHarperDBTable(
+                name=table['name'],
+                schema=self,
+                hash_attribute=table['hash_attribute'])
+            for table in tables]
+
+
+class AsyncHarperDBTable():
+
+    """ Tables hold records, which are read and written as dictionaries.
+
+    You should never need to instantiate this class directly, use
+    AsyncHarperDBSchema.create_table instead.
+
+    Instance Attributes:
+      - hash_attribute (string): Primary key of this table, or None until
+        describe() is awaited
+      - name (string): Name of this table
+      - schema (AsyncHarperDBSchema): Instance of the parent schema
+
+    Instance Methods:
+      - delete(hash): Delete a record by hash value
+      - describe(): Returns table metadata
+      - drop(): Drop this table
+      - get(hash): Returns a record as a dictionary
+      - scan(batch_size=1000, get_attributes=['*'], where=None, params=None):
+        Yields every record, or those matching a SQL condition, reading
+        batch_size records per request
+      - search_by_value(search_attribute, search_value): Returns a list of
+        matching records
+      - upsert(record): Insert a record from a dictionary, or list of
+        dictionaries, updating records which already exist. Returns the
+        upserted hash values.
+    """
+
+    def __init__(self, name, schema, hash_attribute=None):
+        assert isinstance(schema, AsyncHarperDBSchema)
+        self.name = name
+        self.schema = schema
+        self.hash_attribute = hash_attribute
+
+    def __aiter__(self):
+        return self.scan()
+
+    async def delete(self, hash_value):
+        """ Delete a record from this table.
+        """
+        response = await self.schema.database._delete(
+            schema=self.schema.name,
+            table=self.name,
+            hash_values=[hash_value])
+        if response['skipped_hashes']:
+            raise HarperDBError(HarperDBBase.ERROR_HASH.format(hash_value))
+
+    async def describe(self):
+        """ Returns table metadata.
+        """
+        table = await self.schema.database._describe_table(
+            schema=self.schema.name,
+            table=self.name)
+        self.hash_attribute = table['hash_attribute']
+        return table
+
+    async def drop(self):
+        """ Drop this table.
+        """
+        await self.schema.database._drop_table(
+            schema=self.schema.name,
+            table=self.name)
+
+    async def get(self, hash_value):
+        """ Returns a record by hash value.
+        """
+        records = await self.schema.database._search_by_hash(
+            schema=self.schema.name,
+            table=self.name,
+            hash_values=[hash_value])
+        try:
+            return records[0]
+        except IndexError:
+            raise HarperDBError(HarperDBBase.ERROR_HASH.format(hash_value))
+
+    async def scan(
+            self,
+            batch_size=1000,
+            get_attributes=['*'],
+            where=None,
+            params=None):
+        """ Yields every record in this table as a dictionary, in order of
+        hash value, or only records matching where, a SQL condition which is
+        rendered with params when given. Use with async for.
+
+        Records are read with one SQL request per batch_size records, and the
+        next batch is requested while the current one is used.
+        """
+        if self.hash_attribute is None:
+            await self.describe()
+        if params is not None:
+            where = prepare(where).render(params)
+
+        def read_batch(after):
+            return asyncio.ensure_future(self.schema.database._sql(
+                _scan_statement(
+                    self.schema.name,
+                    self.name,
+                    self.hash_attribute,
+                    get_attributes,
+                    where,
+                    after,
+                    batch_size)))
+
+        task = read_batch(None)
+        try:
+            while task is not None:
+                records = await task
+                task = None
+                # a short batch is the last
+                if len(records) == batch_size:
+                    task = read_batch(records[-1][self.hash_attribute])
+                for record in records:
+                    yield record
+        finally:
+            if task is not None:
+                task.cancel()
+
+    async def search_by_value(self, search_attribute, search_value):
+        """ Returns a list of records where the search_attribute of the record
+        matches seach_value. Wild cards (*) are allowed.
+        """
+        return await self.schema.database._search_by_value(
+            schema=self.schema.name,
+            table=self.name,
+            search_attribute=search_attribute,
+            search_value=search_value)
+
+    async def upsert(self, records):
+        """ Insert a record from a dictionary, or list of dictionaries. If a
+        value is given for the table's hash_attribute, and this table has a
+        matching record, that record will be updated. Returns a list of
+        upserted hash values.
+        """
+        if not isinstance(records, list):
+            records = [records]
+        database = self.schema.database
+        if database.native_upsert:
+            try:
+                upsert_return_json = await database._upsert(
+                    schema=self.schema.name,
+                    table=self.name,
+                    records=records)
+            except HarperDBError as error:
+                if not _is_unsupported_operation(error, 'upsert'):
+                    raise
+                database.native_upsert = False
+            else:
+                return upsert_return_json['upserted_hashes']
+        if self.hash_attribute is None:
+            await self.describe()
+        record_hashes = dict()
+        for record in records:
+            if self.hash_attribute in record:
+                hash_value = record[self.hash_attribute]
+                record_hashes[str(hash_value)] = hash_value
+        insert_return_json = await database._insert(
+            schema=self.schema.name,
+            table=self.name,
+            records=records)
+        upserted_hashes = list(insert_return_json['inserted_hashes'])
+        skipped_hashes = {
+            str(hash_value)
+            for hash_value in insert_return_json['skipped_hashes']}
+        if skipped_hashes:
+            records_to_update = [
+                record for record in records
+                if self.hash_attribute in record
+                and str(record[self.hash_attribute]) in skipped_hashes]
+            update_return_json = await database._update(
+                schema=self.schema.name,
+                table=self.name,
+                records=records_to_update)
+            upserted_hashes += update_return_json['update_hashes']
+        return [
+            record_hashes.get(str(hash_value), hash_value)
+            for hash_value in upserted_hashes]
@@ -1,18 +1,249 @@
 import base64
-import json
+import collections
+import concurrent.futures
+import csv
+import io
+import threading
+import time
+
 import requests
 
+from .codec import _iter_json_array, get_codec
 from .exceptions import HarperDBError
+from .jobs import JobPoller
+from .sql import _is_read, _normalize, _tables, prepare
+
+
+# bytes read at a time from streamed responses
+_STREAM_CHUNK_SIZE = 64 * 1024
+
+# operations which change schemas, tables or records, see _invalidate
+_WRITE_OPERATIONS = (
+    'create_schema',
+    'drop_schema',
+    'create_table',
+    'drop_table',
+    'drop_attribute',
+    'insert',
+    'update',
+    'upsert',
+    'delete',
+    'csv_data_load',
+    'csv_file_load',
+    'csv_url_load',
+    'delete_files_before',
+)
+# operations after which a table's hash attribute must be read again
+_TABLE_OPERATIONS = (
+    'create_table',
+    'drop_table',
+    'drop_attribute',
+)
+
+
+def _chunks(items, chunk_size, max_bytes=None, codec=None):
+    """ Yields lists of at most chunk_size items from any iterable. When
+    max_bytes is given, each list also encodes to at most max_bytes of JSON,
+    unless a single item is larger.
+    """
+    chunk = list()
+    chunk_bytes = 0
+    for item in items:
+        if max_bytes is not None:
+            # one extra byte for the separator between items
+            item_bytes = len(codec.dumps(item)) + 1
+            if chunk and chunk_bytes + item_bytes > max_bytes:
+                yield chunk
+                chunk = list()
+                chunk_bytes = 0
+            chunk_bytes += item_bytes
+        chunk.append(item)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = list()
+            chunk_bytes = 0
+    if chunk:
+        yield chunk
+
+
+def _merge_response(merged, response):
+    """ Extend the lists of hashes in merged with those in response.
+    """
+    for key, value in response.items():
+        if isinstance(value, list):
+            merged.setdefault(key, list()).extend(value)
+
+
+def _csv_chunks(csv_file, chunk_size):
+    """ Yields the number of rows, and CSV data, for each chunk of at most
+    chunk_size rows in csv_file. The header row is repeated in every chunk.
+    """
+    csv_reader = csv.reader(csv_file)
+    header = next(csv_reader, None)
+    if header is None:
+        return
+    for rows in _chunks(csv_reader, chunk_size):
+        data = io.StringIO()
+        csv_writer = csv.writer(data, lineterminator='\n')
+        csv_writer.writerow(header)
+        csv_writer.writerows(rows)
+        yield len(rows), data.getvalue()
+
+
+def _chunk_result(index, rows, job_id, job=None, error=None):
+    """ Returns a summary of the job which loaded a chunk of a CSV file.
+    """
+    result = {
+        'chunk': index,
+        'rows': rows,
+        'job_id': job_id,
+    }
+    if job is not None:
+        result['status'] = job['status']
+        result['message'] = job.get('message')
+        if job['status'] != 'COMPLETE':
+            error = job.get('message') or job['status']
+    if error is not None:
+        result['error'] = error
+    return result
+
+
+def _csv_bulk_response(results, rows):
+    """ Returns one response for all chunks of a CSV file.
+    """
+    errors = [result for result in results if 'error' in result]
+    return {
+        'message': 'loaded {} of {} chunks'.format(
+            len(results) - len(errors),
+            len(results)),
+        'rows': rows,
+        'chunks': results,
+        'errors': errors,
+    }
+
+
+def _job_id(response):
+    """ Returns the id of the job started by an operation.
+    """
+    if 'job_id' in response:
+        return response['job_id']
+    # older versions of HarperDB only return "Starting job with id <id>"
+    return response['message'].split()[-1]
+
+
+def _bulk_response(message, hashes_key, merged, count):
+    """ Returns one response for a bulk operation, in the same shape as the
+    response to a single request.
+    """
+    response = {
+        'message': message.format(len(merged.get(hashes_key, [])), count),
+        hashes_key: list(),
+        'skipped_hashes': list(),
+    }
+    response.update(merged)
+    return response
+
+
+def _split_response(response, requests, hash_attribute, hashes_key):
+    """ Returns one response for each list of records in requests from the
+    response to all of them, matching hashes to records by hash_attribute.
+    Hashes assigned by the server are matched to records without a hash in
+    order.
+    """
+    written = {str(hash_value): hash_value for hash_value in response.get(
+        hashes_key, [])}
+    skipped = {str(hash_value): hash_value for hash_value in response.get(
+        'skipped_hashes', [])}
+    given = {
+        str(record[hash_attribute])
+        for records in requests for record in records
+        if hash_attribute in record}
+    assigned = iter([
+        hash_value for key, hash_value in written.items()
+        if key not in given])
+    responses = list()
+    for records in requests:
+        split = {
+            hashes_key: list(),
+            'skipped_hashes': list(),
+        }
+        for record in records:
+            if hash_attribute not in record:
+                hash_value = next(assigned, None)
+                if hash_value is not None:
+                    split[hashes_key].append(hash_value)
+                continue
+            key = str(record[hash_attribute])
+            if key in skipped:
+                split['skipped_hashes'].append(skipped[key])
+            elif key in written:
+                split[hashes_key].append(written[key])
+        split['message'] = '{} {} of {} records'.format(
+            'inserted' if hashes_key == 'inserted_hashes' else 'updated',
+            len(split[hashes_key]),
+            len(records))
+        responses.append(split)
+    return responses
+
+
+class _CommitGroup():
+
+    """ Records of concurrent calls to _insert or _update of one table, which
+    are sent together as one request.
+    """
+
+    def __init__(self):
+        self.requests = list()
+        self.hashes = set()
+        self.size = 0
+        # set when the group is closed early, so it's sent at once
+        self.full = threading.Event()
+        self.done = threading.Event()
+        self.responses = None
+        self.error = None
 
 
 class HarperDBBase():
 
     """ Extensible base class implements HarperDB API functions.
+
+    Each instance owns a requests.Session, so connections to the database
+    instance are pooled and kept alive between calls. Call close(), or use the
+    instance as a context manager, to release them.
+
+    Pass a harperdb.cache.LRUCache as record_cache to serve _search_by_hash
+    from memory. Records are tagged with their schema and (schema, table), so
+    tag_ttls can set a TTL per schema or table.
+
+    Pass group_commit_ms to send _insert and _update calls for the same
+    table from different threads, within group_commit_ms milliseconds of each
+    other, as one request of at most group_commit_max_records records. Each
+    call waits for the group's request, and returns only its own hashes.
+
+    Pass another LRUCache as sql_cache to serve SELECT statements passed to
+    _sql from memory, keyed by the statement with whitespace normalized.
+    Results are tagged with the schema and (schema, table) of every
+    schema.table name in the statement, and discarded when the same client
+    writes to one of those tables, including with INSERT, UPDATE or DELETE
+    statements. Writes by other clients are only seen once results expire.
     """
 
     ERROR_HASH = 'Hash value \"{}\" not found'
 
-    def __init__(self, url, username=None, password=None, timeout=10):
+    def __init__(
+            self,
+            url,
+            username=None,
+            password=None,
+            timeout=10,
+            pool_connections=10,
+            pool_maxsize=10,
+            idle_timeout=None,
+            codec=None,
+            record_cache=None,
+            sql_cache=None,
+            group_commit_ms=None,
+            group_commit_max_records=1000):
         self.url = url
         self.token = None
         if username and password:
@@ -20,30 +251,149 @@ class HarperDBBase():
             token = base64.b64encode(token).decode('utf-8')
             self.token = 'Basic {}'.format(token)
         self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.codec = codec or get_codec()
+        self.session = self._create_session(pool_connections, pool_maxsize)
+        self.__last_request_time = None
+        self.jobs = JobPoller(self)
+        self.record_cache = record_cache
+        self.sql_cache = sql_cache
+        # hash attributes of tables, read once for record_cache and
+        # group commits
+        self.__hash_attributes = dict()
+        # counts invalidations, so reads which raced a write aren't cached
+        self.__generation = 0
+        self.group_commit_ms = group_commit_ms
+        self.group_commit_max_records = group_commit_max_records
+        # the open _CommitGroup of each (operation, schema, table)
+        self.__commit_groups = dict()
+        self.__commit_lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """ Close all pooled connections. The instance remains usable, new
+        connections are opened as needed.
+        """
+        self.session.close()
 
-    def __make_request(self, data):
+    def _create_session(self, pool_connections, pool_maxsize):
+        """ Returns the requests.Session which sends requests. Subclasses
+        which send requests another way override this and _request.
+        """
+        # pool_connections is the number of hosts to keep pools for,
+        # pool_maxsize is the number of connections kept open per host
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize)
+        session = requests.Session()
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def _invalidate(self, schema=None, table=None):
+        """ Called after an operation which changes a table, every table of a
+        schema when table is None, or anything when schema is None.
+        Subclasses which cache data read from the server override this.
+        """
+        self.__generation += 1
+        for cache in (self.record_cache, self.sql_cache):
+            if cache is None:
+                continue
+            if schema is None:
+                cache.clear()
+            elif table is None:
+                cache.invalidate(schema)
+            else:
+                cache.invalidate((schema, table))
+        if schema is None:
+            self.__hash_attributes.clear()
+        elif table is None:
+            for key in list(self.__hash_attributes):
+                if key[0] == schema:
+                    del self.__hash_attributes[key]
+
+    def _invalidate_request(self, data):
+        """ Called after every request, calls _invalidate for the tables an
+        operation may have changed.
+        """
+        if data['operation'] in _TABLE_OPERATIONS:
+            # the table may be created again with another hash attribute
+            self.__hash_attributes.pop(
+                (data.get('schema'), data.get('table')),
+                None)
+        if data['operation'] in _WRITE_OPERATIONS:
+            self._invalidate(data.get('schema'), data.get('table'))
+        elif data['operation'] == 'sql' and not _is_read(data['sql']):
+            tables = _tables(data['sql'])
+            if not tables:
+                # the statement's tables are unknown
+                self._invalidate()
+            for schema, table in tables:
+                self._invalidate(schema, table)
+
+    def __make_request(self, data, stream=False):
+        # every operation sends its request through the overridable _request
+        return self._request(data, stream)
+
+    def _request(self, data, stream=False):
         """ Make a POST request to the database instance with JSON data.
 
         Returns JSON response, raises HarperDBError if the server returns 500.
+        With stream=True, returns a generator which decodes the items of a
+        JSON array response one at a time as they are read.
         """
+        try:
+            return self.__post(data, stream)
+        finally:
+            # even a failed write may have been applied in part
+            self._invalidate_request(data)
+
+    def __post(self, data, stream=False):
         headers = {
             'Content-Type': 'application/json',
         }
         if self.token:
             headers['Authorization'] = self.token
-        response = requests.request(
+        now = time.monotonic()
+        if self.idle_timeout is not None \
+                and self.__last_request_time is not None \
+                and now - self.__last_request_time > self.idle_timeout:
+            # pooled connections may have been dropped by the server while
+            # idle, start over with fresh connections
+            self.session.close()
+        self.__last_request_time = now
+        response = self.session.request(
             'POST',
             self.url,
             headers=headers,
-            data=json.dumps(data),
-            timeout=self.timeout)
-        body = response.json()
+            data=self.codec.dumps(data),
+            timeout=self.timeout,
+            stream=stream)
+        if stream and response.ok:
+            return self.__stream(response)
+        body = self.codec.loads(response.content)
         try:
             response.raise_for_status()
         except requests.exceptions.HTTPError:
             raise HarperDBError(body.get('error', 'An unknown error occurred'))
         return body
 
+    def __stream(self, response):
+        """ Yields the items of a JSON array response as they are read, then
+        releases the connection.
+        """
+        try:
+            yield from _iter_json_array(
+                response.iter_content(_STREAM_CHUNK_SIZE),
+                self.codec)
+        finally:
+            response.close()
+
     # Schemas and Tables
 
     def _create_schema(self, schema):
@@ -102,6 +452,8 @@ class HarperDBBase():
     # NoSQL Operations
 
     def _insert(self, schema, table, records):
+        if self.group_commit_ms:
+            return self.__group_commit('insert', schema, table, records)
         return self.__make_request({
             'operation': 'insert',
             'schema': schema,
@@ -110,6 +462,8 @@ class HarperDBBase():
         })
 
     def _update(self, schema, table, records):
+        if self.group_commit_ms:
+            return self.__group_commit('update', schema, table, records)
         return self.__make_request({
             'operation': 'update',
             'schema': schema,
@@ -117,6 +471,74 @@ class HarperDBBase():
             'records': records,
         })
 
+    def __group_commit(self, operation, schema, table, records):
+        """ Send records with those of concurrent calls for the same table,
+        returns the response for these records only.
+        """
+        hash_attribute = self.__hash_attribute(schema, table)
+        hashes = {
+            str(record[hash_attribute])
+            for record in records if hash_attribute in record}
+        key = (operation, schema, table)
+        with self.__commit_lock:
+            group = self.__commit_groups.get(key)
+            leader = group is None \
+                or group.size + len(records) > self.group_commit_max_records \
+                or not hashes.isdisjoint(group.hashes)
+            if leader:
+                if group is not None:
+                    # a record can't be written twice in one request
+                    group.full.set()
+                group = _CommitGroup()
+                self.__commit_groups[key] = group
+            index = len(group.requests)
+            group.requests.append(records)
+            group.hashes |= hashes
+            group.size += len(records)
+            if group.size >= self.group_commit_max_records:
+                group.full.set()
+        if not leader:
+            group.done.wait()
+            if group.error is not None:
+                raise group.error
+            return group.responses[index]
+        group.full.wait(self.group_commit_ms / 1000)
+        with self.__commit_lock:
+            if self.__commit_groups.get(key) is group:
+                del self.__commit_groups[key]
+        try:
+            response = self.__make_request({
+                'operation': operation,
+                'schema': schema,
+                'table': table,
+                'records': [
+                    record for request in group.requests
+                    for record in request],
+            })
+            if len(group.requests) == 1:
+                group.responses = [response]
+            else:
+                group.responses = _split_response(
+                    response,
+                    group.requests,
+                    hash_attribute,
+                    '{}_hashes'.format(
+                        'inserted' if operation == 'insert' else 'update'))
+        except Exception as error:
+            group.error = error
+            raise
+        finally:
+            group.done.set()
+        return group.responses[0]
+
+    def _upsert(self, schema, table, records):
+        return self.__make_request({
+            'operation': 'upsert',
+            'schema': schema,
+            'table': table,
+            'records': records,
+        })
+
     def _delete(self, schema, table, hash_values):
         return self.__make_request({
             'operation': 'delete',
@@ -131,6 +553,12 @@ class HarperDBBase():
             table,
             hash_values,
             get_attributes=['*']):
+        if self.record_cache is not None:
+            return self.__cached_search_by_hash(
+                schema,
+                table,
+                hash_values,
+                get_attributes)
         return self.__make_request({
             'operation': 'search_by_hash',
             'schema': schema,
@@ -139,13 +567,78 @@ class HarperDBBase():
             'get_attributes': get_attributes,
         })
 
+    def __hash_attribute(self, schema, table):
+        """ Returns the hash attribute of a table, read once.
+        """
+        key = (schema, table)
+        if key not in self.__hash_attributes:
+            self.__hash_attributes[key] = self._describe_table(
+                schema=schema,
+                table=table)['hash_attribute']
+        return self.__hash_attributes[key]
+
+    def __cached_search_by_hash(
+            self,
+            schema,
+            table,
+            hash_values,
+            get_attributes):
+        """ Read records from record_cache, requesting only hashes which are
+        not cached.
+        """
+        hash_attribute = self.__hash_attribute(schema, table)
+        projection = tuple(get_attributes)
+        if '*' not in projection and hash_attribute not in projection:
+            # records can't be matched to hashes without the hash attribute
+            return self.__make_request({
+                'operation': 'search_by_hash',
+                'schema': schema,
+                'table': table,
+                'hash_values': hash_values,
+                'get_attributes': get_attributes,
+            })
+        # the server may return hashes as strings, match them as strings
+        records = dict()
+        missing = list()
+        for hash_value in hash_values:
+            record = self.record_cache.get(
+                (schema, table, projection, str(hash_value)))
+            if record is None:
+                missing.append(hash_value)
+            else:
+                records[str(hash_value)] = record
+        if missing:
+            generation = self.__generation
+            for record in self.__make_request({
+                    'operation': 'search_by_hash',
+                    'schema': schema,
+                    'table': table,
+                    'hash_values': missing,
+                    'get_attributes': get_attributes}):
+                hash_value = str(record.get(hash_attribute))
+                records[hash_value] = record
+                if generation != self.__generation:
+                    continue
+                # tagged by table last, so its TTL takes precedence
+                self.record_cache.put(
+                    (schema, table, projection, hash_value),
+                    record,
+                    size=len(self.codec.dumps(record)),
+                    tags=(schema, (schema, table)))
+        # copies, so changes by the caller don't reach the cache
+        return [
+            dict(records[str(hash_value)])
+            for hash_value in hash_values
+            if str(hash_value) in records]
+
     def _search_by_value(
             self,
             schema,
             table,
             search_attribute,
             search_value,
-            get_attributes=['*']):
+            get_attributes=['*'],
+            stream=False):
         return self.__make_request({
             'operation': 'search_by_value',
             'schema': schema,
@@ -153,46 +646,317 @@ class HarperDBBase():
             'search_attribute': search_attribute,
             'search_value': search_value,
             'get_attributes': get_attributes,
-        })
+        }, stream)
+
+    def _search_by_conditions(
+            self,
+            schema,
+            table,
+            conditions,
+            operator='and',
+            get_attributes=['*'],
+            offset=None,
+            limit=None,
+            sort=None,
+            stream=False):
+        data = {
+            'operation': 'search_by_conditions',
+            'schema': schema,
+            'table': table,
+            'operator': operator,
+            'conditions': conditions,
+            'get_attributes': get_attributes,
+        }
+        # only sent when given, older versions of HarperDB don't accept them
+        if offset is not None:
+            data['offset'] = offset
+        if limit is not None:
+            data['limit'] = limit
+        if sort is not None:
+            data['sort'] = sort
+        return self.__make_request(data, stream)
+
+    # Bulk Operations
+
+    def _insert_many(
+            self,
+            schema,
+            table,
+            records,
+            chunk_size=1000,
+            max_bytes=None,
+            max_workers=4):
+        merged, count = self.__map_chunks(
+            self._insert,
+            schema,
+            table,
+            records,
+            chunk_size,
+            max_bytes,
+            max_workers)
+        return _bulk_response(
+            'inserted {} of {} records',
+            'inserted_hashes',
+            merged,
+            count)
+
+    def _update_many(
+            self,
+            schema,
+            table,
+            records,
+            chunk_size=1000,
+            max_bytes=None,
+            max_workers=4):
+        merged, count = self.__map_chunks(
+            self._update,
+            schema,
+            table,
+            records,
+            chunk_size,
+            max_bytes,
+            max_workers)
+        return _bulk_response(
+            'updated {} of {} records',
+            'update_hashes',
+            merged,
+            count)
+
+    def _delete_many(
+            self,
+            schema,
+            table,
+            hash_values,
+            chunk_size=1000,
+            max_bytes=None,
+            max_workers=4):
+        merged, count = self.__map_chunks(
+            self._delete,
+            schema,
+            table,
+            hash_values,
+            chunk_size,
+            max_bytes,
+            max_workers)
+        return _bulk_response(
+            '{} of {} records successfully deleted',
+            'deleted_hashes',
+            merged,
+            count)
+
+    def __map_chunks(
+            self,
+            operation,
+            schema,
+            table,
+            items,
+            chunk_size,
+            max_bytes,
+            max_workers):
+        """ Call operation(schema, table, chunk) for each chunk of items, on a
+        pool of max_workers threads.
+
+        Returns a dictionary of merged hash lists, and the number of items.
+        """
+        merged = dict()
+        count = 0
+        pending = collections.deque()
+        with concurrent.futures.ThreadPoolExecutor(max_workers) as executor:
+            try:
+                for chunk in _chunks(items, chunk_size, max_bytes, self.codec):
+                    count += len(chunk)
+                    pending.append(
+                        executor.submit(operation, schema, table, chunk))
+                    # only read ahead of the workers by one chunk each, so
+                    # memory stays bounded for large generators
+                    if len(pending) >= max_workers * 2:
+                        _merge_response(merged, pending.popleft().result())
+                while pending:
+                    _merge_response(merged, pending.popleft().result())
+            except BaseException:
+                for future in pending:
+                    future.cancel()
+                raise
+        return merged, count
 
     # SQL Operations
 
-    def _sql(self, sql_string):
+    def _sql(self, sql_string, params=None, stream=False):
+        if params is not None:
+            sql_string = prepare(sql_string).render(params)
+        if self.sql_cache is not None and not stream \
+                and _is_read(sql_string):
+            return self.__cached_sql(sql_string)
         return self.__make_request({
             'operation': 'sql',
             'sql': sql_string,
-        })
+        }, stream)
+
+    def __cached_sql(self, sql_string):
+        """ Read the result of a SELECT statement from sql_cache, or request
+        and cache it.
+        """
+        key = _normalize(sql_string)
+        result = self.sql_cache.get(key)
+        if result is None:
+            generation = self.__generation
+            result = self.__make_request({
+                'operation': 'sql',
+                'sql': sql_string,
+            })
+            if generation == self.__generation:
+                tags = list()
+                for schema, table in _tables(sql_string):
+                    tags.extend((schema, (schema, table)))
+                self.sql_cache.put(
+                    key,
+                    result,
+                    size=len(self.codec.dumps(result)),
+                    tags=tags)
+        # copies, so changes by the caller don't reach the cache
+        return [dict(record) for record in result]
+
+    def _sql_many(self, sql_string, param_sets, max_workers=4):
+        """ Render sql_string with each set of params and execute the
+        statements on a pool of max_workers threads. The template is parsed
+        once.
+
+        Returns a list of responses, in the order of param_sets.
+        """
+        template = prepare(sql_string)
+        responses = list()
+        pending = collections.deque()
+        with concurrent.futures.ThreadPoolExecutor(max_workers) as executor:
+            try:
+                for params in param_sets:
+                    pending.append(executor.submit(
+                        self._sql,
+                        template.render(params)))
+                    if len(pending) >= max_workers * 2:
+                        responses.append(pending.popleft().result())
+                while pending:
+                    responses.append(pending.popleft().result())
+            except BaseException:
+                for future in pending:
+                    future.cancel()
+                raise
+        return responses
 
     # CSV Operations
 
-    def _csv_data_load(self, schema, table, path, action='insert'):
+    def _csv_data_load(
+            self,
+            schema,
+            table,
+            path,
+            action='insert',
+            future=False):
         with open(path) as csv_file:
             data = csv_file.read()
-        return self.__make_request({
+        return self.__csv_data_load(schema, table, data, action, future)
+
+    def __csv_data_load(self, schema, table, data, action, future=False):
+        return self.__job(self.__make_request({
             'operation': 'csv_data_load',
             'action': action,
             'schema': schema,
             'table': table,
             'data': data,
-        })
+        }), future)
 
-    def _csv_file_load(self, schema, table, file_path, action='insert'):
-        return self.__make_request({
+    def _csv_bulk_load(
+            self,
+            schema,
+            table,
+            path,
+            action='insert',
+            chunk_size=10000,
+            max_workers=4,
+            timeout=None):
+        results = list()
+        rows = 0
+        pending = collections.deque()
+        with open(path, newline='') as csv_file, \
+                concurrent.futures.ThreadPoolExecutor(max_workers) as executor:
+            try:
+                chunks = _csv_chunks(csv_file, chunk_size)
+                for index, (row_count, data) in enumerate(chunks):
+                    rows += row_count
+                    pending.append((index, row_count, executor.submit(
+                        self.__csv_data_load,
+                        schema,
+                        table,
+                        data,
+                        action,
+                        True)))
+                    # no more than max_workers jobs run at once, chunks wait
+                    # in memory only until one finishes
+                    if len(pending) > max_workers:
+                        results.append(
+                            self.__chunk_result(*pending.popleft(), timeout))
+                while pending:
+                    results.append(
+                        self.__chunk_result(*pending.popleft(), timeout))
+            except BaseException:
+                for index, row_count, submitted in pending:
+                    submitted.cancel()
+                raise
+        return _csv_bulk_response(results, rows)
+
+    def __chunk_result(self, index, rows, submitted, timeout):
+        """ Wait for the job loading a CSV chunk to finish. Returns a summary
+        of the job.
+        """
+        try:
+            job = submitted.result()
+        except HarperDBError as error:
+            return _chunk_result(index, rows, None, error=str(error))
+        try:
+            job.result(timeout)
+        except concurrent.futures.TimeoutError:
+            # stop waiting for the job, it continues on the server
+            job.cancel()
+            return _chunk_result(
+                index,
+                rows,
+                job.job_id,
+                error='job "{}" did not finish within {} seconds'.format(
+                    job.job_id,
+                    timeout))
+        except HarperDBError as error:
+            if job.job is None:
+                return _chunk_result(index, rows, job.job_id, error=str(error))
+        return _chunk_result(index, rows, job.job_id, job=job.job)
+
+    def _csv_file_load(
+            self,
+            schema,
+            table,
+            file_path,
+            action='insert',
+            future=False):
+        return self.__job(self.__make_request({
             'operation': 'csv_file_load',
             'action': action,
             'schema': schema,
             'table': table,
             'file_path': file_path,
-        })
+        }), future)
 
-    def _csv_url_load(self, schema, table, csv_url, action='insert'):
-        return self.__make_request({
+    def _csv_url_load(
+            self,
+            schema,
+            table,
+            csv_url,
+            action='insert',
+            future=False):
+        return self.__job(self.__make_request({
             'operation': 'csv_url_load',
             'action': action,
             'schema': schema,
             'table': table,
             'csv_url': csv_url,
-        })
+        }), future)
 
     # Users and Roles
 
@@ -320,13 +1084,13 @@ class HarperDBBase():
 
     # Utilities
 
-    def _delete_files_before(self, schema, table, date):
-        return self.__make_request({
+    def _delete_files_before(self, schema, table, date, future=False):
+        return self.__job(self.__make_request({
             'operation': 'delete_files_before',
             'schema': schema,
             'table': table,
             'date': date,
-        })
+        }), future)
 
     def _export_local(
             self,
@@ -335,7 +1099,8 @@ class HarperDBBase():
             search_value=None,
             hash_values=None,
             sql=None,
-            format='json'):
+            format='json',
+            future=False):
         call = {
             'operation': 'export_local',
             'path': path,
@@ -355,7 +1120,7 @@ class HarperDBBase():
             search_operation['operation'] = 'sql'
             search_operation['sql'] = sql
         call['search_operation'] = search_operation
-        return self.__make_request(call)
+        return self.__job(self.__make_request(call), future)
 
     def _export_to_s3(
             self,
@@ -367,7 +1132,8 @@ class HarperDBBase():
             search_value=None,
             hash_values=None,
             sql=None,
-            format='json'):
+            format='json',
+            future=False):
         call = {
             'operation': 'export_to_s3',
             'format': format,
@@ -392,7 +1158,7 @@ class HarperDBBase():
             search_operation['operation'] = 'sql'
             search_operation['sql'] = sql
         call['search_operation'] = search_operation
-        return self.__make_request(call)
+        return self.__job(self.__make_request(call), future)
 
     def _read_log(
             self,
@@ -424,6 +1190,17 @@ class HarperDBBase():
             'id': id,
         })
 
+    def _job_future(self, response):
+        """ Returns a JobFuture for the job started by an operation, which is
+        done when the job has finished on the server.
+        """
+        return self.jobs.track(_job_id(response))
+
+    def __job(self, response, future):
+        if future:
+            return self._job_future(response)
+        return response
+
     def _search_jobs_by_start_date(self, from_date, to_date):
         return self.__make_request({
             'operation': 'search_jobs_by_start_date',
@@ -0,0 +1,189 @@
+import concurrent.futures
+import datetime
+import threading
+import time
+
+from .exceptions import HarperDBError
+
+
+# job statuses after which a job will not change
+FINISHED = ('COMPLETE', 'ERROR')
+
+
+def _date_string(timestamp):
+    """ Returns a date string for search_jobs_by_start_date from a Unix time.
+    """
+    date = datetime.datetime.fromtimestamp(timestamp, datetime.timezone.utc)
+    return date.strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + '+0000'
+
+
+class JobFuture(concurrent.futures.Future):
+
+    """ A handle for a job running on the server, such as a csv_data_load.
+
+    JobFuture is a concurrent.futures.Future, result() waits for the job and
+    returns it as returned by get_job. If the job fails, result() raises
+    HarperDBError with the job's message. Cancelling a JobFuture stops
+    tracking the job, the job continues on the server.
+
+    Instance Attributes:
+      - job (dict): The last status of the job read from the server, or None
+      - job_id (string): Unique identifier assigned to the job
+    """
+
+    def __init__(self, job_id):
+        super().__init__()
+        self.job_id = job_id
+        self.job = None
+        self._started = time.time()
+
+
+class JobPoller():
+
+    """ Waits for every JobFuture of a database instance from one background
+    thread. Outstanding jobs are read with one search_jobs_by_start_date
+    request, or get_job when only one job is outstanding.
+
+    Polling starts every poll_interval seconds, and the interval doubles up
+    to max_poll_interval while no job finishes. The thread exits when no jobs
+    are outstanding.
+
+    Instance Attributes:
+      - interval (float): Seconds until the next poll
+      - max_poll_interval (float): Longest time between polls, default 5
+      - poll_interval (float): Shortest time between polls, default 0.1
+      - search_window (float): Seconds around the start of outstanding jobs
+        to search, to allow for a difference between the client and server
+        clocks, default 300
+    """
+
+    def __init__(
+            self,
+            database,
+            poll_interval=0.1,
+            max_poll_interval=5,
+            search_window=300):
+        self.database = database
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.search_window = search_window
+        self.interval = poll_interval
+        self.__futures = dict()
+        self.__condition = threading.Condition()
+        self.__thread = None
+
+    def __len__(self):
+        with self.__condition:
+            return sum(
+                1 for future in self.__futures.values()
+                if not future.cancelled())
+
+    def track(self, job_id):
+        """ Returns a JobFuture for job_id, which is done when the job has
+        finished on the server.
+        """
+        with self.__condition:
+            future = self.__futures.get(job_id)
+            if future is None or future.cancelled():
+                future = JobFuture(job_id)
+                self.__futures[job_id] = future
+            # new jobs are polled for quickly
+            self.interval = self.poll_interval
+            if self.__thread is None:
+                self.__thread = threading.Thread(
+                    target=self.__run,
+                    name='HarperDB JobPoller',
+                    daemon=True)
+                self.__thread.start()
+            self.__condition.notify()
+        return future
+
+    def poll(self):
+        """ Read the status of every outstanding job once, finishing the
+        futures of jobs which are complete or failed.
+
+        Returns the number of jobs which finished.
+        """
+        with self.__condition:
+            for job_id, future in list(self.__futures.items()):
+                if future.cancelled():
+                    del self.__futures[job_id]
+            futures = dict(self.__futures)
+        if not futures:
+            return 0
+        jobs = dict()
+        if len(futures) > 1:
+            started = min(future._started for future in futures.values())
+            for job in self.database._search_jobs_by_start_date(
+                    _date_string(started - self.search_window),
+                    _date_string(time.time() + self.search_window)):
+                if job.get('id') in futures:
+                    jobs[job['id']] = job
+        for job_id in futures:
+            if job_id not in jobs:
+                found = self.database._get_job(job_id)
+                # a job unknown to the server fails
+                jobs[job_id] = found[0] if found else {
+                    'id': job_id,
+                    'status': 'ERROR',
+                    'message': 'job "{}" not found'.format(job_id),
+                }
+        finished = 0
+        for job_id, job in jobs.items():
+            future = futures[job_id]
+            future.job = job
+            if job['status'] not in FINISHED:
+                continue
+            with self.__condition:
+                self.__futures.pop(job_id, None)
+            finished += 1
+            # a future cancelled since it was read is left cancelled
+            if not future.set_running_or_notify_cancel():
+                continue
+            if job['status'] == 'COMPLETE':
+                future.set_result(job)
+            else:
+                future.set_exception(HarperDBError(
+                    job.get('message') or 'job "{}" failed'.format(job_id)))
+        with self.__condition:
+            if finished:
+                self.interval = self.poll_interval
+            else:
+                self.interval = min(
+                    self.interval * 2,
+                    self.max_poll_interval)
+        return finished
+
+    def __run(self):
+        while True:
+            with self.__condition:
+                if not self.__futures:
+                    self.__thread = None
+                    return
+                self.__condition.wait(self.interval)
+            try:
+                self.poll()
+            except Exception:
+                # the server could not be read, try again after backing off
+                with self.__condition:
+                    self.interval = self.max_poll_interval
+
+
+def wait_all(futures, timeout=None):
+    """ Wait for every JobFuture to finish, returns a list of the finished
+    jobs in the same order. Raises HarperDBError if a job failed, and
+    concurrent.futures.TimeoutError if the jobs don't finish within timeout
+    seconds.
+    """
+    futures = list(futures)
+    done, not_done = concurrent.futures.wait(futures, timeout)
+    if not_done:
+        raise concurrent.futures.TimeoutError(
+            '{} of {} jobs did not finish'.format(len(not_done), len(futures)))
+    return [future.result() for future in futures]
+
+
+def as_completed(futures, timeout=None):
+    """ Yields each JobFuture as its job finishes.
+    """
+    return concurrent.futures.as_completed(futures, timeout)
@@ -0,0 +1,268 @@
+import functools
+import math
+import re
+
+
+# string literals and quoted identifiers
+_QUOTED = re.compile(r"""'(?:[^']|'')*'|"(?:[^"]|"")*"|`[^`]*`""")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_IDENTIFIER = r'(?:`[^`]*`|"[^"]*"|\[[^\]]*\]|[A-Za-z_][\w$]*)'
+_TABLE_NAME = re.compile(r'({0})\s*\.\s*({0})'.format(_IDENTIFIER))
+_FIRST_WORD = re.compile(r'[\s(]*([A-Za-z]+)')
+_WHITESPACE = re.compile(r'\s+')
+# quoted text is matched first, so placeholders in quotes are left as they are
+_PLACEHOLDER = re.compile(
+    _QUOTED.pattern + r'|(\?)|(?<![:\w]):([A-Za-z_]\w*)')
+
+
+def _escape_string(value):
+    return "'" + value.replace('\\', '\\\\').replace("'", "''") + "'"
+
+
+def _escape_float(value):
+    if math.isnan(value) or math.isinf(value):
+        raise ValueError('cannot escape {} as SQL'.format(value))
+    return repr(value)
+
+
+def _escape_list(values):
+    if not values:
+        # IN () is not valid SQL, and (NULL) matches nothing
+        return '(NULL)'
+    return '(' + ', '.join(escape(value) for value in values) + ')'
+
+
+_ESCAPERS = {
+    str: _escape_string,
+    bool: lambda value: 'TRUE' if value else 'FALSE',
+    int: str,
+    float: _escape_float,
+    type(None): lambda value: 'NULL',
+    list: _escape_list,
+    tuple: _escape_list,
+    set: _escape_list,
+    frozenset: _escape_list,
+}
+
+
+def escape(value):
+    """ Returns value as a SQL literal. Strings are quoted, with quotes and
+    backslashes doubled, None is NULL, and lists, tuples and sets become a
+    parenthesized list for IN. Raises TypeError for other types.
+    """
+    escaper = _ESCAPERS.get(type(value))
+    if escaper is None:
+        # subclasses, such as enum.IntEnum, are escaped as their base type
+        for value_type, escaper in _ESCAPERS.items():
+            if isinstance(value, value_type):
+                break
+        else:
+            raise TypeError('cannot escape {} as SQL'.format(
+                type(value).__name__))
+    return escaper(value)
+
+
+class SQLTemplate():
+
+    """ A SQL statement with placeholders, parsed once and rendered with
+    escaped parameters many times.
+
+    Placeholders are either all ? (positional) or all :name (named), and are
+    not recognized inside quotes.
+
+    Instance Attributes:
+      - names (list): Placeholder names, or None for positional placeholders
+      - placeholders (int): Number of placeholders
+      - template (string): The statement with placeholders
+
+    Instance Methods:
+      - render(params): Returns the statement with each placeholder replaced
+        by an escaped parameter, from a sequence or a mapping
+    """
+
+    def __init__(self, template):
+        self.template = template
+        # literal text between placeholders, one more than placeholders
+        self.__parts = list()
+        keys = list()
+        positional = False
+        position = 0
+        for match in _PLACEHOLDER.finditer(template):
+            question_mark, name = match.groups()
+            if question_mark is None and name is None:
+                continue
+            self.__parts.append(template[position:match.start()])
+            position = match.end()
+            if question_mark is not None:
+                positional = True
+                keys.append(len(keys))
+            else:
+                keys.append(name)
+        self.__parts.append(template[position:])
+        if positional and len(set(map(type, keys))) > 1:
+            raise ValueError(
+                'SQL template mixes ? and :name placeholders: {}'.format(
+                    template))
+        self.__keys = keys
+        self.names = None if positional else keys
+        self.placeholders = len(keys)
+
+    def render(self, params):
+        """ Returns the statement with each placeholder replaced by an escaped
+        parameter. params is a sequence for ? placeholders, and a mapping for
+        :name placeholders.
+        """
+        if self.names is None and len(params) != self.placeholders:
+            raise ValueError(
+                'SQL template takes {} parameters, {} given'.format(
+                    self.placeholders,
+                    len(params)))
+        parts = self.__parts
+        rendered = [parts[0]]
+        for index, key in enumerate(self.__keys):
+            try:
+                value = params[key]
+            except KeyError:
+                raise ValueError(
+                    'missing SQL parameter "{}"'.format(key)) from None
+            rendered.append(escape(value))
+            rendered.append(parts[index + 1])
+        return ''.join(rendered)
+
+
+@functools.lru_cache(maxsize=256)
+def prepare(template):
+    """ Returns a SQLTemplate for template, parsing each template only once.
+    """
+    return SQLTemplate(template)
+
+
+def _normalize(sql_string):
+    """ Returns sql_string with runs of whitespace outside of quotes replaced
+    by one space, and without surrounding whitespace or a trailing semicolon.
+    """
+    parts = list()
+    position = 0
+    for match in _QUOTED.finditer(sql_string):
+        parts.append(_WHITESPACE.sub(
+            ' ',
+            sql_string[position:match.start()]))
+        parts.append(match.group())
+        position = match.end()
+    parts.append(_WHITESPACE.sub(' ', sql_string[position:]))
+    return ''.join(parts).strip().rstrip(';').rstrip()
+
+
+def _tables(sql_string):
+    """ Returns a list of (schema, table) for every schema.table name in
+    sql_string, ignoring string literals. Every dotted name is returned, so
+    the list may include aliased columns as well as tables.
+    """
+    tables = list()
+    for match in _TABLE_NAME.finditer(_STRING.sub("''", sql_string)):
+        table = tuple(name.strip('`"[]') for name in match.groups())
+        if table not in tables:
+            tables.append(table)
+    return tables
+
+
+def _is_read(sql_string):
+    """ Returns True if sql_string is a SELECT statement.
+    """
+    match = _FIRST_WORD.match(sql_string)
+    return match is not None and match.group(1).upper() == 'SELECT'
+
+
+def _identifier(name):
+    """ Returns a schema, table or attribute name quoted for SQL.
+    """
+    return '`{}`'.format(name.replace('`', '``'))
+
+
+def _scan_statement(
+        schema,
+        table,
+        hash_attribute,
+        get_attributes,
+        where,
+        after,
+        limit,
+        until=None,
+        offset=0):
+    """ Returns a SELECT statement for one page of a scan: at most limit
+    records matching where, ordered by hash_attribute, with a hash greater
+    than after unless after is None, and no greater than until unless until
+    is None.
+    """
+    if '*' in get_attributes:
+        columns = '*'
+    else:
+        # the hash of the last record is needed to read the next page
+        attributes = list(get_attributes)
+        if hash_attribute not in attributes:
+            attributes.insert(0, hash_attribute)
+        columns = ', '.join(_identifier(name) for name in attributes)
+    conditions = list()
+    if where:
+        conditions.append('({})'.format(where))
+    if after is not None:
+        conditions.append('{} > {}'.format(
+            _identifier(hash_attribute),
+            escape(after)))
+    if until is not None:
+        conditions.append('{} <= {}'.format(
+            _identifier(hash_attribute),
+            escape(until)))
+    return 'SELECT {} FROM {}.{}{} ORDER BY {} LIMIT {}{}'.format(
+        columns,
+        _identifier(schema),
+        _identifier(table),
+        ' WHERE ' + ' AND '.join(conditions) if conditions else '',
+        _identifier(hash_attribute),
+        int(limit),
+        ' OFFSET {}'.format(int(offset)) if offset else '')
+
+
+def _set_value(value):
+    """ Returns value as an SQL SET value. Raises TypeError for lists,
+    dictionaries and sets, which escape() would render for IN.
+    """
+    if isinstance(value, (list, tuple, set, frozenset, dict)):
+        raise TypeError('cannot set {} in SQL'.format(type(value).__name__))
+    return escape(value)
+
+
+def _compare_and_set_statement(
+        schema,
+        table,
+        hash_attribute,
+        hash_value,
+        updated_time,
+        changes):
+    """ Returns an UPDATE statement which sets the attributes in changes of
+    the record with hash_value, only if its __updatedtime__ is no later than
+    updated_time.
+    """
+    return 'UPDATE {}.{} SET {} WHERE {} = {} AND {} <= {}'.format(
+        _identifier(schema),
+        _identifier(table),
+        ', '.join(
+            '{} = {}'.format(_identifier(attribute), _set_value(value))
+            for attribute, value in changes.items()),
+        _identifier(hash_attribute),
+        escape(hash_value),
+        _identifier('__updatedtime__'),
+        # the server may store fractional milliseconds, compare them all
+        escape(updated_time))
+
+
+def _range_statement(schema, table, hash_attribute, where):
+    """ Returns a SELECT statement for the lowest and highest hash, and the
+    number of records matching where, as low, high and count.
+    """
+    return 'SELECT MIN({0}) AS `low`, MAX({0}) AS `high`, ' \
+        'COUNT(*) AS `count` FROM {1}.{2}{3}'.format(
+            _identifier(hash_attribute),
+            _identifier(schema),
+            _identifier(table),
+            ' WHERE ({})'.format(where) if where else '')
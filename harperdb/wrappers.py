@@ -1,8 +1,105 @@
+import collections
+import concurrent.futures
+import contextlib
+import copy
 import csv
 import datetime
+import queue
+import random
+import re
+import threading
+import time
+
+from .catalog import HarperDBCatalog
+from .exceptions import HarperDBConflictError, HarperDBError
+from .harperdb_base import (
+    HarperDBBase,
+    HarperDBError,
+    _chunks,
+    _split_response,
+)
+from .sql import (
+    _compare_and_set_statement,
+    _range_statement,
+    _scan_statement,
+    prepare,
+)
+from .writer import BufferedWriter
+
+
+# the whole error HarperDB returns when rejecting an unknown operation
+_UNSUPPORTED_OPERATION = re.compile(
+    r'operation [\'"]?([\w-]+)[\'"]? not found\.?', re.IGNORECASE)
+# attributes set by the server, which are never written
+_UNWRITTEN_ATTRIBUTES = ('__createdtime__', '__updatedtime__')
+
+
+def _is_unsupported_operation(error, operation):
+    """ Returns True if a HarperDBError was raised because the server does not
+    implement operation.
+    """
+    # other errors may mention the operation, only this one disables it
+    match = _UNSUPPORTED_OPERATION.fullmatch(str(error).strip())
+    return match is not None and match.group(1).lower() == operation
+
+
+def _raise_skipped(response):
+    """ Returns the response to an update, or raises HarperDBError if the
+    server skipped a record because its hash was not found.
+    """
+    skipped_hashes = response.get('skipped_hashes')
+    if skipped_hashes:
+        raise HarperDBError(HarperDBBase.ERROR_HASH.format(skipped_hashes[0]))
+    return response
 
-from .exceptions import HarperDBError
-from .harperdb_base import HarperDBBase, HarperDBError
+
+def _merge_batches(scans):
+    """ Yields the batches of many generators as they are read, consuming
+    each generator on its own thread. Only a few batches per generator are
+    read ahead of the caller.
+    """
+    scans = list(scans)
+    if not scans:
+        return
+    batches = queue.Queue(len(scans) * 2)
+    stop = threading.Event()
+
+    def put(item):
+        # give up when the caller has stopped reading
+        while not stop.is_set():
+            try:
+                batches.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def read(scan):
+        try:
+            for batch in scan:
+                if not put(batch):
+                    return
+        except BaseException as error:
+            put(error)
+        finally:
+            scan.close()
+            put(None)
+
+    with concurrent.futures.ThreadPoolExecutor(len(scans)) as executor:
+        try:
+            for scan in scans:
+                executor.submit(read, scan)
+            finished = 0
+            while finished < len(scans):
+                batch = batches.get()
+                if batch is None:
+                    finished += 1
+                elif isinstance(batch, BaseException):
+                    raise batch
+                else:
+                    yield batch
+        finally:
+            stop.set()
 
 
 class HarperDBWrapper(HarperDBBase):
@@ -26,14 +123,44 @@ class HarperDBWrapper(HarperDBBase):
       - username (string): (optional) Basic Auth username
       - password (string): (optional) Basic Auth password
       - timeout (float): Seconds to wait for a server response, default 10
+      - pool_connections (int): Number of hosts to keep connection pools for,
+        default 10
+      - pool_maxsize (int): Connections kept open per host, default 10
+      - idle_timeout (float): Seconds a connection may sit idle in the pool
+        before the pool is reset, default None (never)
+      - codec (JSONCodec): Encodes requests and decodes responses, default
+        is the fastest available, see harperdb.codec.get_codec
+      - record_cache (LRUCache): Serves _search_by_hash from memory, default
+        None (not cached), see harperdb.cache.LRUCache
+      - metadata_ttl (float): Seconds schema and table metadata is cached
+        for, default 0 (not cached). None caches metadata until this client
+        changes it
+      - sql_cache (LRUCache): Serves SELECT statements passed to _sql from
+        memory, default None (not cached), see harperdb.cache.LRUCache
+      - group_commit_ms (float): Milliseconds concurrent _insert and _update
+        calls for a table wait to be sent together, default None (off)
+      - group_commit_max_records (int): Records per group commit, default
+        1000
 
     Instance Attributes:
+      - catalog (HarperDBCatalog): Cached schema and table metadata
+      - codec (JSONCodec): Encodes requests and decodes responses
       - token (string): Value used in Authorization header, or None. The value
         is generated automatically when instantiated with both username and
         password
+      - idle_timeout (float): Seconds a connection may sit idle in the pool
+      - jobs (JobPoller): Waits for jobs started with future=True
+      - record_cache (LRUCache): Records read with _search_by_hash, or None
+      - session (requests.Session): Pooled, keep-alive connections to url
+      - sql_cache (LRUCache): Results of SELECT statements, or None
+      - native_upsert (bool): Use the HarperDB upsert operation in
+        HarperDBTable.upsert, default True. Set to False automatically when
+        the server does not support it
       - timeout (float): Seconds to wait for a server response
       - url (string): Full URL of HarperDB instance
 
+    Instances are context managers, close() releases pooled connections.
+
     High-Level Methods:
       - create_schema(name): Create a schema, returns HarperDBSchema
       - drop_schema(name): Drop a schema
@@ -53,6 +180,7 @@ class HarperDBWrapper(HarperDBBase):
       NoSQL Operations:
         - _insert(schema, table, [records])
         - _update(schema, table, [records])
+        - _upsert(schema, table, [records])
         - _delete(schema, table, [hashes])
         - _search_by_hash(schema, table, [hashes], get_attributes=['*'])
         - _search_by_value(schema,
@@ -60,12 +188,46 @@ class HarperDBWrapper(HarperDBBase):
                            search_attribute,
                            search_value,
                            get_attributes=['*'])
+      Bulk Operations:
+        - _insert_many(schema,
+                       table,
+                       records,
+                       chunk_size=1000,
+                       max_bytes=None,
+                       max_workers=4)
+        - _update_many(schema,
+                       table,
+                       records,
+                       chunk_size=1000,
+                       max_bytes=None,
+                       max_workers=4)
+        - _delete_many(schema,
+                       table,
+                       hash_values,
+                       chunk_size=1000,
+                       max_bytes=None,
+                       max_workers=4)
       SQL Operations:
         - _sql(SQL)
       CSV Operations:
-        - _csv_data_load(schema, table, path, action="insert")
-        - _csv_file_load(schema, table, file_path, action="insert")
-        - _csv_url_load(schema, table, csv_url, action="insert")
+        - _csv_data_load(schema, table, path, action="insert", future=False)
+        - _csv_file_load(schema,
+                         table,
+                         file_path,
+                         action="insert",
+                         future=False)
+        - _csv_url_load(schema,
+                        table,
+                        csv_url,
+                        action="insert",
+                        future=False)
+        - _csv_bulk_load(schema,
+                       table,
+                       path,
+                       action="insert",
+                       chunk_size=10000,
+                       max_workers=4,
+                       timeout=None)
       Users and Roles:
         - _add_user(role id, username, password, active=True)
         - _add_role(name, permission)
@@ -86,14 +248,15 @@ class HarperDBWrapper(HarperDBBase):
         - _get_fingerprint()
         - _set_license(key, company)
       Utilities:
-        - _delete_files_before(schema, table, date)
+        - _delete_files_before(schema, table, date, future=False)
         - _export_local(path,
                         search_operation,
                         search_attribute=None,
                         search_value=None,
                         hash_values=None,
                         sql=None,
-                        format="json")
+                        format="json",
+                        future=False)
         - _export_to_s3(aws_access_key_id,
                         aws_secret_access_key,
                         bucket,
@@ -103,7 +266,8 @@ class HarperDBWrapper(HarperDBBase):
                         search_value=None,
                         hash_value=None,
                         sql=None,
-                        format="json")
+                        format="json",
+                        future=False)
         - _read_log(limit=1000,
                     start=0,
                     from_date=None,
@@ -114,6 +278,38 @@ class HarperDBWrapper(HarperDBBase):
         - _get_job(id)
     """
 
+    native_upsert = True
+
+    def __init__(
+            self,
+            url,
+            username=None,
+            password=None,
+            timeout=10,
+            pool_connections=10,
+            pool_maxsize=10,
+            idle_timeout=None,
+            codec=None,
+            record_cache=None,
+            metadata_ttl=0,
+            sql_cache=None,
+            group_commit_ms=None,
+            group_commit_max_records=1000):
+        super().__init__(
+            url,
+            username,
+            password,
+            timeout,
+            pool_connections,
+            pool_maxsize,
+            idle_timeout,
+            codec,
+            record_cache,
+            sql_cache,
+            group_commit_ms,
+            group_commit_max_records)
+        self.catalog = HarperDBCatalog(self, metadata_ttl)
+
     def __getitem__(self, key):
         return HarperDBSchema(key, self)
 
@@ -125,18 +321,21 @@ class HarperDBWrapper(HarperDBBase):
         return _HarperDBSchemas(self.__get_schemas())
 
     def __len__(self):
-        return len(self.__get_schemas())
+        return len(self.catalog.schemas())
 
     def __get_schemas(self):
         """ Returns a dictionary of schemas, subscriptable by name.
         """
         return_value = dict()
-        schemas = self._describe_all()
-        for schema, tables in schemas.items():
+        for schema in self.catalog.schemas():
             schema_object = HarperDBSchema(schema, self)
             return_value[schema] = schema_object
         return return_value
 
+    def _invalidate(self, schema=None, table=None):
+        super()._invalidate(schema, table)
+        self.catalog.invalidate(schema, table)
+
     def create_schema(self, name):
         """ Create a schema in this database.
         """
@@ -154,6 +353,22 @@ class HarperDBRecord():
     """ Record data is subscriptable by record data key, and supports item
     assignment. Record metadata is stored in instance attributes.
 
+    Records keep the data they were returned with by the server, so reading
+    values makes no further requests. Records created without data are read
+    from the server when first used, together with the other records of the
+    same batch. Call refresh() to read fresh data.
+
+    Records read with a projection, such as search_by_value(attributes=...),
+    hold only some attributes. Any other attribute is read from the server
+    on its own when first used, and to_dict() reads the whole record.
+
+    Assigning a value updates that attribute on the server at once, unless
+    the record belongs to a HarperDBSession, which writes every change
+    together. save(data) writes only the attributes of data which differ
+    from the record as last read or written, compared with ==. With
+    if_unmodified_since, they are only written if no one else has written
+    the record since, see HarperDBTable.compare_and_set.
+
     You should never need to instantiate this class directly, use
     HarperDBTable.upsert instead.
 
@@ -167,33 +382,116 @@ class HarperDBRecord():
       - __updatedtime__ (int): Epoch time in milliseconds
 
     Instance Methods:
+      - changes(): Returns a dictionary of the attributes changed since the
+        record was last read or written
       - delete(): Delete this record
+      - fetch(attributes): Read only some attributes of this record from the
+        server, returns them as a dictionary
+      - refresh(): Read this record's data from the server
+      - save(data=None, if_unmodified_since=None): Apply data to this
+        record, then update only the changed attributes on the server, only
+        if the record was not modified since if_unmodified_since when given
       - to_dict(): Returns record data as a dictionary
+      - update(data): Change attributes of this record without writing them,
+        see save() and HarperDBTable.save_all
     """
 
-    def __init__(self, table, hash_value):
+    def __init__(self, table, hash_value, data=None, partial=False):
         assert isinstance(table, HarperDBTable)
         self.table = table
         self._hash_value = hash_value
+        self._data = data
+        # data holds only some attributes, others are read when used
+        self._partial = partial
+        # loads this record together with others, see _HarperDBRecordLoader
+        self._loader = None
+        # collects changes to this record, see HarperDBSession
+        self._session = None
+        # a deep copy of the data as last read or written, taken when data
+        # is first used, so values changed in place are found by changes()
+        self._baseline = None
 
     def __getitem__(self, key):
-        try:
-            return self.table.schema.database._search_by_hash(
-                schema=self.table.schema.name,
-                table=self.table.name,
-                hash_values=[self._hash_value])[0][key]
-        except IndexError:
-            raise HarperDBError(
-                'record with hash \"{}\" not found in \"{}.{}\"'.format(
-                    self._hash_value,
-                    self.table.schema.name,
-                    self.table.name))
+        data = self.__get_data()
+        # timestamps are discarded when this record is written
+        if key not in data \
+                and (self._partial or key in _UNWRITTEN_ATTRIBUTES):
+            self.fetch([key])
+        return data[key]
 
     def __setitem__(self, key, value):
+        if self._session is not None:
+            self._session._change(self, key, value)
+            self.__change({key: value})
+            return
         self.table.schema.database._update(
             schema=self.table.schema.name,
             table=self.table.name,
-            records={key: value})
+            records=[{
+                self.table.hash_attribute: self._hash_value,
+                key: value,
+            }])
+        if self._data is not None:
+            self._data[key] = value
+        self._saved({key: value})
+
+    def __change(self, data):
+        """ Change this record's data locally, keeping a copy of the data
+        as last read or written.
+        """
+        if self._data is None:
+            return
+        if self._baseline is None:
+            self._baseline = copy.deepcopy(self._data)
+        self._data.update(data)
+
+    def _saved(self, changes):
+        """ Called when changes to this record have been written.
+        """
+        if self._baseline is not None:
+            self._baseline.update(copy.deepcopy(changes))
+        if self._data is not None:
+            # the server has a new __updatedtime__, read it when next used
+            self._data.pop('__updatedtime__', None)
+
+    def __get_data(self):
+        """ Returns the record's data, reading it from the server if this
+        record has none yet.
+        """
+        if self._data is None:
+            loader, self._loader = self._loader, None
+            if loader is None:
+                self.refresh()
+            else:
+                loader.load(self)
+                if self._data is None:
+                    raise self.__not_found()
+            if self._session is not None:
+                # values assigned in a session before this record was read
+                self.__change(self._session._changes_of(self))
+        if self._baseline is None:
+            self._baseline = copy.deepcopy(self._data)
+        return self._data
+
+    def __not_found(self):
+        return HarperDBError(
+            'record with hash \"{}\" not found in \"{}.{}\"'.format(
+                self._hash_value,
+                self.table.schema.name,
+                self.table.name))
+
+    def changes(self):
+        """ Returns a dictionary of the attributes whose value differs from
+        the record as last read or written.
+        """
+        if self._baseline is None:
+            return dict()
+        unchanged = object()
+        return {
+            key: value for key, value in self._data.items()
+            if key not in _UNWRITTEN_ATTRIBUTES
+            and key != self.table.hash_attribute
+            and self._baseline.get(key, unchanged) != value}
 
     def delete(self):
         """ Delete this record.
@@ -202,19 +500,97 @@ class HarperDBRecord():
             schema=self.table.schema.name,
             table=self.table.name,
             hash_values=[self._hash_value])
+        self._data = None
+        self._partial = False
+        self._baseline = None
 
-    def to_dict(self):
-        record = self.table.schema.database._search_by_hash(
+    def fetch(self, attributes):
+        """ Read only the given attributes of this record from the server,
+        adding them to its data. Returns a dictionary of the attributes read.
+        """
+        hash_attribute = self.table.hash_attribute
+        records = self.table.schema.database._search_by_hash(
             schema=self.table.schema.name,
             table=self.table.name,
-            hash_values=[self._hash_value])[0]
+            hash_values=[self._hash_value],
+            get_attributes=[hash_attribute] + [
+                attribute for attribute in attributes
+                if attribute != hash_attribute])
+        if not records:
+            raise self.__not_found()
+        if self._data is None:
+            self._data = dict()
+            self._partial = True
+        self._data.update(records[0])
+        if self._baseline is not None:
+            self._baseline.update(copy.deepcopy(records[0]))
+        return {
+            attribute: records[0][attribute]
+            for attribute in attributes
+            if attribute in records[0]}
+
+    def refresh(self):
+        """ Read this record's data from the server.
+        """
+        records = self.table.schema.database._search_by_hash(
+            schema=self.table.schema.name,
+            table=self.table.name,
+            hash_values=[self._hash_value])
+        try:
+            # HarperDB returns a list of records, empty if none found
+            self._data = records[0]
+        except IndexError:
+            raise self.__not_found()
+        self._partial = False
+        self._baseline = None
+
+    def save(self, data=None, if_unmodified_since=None):
+        """ Apply data, a dictionary such as a changed copy of to_dict(), to
+        this record, then update only the attributes which differ from the
+        record as last read or written. Returns the update response, or None
+        if nothing changed.
+
+        When if_unmodified_since is given, usually the record's
+        __updatedtime__ as read, the changes are only written if the record
+        has not been written since, and HarperDBConflictError is raised
+        otherwise.
+        """
+        if data is not None:
+            self.update(data)
+        changes = self.changes()
+        if not changes:
+            return None
+        if if_unmodified_since is None:
+            return _raise_skipped(
+                self.table._write_changes([(self, changes)]))
+        response = self.table.compare_and_set(
+            self._hash_value,
+            if_unmodified_since,
+            changes)
+        self._saved(changes)
+        return response
+
+    def to_dict(self):
+        if self._partial:
+            # read the whole record, keeping values changed locally
+            changes = self.changes()
+            self.refresh()
+            self.__change(changes)
         return_value = dict()
-        for key, value in record.items():
-            if key in ['__createdtime__', '__updatedtime__']:
+        for key, value in self.__get_data().items():
+            if key in _UNWRITTEN_ATTRIBUTES:
                 continue
             return_value[key] = value
         return return_value
 
+    def update(self, data):
+        """ Change attributes of this record from a dictionary, without
+        writing them to the server. save(), or HarperDBTable.save_all, writes
+        the changes.
+        """
+        self.__get_data()
+        self.__change(data)
+
     @property
     def created_time(self):
         return datetime.datetime.fromtimestamp(self.__createdtime__ / 1000)
@@ -225,31 +601,11 @@ class HarperDBRecord():
 
     @property
     def __createdtime__(self):
-        records = self.table.schema.database._search_by_hash(
-            schema=self.table.schema.name,
-            table=self.table.name,
-            hash_values=[self._hash_value])
-        try:
-            # HarperDB returns a list of records, empty if none found
-            record = records[0]
-        except IndexError:
-            raise HarperDBError(HarperDBBase.ERROR_HASH.format(
-                self._hash_value))
-        return record['__createdtime__']
+        return self['__createdtime__']
 
     @property
     def __updatedtime__(self):
-        records = self.table.schema.database._search_by_hash(
-            schema=self.table.schema.name,
-            table=self.table.name,
-            hash_values=[self._hash_value])
-        try:
-            # HarperDB returns a list of records, empty if none found
-            record = records[0]
-        except IndexError:
-            raise HarperDBError(HarperDBBase.ERROR_HASH.format(
-                self._hash_value))
-        return record['__updatedtime__']
+        return self['__updatedtime__']
 
 
 class HarperDBSchema():
@@ -285,10 +641,10 @@ class HarperDBSchema():
 
     def __iter__(self):
         # get a current list of tables and iterate over that
-        return _HarperDBTables(self.database._describe_schema(self.name), self)
+        return _HarperDBTables(self.database.catalog.tables(self.name), self)
 
     def __len__(self):
-        return len(self.database._describe_schema(self.name))
+        return len(self.database.catalog.tables(self.name))
 
     def create_table(self, name, hash_attribute):
         """ Create a table in this schema.
@@ -315,9 +671,10 @@ class HarperDBSchema():
 
 class HarperDBTable():
 
-    """ Records are subscriptable by hash_attribute, but HarperDBTable is not
-    iterable. The length of a HarperDBTable instance returns the number of
-    records in the table. Table metadata is contained in instance attributes.
+    """ Records are subscriptable by hash_attribute. Iterating a HarperDBTable
+    yields every record in the table, see scan(). The length of a
+    HarperDBTable instance returns the number of records in the table. Table
+    metadata is contained in instance attributes.
 
     You should never need to instantiate this class directly, use
     HarperDBSchema.create_table instead.
@@ -337,18 +694,49 @@ class HarperDBTable():
       - __updatedtime__ (int): Epoch time in milliseconds
 
     Instance Methods:
+      - batch_load(batch_size=1000): Context manager, records created by
+        subscripting this table within it are read from the server together
+      - buffered_writer(max_records=1000, max_bytes=None,
+        max_latency_ms=100, max_buffered=None, operation='upsert',
+        on_error=None): Returns a BufferedWriter, which upserts or inserts
+        records written from many threads in batches
+      - compare_and_set(hash_value, updated_time, changes): Update attributes
+        of a record only if it has not been written since updated_time
       - delete(hash): Delete a record by hash value
       - drop(): Drop this table
-      - search_by_value(search_attribute, search_value): Return a list of
-        matching HarperDBRecord instances.
+      - load(records, batch_size=1000): Read the data of many HarperDBRecord
+        instances, with one search_by_hash request per batch_size records
+      - modify(hash_value, function, max_attempts=5): Read a record, apply
+        function to its data and save the changes with compare_and_set,
+        reading and applying it again on conflict
+      - parallel_scan(partitions=4, batch_size=1000, get_attributes=['*'],
+        where=None, params=None, merge=True): Scan disjoint ranges of hash
+        values concurrently, returns an iterator of HarperDBRecord instances,
+        or a list of generators with merge=False
+      - query(operator='and'): Returns a HarperDBQuery, to search this table
+        by several conditions on the server
+      - refresh(): Discard cached metadata of this table
+      - save_all(records, batch_size=1000): Update only the changed
+        attributes of many HarperDBRecord instances, with one update request
+        per batch_size records
+      - scan(batch_size=1000, get_attributes=['*'], where=None, params=None):
+        Yields HarperDBRecord instances for every record, or those matching a
+        SQL condition, reading batch_size records per request
+      - search_by_value(search_attribute, search_value, attributes=None):
+        Return a list of matching HarperDBRecord instances, reading only
+        attributes when given
+      - session(batch_size=1000): Context manager, returns a HarperDBSession
+        which writes changes to records of this table together on exit
       - upsert(record): Insert a record from a dictionary, or list of
         dictionaries. If the a value is given for the table's hash_attribute,
         and this table has a matching record, that record will be updated. Any
         records skipped by the server will be omitted from the return value.
-      - upsert_from_csv(path): Insert records from a CSV file, with headers in
+      - upsert_from_csv(path, batch_size=None, max_workers=2, progress=None,
+        return_records=True): Insert records from a CSV file, with headers in
         the first row. Any records which have a value for the table's
         hash_attribute will be updated. Any records skipped by the server will
-        be omitted from the return value.
+        be omitted from the return value. Streams the file in batches when
+        batch_size is given.
     """
 
     def __init__(self, name, schema, hash_attribute=None):
@@ -356,9 +744,18 @@ class HarperDBTable():
         self.name = name
         self.schema = schema
         self._hash_attribute = hash_attribute
+        self.__loader = None
+        self.__session = None
 
     def __getitem__(self, key):
-        return HarperDBRecord(table=self, hash_value=key)
+        record = HarperDBRecord(table=self, hash_value=key)
+        session_record = self._tracked(record)
+        if session_record is not record:
+            # already read or changed within the session
+            return session_record
+        if self.__loader is not None:
+            self.__loader.add(record)
+        return record
 
     def __delitem__(self, key):
         response = self.schema.database._delete(
@@ -368,12 +765,104 @@ class HarperDBTable():
         if response['skipped_hashes']:
             raise HarperDBError(HarperDBBase.ERROR_HASH.format(key))
 
+    def __iter__(self):
+        return self.scan()
+
     def __len__(self):
-        table = self.schema.database._describe_table(
-            schema=self.schema.name,
-            table=self.name)
+        table = self.__describe()
         return table['record_count']
 
+    @contextlib.contextmanager
+    def batch_load(self, batch_size=1000):
+        """ Records created by subscripting this table within this context
+        are read from the server together, with one search_by_hash request
+        per batch_size records, when the first of them is used.
+        """
+        loader = self.__loader
+        self.__loader = _HarperDBRecordLoader(self, batch_size)
+        try:
+            yield self
+        finally:
+            self.__loader = loader
+
+    def buffered_writer(
+            self,
+            max_records=1000,
+            max_bytes=None,
+            max_latency_ms=100,
+            max_buffered=None,
+            operation='upsert',
+            on_error=None):
+        """ Returns a BufferedWriter, which collects records written from
+        any number of threads and writes them to this table in batches from
+        a background thread, with operation 'upsert' or 'insert'.
+        """
+        if operation == 'upsert':
+            write = self.__upsert_hashes
+        elif operation == 'insert':
+            write = self.__insert_hashes
+        else:
+            raise ValueError(
+                'operation must be "upsert" or "insert", not "{}"'.format(
+                    operation))
+        return BufferedWriter(
+            lambda records: self.__record_hashes(records, write(records)),
+            self.schema.database.codec,
+            max_records=max_records,
+            max_bytes=max_bytes,
+            max_latency_ms=max_latency_ms,
+            max_buffered=max_buffered,
+            on_error=on_error)
+
+    def compare_and_set(self, hash_value, updated_time, changes):
+        """ Update the attributes in changes, a dictionary, of the record
+        with hash_value, only if its __updatedtime__ is no later than
+        updated_time, in epoch milliseconds or a datetime.datetime. The
+        condition is part of one SQL UPDATE statement, so it is checked on
+        the server as the record is written.
+
+        Lists and dictionaries can't be set in SQL. The statement sets them
+        to NULL, and once it has been written they are written with an
+        update, so they are NULL for a moment in between.
+
+        Returns the update response. Raises HarperDBConflictError if the
+        record was written since updated_time, or was not found.
+        """
+        if isinstance(updated_time, datetime.datetime):
+            updated_time = updated_time.timestamp() * 1000
+        if not changes:
+            return None
+        json_changes = {
+            attribute: value for attribute, value in changes.items()
+            if isinstance(value, (list, tuple, dict))}
+        sql_changes = dict(changes)
+        sql_changes.update(dict.fromkeys(json_changes))
+        response = self.schema.database._sql(_compare_and_set_statement(
+            self.schema.name,
+            self.name,
+            self.hash_attribute,
+            hash_value,
+            updated_time,
+            sql_changes))
+        if not response.get('update_hashes'):
+            raise HarperDBConflictError(
+                'record with hash \"{}\" in \"{}.{}\" was modified since {} '
+                'or not found'.format(
+                    hash_value,
+                    self.schema.name,
+                    self.name,
+                    updated_time))
+        if json_changes:
+            # the statement has advanced __updatedtime__, so other writers
+            # comparing with an earlier time conflict until this is written
+            record = dict(json_changes)
+            record[self.hash_attribute] = hash_value
+            _raise_skipped(self.schema.database._update(
+                schema=self.schema.name,
+                table=self.name,
+                records=[record]))
+        return response
+
     def delete(self, hash_value):
         """ Delete a record from this table.
         """
@@ -392,22 +881,314 @@ class HarperDBTable():
             schema=self.schema.name,
             table=self.name)
 
-    def search_by_value(self, search_attribute, search_value):
+    def __describe(self):
+        """ Returns this table's metadata, cached by the database catalog.
+        """
+        return self.schema.database.catalog.describe_table(
+            self.schema.name,
+            self.name)
+
+    def load(self, records, batch_size=1000):
+        """ Read the data of HarperDBRecord instances of this table which
+        have none yet, with one search_by_hash request per batch_size records.
+        """
+        loader = _HarperDBRecordLoader(self, batch_size)
+        for record in records:
+            if record._data is None:
+                loader.add(record)
+        loader.load_all()
+
+    def modify(self, hash_value, function, max_attempts=5, backoff=0.01):
+        """ Read the record with hash_value, call function with a dictionary
+        of its data, and save the changes function makes to it, or to the
+        dictionary it returns, with compare_and_set. If another writer wrote
+        the record in between, it is read and function is called again, up
+        to max_attempts times, waiting a random time of up to backoff
+        seconds, doubled after each attempt. Returns the HarperDBRecord.
+
+        function may be called more than once, and should only change the
+        dictionary it is given.
+        """
+        record = HarperDBRecord(table=self, hash_value=hash_value)
+        for attempt in range(max_attempts):
+            record.refresh()
+            updated_time = record.__updatedtime__
+            # function may change nested values of a copy of the data
+            data = copy.deepcopy(record.to_dict())
+            result = function(data)
+            try:
+                record.save(
+                    data if result is None else result,
+                    if_unmodified_since=updated_time)
+            except HarperDBConflictError:
+                if attempt + 1 == max_attempts:
+                    raise
+                time.sleep(random.uniform(0, backoff * 2 ** attempt))
+            else:
+                return record
+
+    def refresh(self):
+        """ Discard cached metadata of this table, properties read it from
+        the server again.
+        """
+        self.schema.database.catalog.invalidate(self.schema.name, self.name)
+
+    def scan(
+            self,
+            batch_size=1000,
+            get_attributes=['*'],
+            where=None,
+            params=None):
+        """ Yields a HarperDBRecord for every record in this table, in order
+        of hash value, or only records matching where, a SQL condition which
+        is rendered with params when given.
+
+        Records are read with one SQL request per batch_size records, each
+        starting after the last hash value read, and the next batch is read
+        while the current one is used. No more than two batches are held in
+        memory.
+        """
+        if params is not None:
+            where = prepare(where).render(params)
+        return self.__records_of(
+            self.__scan_batches(batch_size, get_attributes, where),
+            get_attributes)
+
+    def query(self, operator='and'):
+        """ Returns a HarperDBQuery of this table, with conditions joined by
+        operator, 'and' or 'or'.
+        """
+        return HarperDBQuery(self, operator)
+
+    def parallel_scan(
+            self,
+            partitions=4,
+            batch_size=1000,
+            get_attributes=['*'],
+            where=None,
+            params=None,
+            merge=True):
+        """ Scan this table as up to partitions disjoint ranges of hash
+        values, read concurrently. Takes the same arguments as scan().
+
+        Numeric hash values are split evenly between their lowest and
+        highest value, other hash values at quantiles of the matching
+        records. With merge=True, returns one iterator which yields records
+        in no particular order as they are read, from a thread per
+        partition. Otherwise returns a list of generators, one per partition,
+        each yielding its records in order of hash value.
+        """
+        if partitions < 1:
+            raise ValueError(
+                'partitions must be at least 1, not {}'.format(partitions))
+        if params is not None:
+            where = prepare(where).render(params)
+        ranges = self.__partition(partitions, where)
+        scans = [
+            self.__scan_batches(batch_size, get_attributes, where, *bounds)
+            for bounds in ranges]
+        if not merge:
+            return [
+                self.__records_of(batches, get_attributes)
+                for batches in scans]
+        return self.__records_of(_merge_batches(scans), get_attributes)
+
+    def __partition(self, partitions, where):
+        """ Returns a list of (after, until) hash bounds for scans of up to
+        partitions disjoint ranges of this table, or no ranges when no
+        records match where.
+        """
+        database = self.schema.database
+        hash_attribute = self.hash_attribute
+        rows = database._sql(_range_statement(
+            self.schema.name,
+            self.name,
+            hash_attribute,
+            where))
+        # an empty table may give no row, or a row without aggregates
+        bounds = rows[0] if rows else dict()
+        count = bounds.get('count')
+        if not count:
+            return list()
+        low, high = bounds.get('low'), bounds.get('high')
+        # no more partitions than records, so every quantile has a record
+        partitions = min(partitions, count)
+        if all(
+                isinstance(value, (int, float))
+                and not isinstance(value, bool)
+                for value in (low, high)):
+            step = (high - low) / partitions
+            boundaries = [low + step * index for index in range(1, partitions)]
+            if isinstance(low, int) and isinstance(high, int):
+                boundaries = [int(boundary) for boundary in boundaries]
+        else:
+            # the last hash before each quantile of the matching records
+            boundaries = list()
+            for index in range(1, partitions):
+                records = database._sql(_scan_statement(
+                    self.schema.name,
+                    self.name,
+                    hash_attribute,
+                    [hash_attribute],
+                    where,
+                    None,
+                    1,
+                    offset=count * index // partitions - 1))
+                if records:
+                    boundaries.append(records[0][hash_attribute])
+        # a small range of hash values may give fewer partitions
+        boundaries = sorted(set(
+            boundary for boundary in boundaries
+            if low <= boundary < high))
+        return list(zip([None] + boundaries, boundaries + [None]))
+
+    def __scan_batches(
+            self,
+            batch_size,
+            get_attributes,
+            where,
+            after=None,
+            until=None):
+        """ Yields lists of up to batch_size records matching where, with a
+        hash greater than after and no greater than until, in order of hash
+        value. The next list is read while the current one is used.
+        """
+        database = self.schema.database
+        hash_attribute = self.hash_attribute
+
+        def read_batch(after):
+            return database._sql(_scan_statement(
+                self.schema.name,
+                self.name,
+                hash_attribute,
+                get_attributes,
+                where,
+                after,
+                batch_size,
+                until))
+
+        with concurrent.futures.ThreadPoolExecutor(1) as executor:
+            future = executor.submit(read_batch, after)
+            while future is not None:
+                records = future.result()
+                future = None
+                # a short batch is the last
+                if len(records) == batch_size:
+                    future = executor.submit(
+                        read_batch,
+                        records[-1][hash_attribute])
+                yield records
+
+    def __records_of(self, batches, get_attributes):
+        """ Yields a HarperDBRecord with data for every record in batches,
+        read with get_attributes.
+        """
+        hash_attribute = self.hash_attribute
+        partial = '*' not in get_attributes
+        for records in batches:
+            for record in records:
+                yield self._tracked(HarperDBRecord(
+                    table=self,
+                    hash_value=record[hash_attribute],
+                    data=record,
+                    partial=partial))
+
+    def search_by_value(
+            self,
+            search_attribute,
+            search_value,
+            attributes=None):
         """ Returns a list of HarperDBRecord instances for each record found
         where the search_attribute of the record matches seach_value. Wild
         cards (*) are allowed.
+
+        When attributes is given only those attributes, and the hash
+        attribute, are read. Other attributes are read when first used.
         """
+        get_attributes = ['*']
+        if attributes is not None:
+            get_attributes = [self.hash_attribute] + [
+                attribute for attribute in attributes
+                if attribute != self.hash_attribute]
         records = self.schema.database._search_by_value(
             schema=self.schema.name,
             table=self.name,
             search_attribute=search_attribute,
-            search_value=search_value)
-        return_value = list()
+            search_value=search_value,
+            get_attributes=get_attributes)
+        return list(self.__records_of([records], get_attributes))
+
+    def save_all(self, records, batch_size=1000):
+        """ Update the changed attributes of each HarperDBRecord of this
+        table, see HarperDBRecord.save, with one update request per
+        batch_size changed records. Returns the update response, or None if
+        nothing changed.
+        """
+        changes = list()
         for record in records:
-            return_value.append(HarperDBRecord(
-                table=self,
-                hash_value=record[self.hash_attribute]))
-        return return_value
+            changed = record.changes()
+            if changed:
+                changes.append((record, changed))
+        if not changes:
+            return None
+        return _raise_skipped(self._write_changes(changes, batch_size))
+
+    def _write_changes(self, changes, batch_size=1000):
+        """ Update records from a list of (HarperDBRecord, changes), sending
+        only the changed attributes and the hash of each. Returns the update
+        response, see _raise_skipped.
+        """
+        hash_attribute = self.hash_attribute
+        records = list()
+        for record, changed in changes:
+            written = dict(changed)
+            written[hash_attribute] = record._hash_value
+            records.append(written)
+        if len(records) <= batch_size:
+            response = self.schema.database._update(
+                schema=self.schema.name,
+                table=self.name,
+                records=records)
+        else:
+            response = self.schema.database._update_many(
+                schema=self.schema.name,
+                table=self.name,
+                records=records,
+                chunk_size=batch_size)
+        skipped = {
+            str(hash_value)
+            for hash_value in response.get('skipped_hashes') or []}
+        for record, changed in changes:
+            if str(record._hash_value) not in skipped:
+                record._saved(changed)
+        return response
+
+    @contextlib.contextmanager
+    def session(self, batch_size=1000):
+        """ Returns a HarperDBSession. Records of this table created within
+        this context, by subscripting, searching, scanning or querying it,
+        are held by the session, one per hash, and changes to them are
+        written together when the context exits, unless it exits with an
+        exception.
+        """
+        session = HarperDBSession(self, batch_size)
+        previous = self.__session
+        self.__session = session
+        try:
+            yield session
+            session.flush()
+        finally:
+            self.__session = previous
+            session.close()
+
+    def _tracked(self, record):
+        """ Returns the session's record with the hash of record while a
+        session is active, adding record to it if it has none, otherwise
+        returns record.
+        """
+        if self.__session is None:
+            return record
+        return self.__session.add(record)
 
     def upsert(self, records):
         """ Insert a record from a dictionary, or list of dictionaries. If a
@@ -420,28 +1201,7 @@ class HarperDBTable():
         if not isinstance(records, list):
             records = [records]
             return_list = False
-        # insert records
-        insert_return_json = self.schema.database._insert(
-            schema=self.schema.name,
-            table=self.name,
-            records=records)
-        inserted_hashes = insert_return_json['inserted_hashes']
-        inserted_hashes = [str(hash) for hash in inserted_hashes]
-        upserted_hashes = inserted_hashes
-        skipped_hashes = insert_return_json['skipped_hashes']
-        skipped_hashes = [str(hash) for hash in skipped_hashes]
-        # any skipped records need to be updated
-        if skipped_hashes:
-            # make a list of records to update
-            records_to_update = list()
-            for record in records:
-                if record.get(self.hash_attribute) in skipped_hashes:
-                    records_to_update.append(record)
-            update_return_json = self.schema.database._update(
-                schema=self.schema.name,
-                table=self.name,
-                records=records_to_update)
-            upserted_hashes += update_return_json['update_hashes']
+        upserted_hashes = self.__upsert_hashes(records)
         if not return_list:
             # return a single record
             if upserted_hashes:
@@ -450,33 +1210,161 @@ class HarperDBTable():
                     hash_value=upserted_hashes[0])
             # else, the record was skipped
             return
-        # return a list of records
+        # return a list of records, read together when first used
+        return self.__records(upserted_hashes)
+
+    def __records(self, hash_values):
+        """ Returns a list of HarperDBRecord instances, which are read from
+        the server together when the first of them is used.
+        """
+        loader = _HarperDBRecordLoader(self)
         return_value = list()
-        for hash_value in upserted_hashes:
-            return_value.append(HarperDBRecord(
-                table=self,
-                hash_value=hash_value))
+        for hash_value in hash_values:
+            record = HarperDBRecord(table=self, hash_value=hash_value)
+            loader.add(record)
+            return_value.append(record)
         return return_value
 
-    def upsert_from_csv(self, path):
+    def __upsert_hashes(self, records):
+        """ Upsert a list of records, returns a list of upserted hashes.
+        """
+        if self.schema.database.native_upsert:
+            try:
+                upsert_return_json = self.schema.database._upsert(
+                    schema=self.schema.name,
+                    table=self.name,
+                    records=records)
+            except HarperDBError as error:
+                if not _is_unsupported_operation(error, 'upsert'):
+                    raise
+                # older versions of HarperDB don't implement upsert, don't
+                # try again with this database
+                self.schema.database.native_upsert = False
+            else:
+                return upsert_return_json['upserted_hashes']
+        return self.__insert_then_update(records)
+
+    def __record_hashes(self, records, hashes):
+        """ Returns the hash of each record from the hashes written, or None
+        for records which the server skipped.
+        """
+        responses = _split_response(
+            {'inserted_hashes': hashes},
+            [[record] for record in records],
+            self.hash_attribute,
+            'inserted_hashes')
+        return [
+            response['inserted_hashes'][0]
+            if response['inserted_hashes'] else None
+            for response in responses]
+
+    def __insert_hashes(self, records):
+        """ Insert a list of records, returns a list of inserted hashes.
+        """
+        return self.schema.database._insert(
+            schema=self.schema.name,
+            table=self.name,
+            records=records)['inserted_hashes']
+
+    def __insert_then_update(self, records):
+        """ Upsert records by inserting them, then updating any records the
+        server skipped because their hash already exists. Returns a list of
+        upserted hashes.
+        """
+        # the server may return hashes as strings, map them back to the
+        # values given in records so hashes keep their type
+        record_hashes = dict()
+        for record in records:
+            if self.hash_attribute in record:
+                hash_value = record[self.hash_attribute]
+                record_hashes[str(hash_value)] = hash_value
+        insert_return_json = self.schema.database._insert(
+            schema=self.schema.name,
+            table=self.name,
+            records=records)
+        upserted_hashes = [
+            record_hashes.get(str(hash_value), hash_value)
+            for hash_value in insert_return_json['inserted_hashes']]
+        skipped_hashes = {
+            str(hash_value)
+            for hash_value in insert_return_json['skipped_hashes']}
+        # any skipped records need to be updated
+        if skipped_hashes:
+            records_to_update = [
+                record for record in records
+                if self.hash_attribute in record
+                and str(record[self.hash_attribute]) in skipped_hashes]
+            update_return_json = self.schema.database._update(
+                schema=self.schema.name,
+                table=self.name,
+                records=records_to_update)
+            upserted_hashes += [
+                record_hashes.get(str(hash_value), hash_value)
+                for hash_value in update_return_json['update_hashes']]
+        return upserted_hashes
+
+    def upsert_from_csv(
+            self,
+            path,
+            batch_size=None,
+            max_workers=2,
+            progress=None,
+            return_records=True):
         """ Insert records from a CSV file, with headers in the first row. Any
         records which have a value for the table's hash_attribute will be
         updated. Any records skipped by the server will be omitted from the
         return value.
+
+        When batch_size is given the file is streamed, batches of batch_size
+        rows are upserted from max_workers threads while the next batches are
+        parsed, and no more than max_workers + 1 batches are held in memory.
+        progress(rows_read, rows_upserted) is called as each batch completes.
+        With return_records=False a dictionary of counts is returned instead
+        of HarperDBRecord instances.
         """
-        # simply pass file contents to upsert() and return its result
-        records = list()
-        with open(path, newline='') as csv_file:
+        upserted_hashes = list()
+        counts = {
+            'rows': 0,
+            'upserted': 0,
+            'skipped': 0,
+        }
+        pending = collections.deque()
+
+        def finish_batch():
+            row_count, future = pending.popleft()
+            hashes = future.result()
+            counts['upserted'] += len(hashes)
+            counts['skipped'] += row_count - len(hashes)
+            if return_records:
+                upserted_hashes.extend(hashes)
+            if progress is not None:
+                progress(counts['rows'], counts['upserted'])
+
+        with open(path, newline='') as csv_file, \
+                concurrent.futures.ThreadPoolExecutor(max_workers) as executor:
             csv_reader = csv.DictReader(csv_file)
-            for row in csv_reader:
-                records.append(row)
-        return self.upsert(records)
+            try:
+                # without batch_size, all rows are upserted in one request
+                for batch in _chunks(csv_reader, batch_size or float('inf')):
+                    counts['rows'] += len(batch)
+                    pending.append((
+                        len(batch),
+                        executor.submit(self.__upsert_hashes, batch)))
+                    if len(pending) > max_workers:
+                        finish_batch()
+                while pending:
+                    finish_batch()
+            except BaseException:
+                for row_count, future in pending:
+                    future.cancel()
+                raise
+        if not return_records:
+            return counts
+        return self.__records(upserted_hashes)
 
     @property
     def attributes(self):
-        table = self.schema.database._describe_table(
-            schema=self.schema.name,
-            table=self.name)
+        table = self.__describe()
         attributes = list()
         for attribute in table['attributes']:
             if attribute['attribute'] == '__createdtime__':
@@ -493,17 +1381,13 @@ class HarperDBTable():
     @property
     def hash_attribute(self):
         if not self._hash_attribute:
-            table = self.schema.database._describe_table(
-                schema=self.schema.name,
-                table=self.name)
+            table = self.__describe()
             self._hash_attribute = table['hash_attribute']
         return self._hash_attribute
 
     @property
     def id(self):
-        table = self.schema.database._describe_table(
-            schema=self.schema.name,
-            table=self.name)
+        table = self.__describe()
         return table['id']
 
     @property
@@ -516,19 +1400,330 @@ class HarperDBTable():
 
     @property
     def __createdtime__(self):
-        table = self.schema.database._describe_table(
-            schema=self.schema.name,
-            table=self.name)
+        table = self.__describe()
         return table['__createdtime__']
 
     @property
     def __updatedtime__(self):
-        table = self.schema.database._describe_table(
-            schema=self.schema.name,
-            table=self.name)
+        table = self.__describe()
         return table['__updatedtime__']
 
 
+class HarperDBQuery():
+
+    """ A search of a table by several conditions, sent to the server as one
+    search_by_conditions request, so records are filtered next to the
+    table's indexes. Each method returns a new HarperDBQuery, refining a
+    query leaves the original unchanged. Iterating a query runs it and
+    yields HarperDBRecord instances.
+
+    You should never need to instantiate this class directly, use
+    HarperDBTable.query instead.
+
+    Instance Attributes:
+      - operator (string): How conditions are joined, 'and' or 'or'
+      - table (HarperDBTable): Instance of the table searched
+
+    Instance Methods:
+      - all(): Returns a list of matching HarperDBRecord instances
+      - first(): Returns the first matching HarperDBRecord, or None
+      - limit(count): Return at most count records
+      - offset(count): Skip the first count records
+      - order_by(attribute, descending=False): Sort by attribute, calls after
+        the first sort records which are equal so far
+      - select(*attributes): Read only these attributes, others are read
+        when first used
+      - where(attribute, search_type, value): Add a condition, search_type is
+        one of SEARCH_TYPES
+      - where_any(*conditions): Add a group of (attribute, search_type,
+        value) conditions, any of which may match. Requires a HarperDB
+        version which supports nested conditions
+    """
+
+    SEARCH_TYPES = (
+        'equals',
+        'contains',
+        'starts_with',
+        'ends_with',
+        'greater_than',
+        'greater_than_equal',
+        'less_than',
+        'less_than_equal',
+        'between',
+    )
+
+    def __init__(self, table, operator='and'):
+        assert isinstance(table, HarperDBTable)
+        self.table = table
+        self.operator = operator
+        self._conditions = list()
+        self._attributes = None
+        self._offset = None
+        self._limit = None
+        # (attribute, descending), most significant first
+        self._sort = list()
+
+    def __iter__(self):
+        return iter(self.all())
+
+    def __refine(self):
+        """ Returns a copy of this query, to be changed by a method.
+        """
+        query = copy.copy(self)
+        query._conditions = list(self._conditions)
+        query._sort = list(self._sort)
+        return query
+
+    def __condition(self, attribute, search_type, value):
+        if search_type not in self.SEARCH_TYPES:
+            raise ValueError('unknown search_type "{}"'.format(search_type))
+        if search_type == 'between':
+            value = list(value)
+        return {
+            'search_attribute': attribute,
+            'search_type': search_type,
+            'search_value': value,
+        }
+
+    def where(self, attribute, search_type, value):
+        """ Returns a query which also matches attribute against value, for
+        example where('age', 'between', [5, 8]).
+        """
+        query = self.__refine()
+        query._conditions.append(
+            self.__condition(attribute, search_type, value))
+        return query
+
+    def where_any(self, *conditions):
+        """ Returns a query with a group of (attribute, search_type, value)
+        conditions, any of which may match.
+        """
+        query = self.__refine()
+        query._conditions.append({
+            'operator': 'or',
+            'conditions': [
+                self.__condition(*condition) for condition in conditions],
+        })
+        return query
+
+    def select(self, *attributes):
+        """ Returns a query which reads only attributes, and the hash
+        attribute, of each record.
+        """
+        query = self.__refine()
+        query._attributes = list(attributes)
+        return query
+
+    def order_by(self, attribute, descending=False):
+        """ Returns a query sorted by attribute, after any earlier sort.
+        """
+        query = self.__refine()
+        query._sort.append((attribute, descending))
+        return query
+
+    def limit(self, count):
+        """ Returns a query which returns at most count records.
+        """
+        query = self.__refine()
+        query._limit = count
+        return query
+
+    def offset(self, count):
+        """ Returns a query which skips the first count records.
+        """
+        query = self.__refine()
+        query._offset = count
+        return query
+
+    def all(self):
+        """ Run this query, returns a list of matching HarperDBRecord
+        instances.
+        """
+        table = self.table
+        hash_attribute = table.hash_attribute
+        get_attributes = ['*']
+        if self._attributes is not None:
+            get_attributes = [hash_attribute] + [
+                attribute for attribute in self._attributes
+                if attribute != hash_attribute]
+        sort = None
+        # each later sort breaks ties of the one before it
+        for attribute, descending in reversed(self._sort):
+            next_sort = sort
+            sort = {'attribute': attribute, 'descending': descending}
+            if next_sort is not None:
+                sort['next'] = next_sort
+        records = table.schema.database._search_by_conditions(
+            schema=table.schema.name,
+            table=table.name,
+            conditions=self._conditions,
+            operator=self.operator,
+            get_attributes=get_attributes,
+            offset=self._offset,
+            limit=self._limit,
+            sort=sort)
+        return [
+            table._tracked(HarperDBRecord(
+                table=table,
+                hash_value=record[hash_attribute],
+                data=record,
+                partial=self._attributes is not None))
+            for record in records]
+
+    def first(self):
+        """ Run this query for one record, returns the first matching
+        HarperDBRecord, or None.
+        """
+        records = self.limit(1).all()
+        return records[0] if records else None
+
+
+class HarperDBSession():
+
+    """ A unit of work for the records of one table. The session holds one
+    HarperDBRecord per hash value, and values assigned to its records are
+    collected rather than written one at a time. flush() writes every
+    changed record with one update request per batch_size records, sending
+    only the changed attributes and the hash of each.
+
+    You should never need to instantiate this class directly, use
+    HarperDBTable.session instead.
+
+    Instance Attributes:
+      - batch_size (int): Records per update request
+      - dirty (list): HarperDBRecord instances with unwritten changes
+      - table (HarperDBTable): Instance of the table
+
+    Instance Methods:
+      - add(record): Returns the session's HarperDBRecord with the hash of
+        record, adding record if the session has none
+      - discard(): Forget unwritten changes, records keep their new values
+      - flush(): Write every unwritten change, returns the update response,
+        or None if nothing changed
+    """
+
+    def __init__(self, table, batch_size=1000):
+        self.table = table
+        self.batch_size = batch_size
+        # records, and changed attributes, by hash as a string
+        self.__records = dict()
+        self.__changes = collections.OrderedDict()
+
+    def __getitem__(self, key):
+        return self.add(HarperDBRecord(table=self.table, hash_value=key))
+
+    def __len__(self):
+        return len(self.__records)
+
+    def add(self, record):
+        """ Returns the session's record with the hash of record, adding
+        record to the session if it has none.
+        """
+        key = str(record._hash_value)
+        session_record = self.__records.get(key)
+        if session_record is None:
+            record._session = self
+            self.__records[key] = record
+            session_record = record
+        return session_record
+
+    def _change(self, record, key, value):
+        """ Called when a value is assigned to a record of this session.
+        """
+        hash_key = str(record._hash_value)
+        self.__changes.setdefault(hash_key, (record, dict()))[1][key] = value
+
+    def _changes_of(self, record):
+        """ Returns the unwritten changes to record.
+        """
+        return self.__changes.get(str(record._hash_value), (record, {}))[1]
+
+    @property
+    def dirty(self):
+        return [record for record, changes in self.__changes.values()]
+
+    def discard(self):
+        """ Forget unwritten changes. Records keep their assigned values
+        until refreshed.
+        """
+        self.__changes.clear()
+
+    def flush(self):
+        """ Write every unwritten change, with one update request per
+        batch_size records. Raises HarperDBError if a record is not found.
+        """
+        if not self.__changes:
+            return None
+        response = self.table._write_changes(
+            list(self.__changes.values()),
+            self.batch_size)
+        self.__changes.clear()
+        return _raise_skipped(response)
+
+    def close(self):
+        """ Forget unwritten changes and release the session's records,
+        values assigned to them afterwards are written at once.
+        """
+        for record in self.__records.values():
+            record._session = None
+        self.__records.clear()
+        self.__changes.clear()
+
+
+class _HarperDBRecordLoader():
+
+    """ Reads the data of many HarperDBRecord instances of a table, with one
+    search_by_hash request per batch_size records.
+
+    When a record added to the loader is used, it is read together with up to
+    batch_size - 1 other records still waiting to be read.
+    """
+
+    def __init__(self, table, batch_size=1000):
+        self.table = table
+        self.batch_size = batch_size
+        self.pending = collections.OrderedDict()
+
+    def add(self, record):
+        record._loader = self
+        self.pending[id(record)] = record
+
+    def load(self, record):
+        """ Read the data of record, and the next records waiting to be read.
+        """
+        batch = [record]
+        self.pending.pop(id(record), None)
+        while self.pending and len(batch) < self.batch_size:
+            other = self.pending.popitem(last=False)[1]
+            if other._data is None:
+                batch.append(other)
+        self.__search(batch)
+
+    def load_all(self):
+        """ Read the data of every record waiting to be read.
+        """
+        while self.pending:
+            self.load(self.pending.popitem(last=False)[1])
+
+    def __search(self, records):
+        # the server may return hashes as strings, match them as strings
+        hash_values = collections.OrderedDict()
+        for record in records:
+            record._loader = None
+            hash_values.setdefault(str(record._hash_value), record._hash_value)
+        found = dict()
+        for data in self.table.schema.database._search_by_hash(
+                schema=self.table.schema.name,
+                table=self.table.name,
+                hash_values=list(hash_values.values())):
+            found[str(data[self.table.hash_attribute])] = data
+        for record in records:
+            data = found.get(str(record._hash_value))
+            if data is not None:
+                record._data = dict(data)
+                record._partial = False
+
+
 class _HarperDBSchemas():
 
     """ Iterator created from a schemas dictionary.
@@ -555,10 +1750,6 @@ class _HarperDBTables():
     """
 
     def __init__(self, tables, schema):
-        if not isinstance(tables, list):
-            # older versions of HarperDB return a list of tables in a schema,
-            # convert incoming dictionaries to a list for iteration
-            tables = [table for table in tables.values()]
         self.schema = schema
         self.tables = tables
         self.table_list_index = 0
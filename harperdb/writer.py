@@ -0,0 +1,237 @@
+import atexit
+import collections
+import concurrent.futures
+import queue
+import threading
+import time
+
+from .exceptions import HarperDBError
+
+
+class BufferedWriter():
+
+    """ Collects records written from any number of threads, and writes them
+    in batches from one background thread.
+
+    A batch is written when max_records records, or max_bytes of encoded
+    JSON, are buffered, or when the oldest buffered record has waited
+    max_latency_ms milliseconds. While max_buffered records are waiting,
+    write() blocks until a batch has been taken from the buffer.
+
+    The write callback is called with a list of records and must return one
+    hash per record, or None for a record which was skipped by the server.
+
+    Each write returns a concurrent.futures.Future, whose result is the
+    record's hash. If a batch fails, the futures of its records raise the
+    error, and the futures of skipped records raise HarperDBError. In both
+    cases on_error(error, records) is called from the background thread
+    with the records which were not written. Records whose future is
+    cancelled before their batch is taken are not written.
+
+    You should never need to instantiate this class directly, use
+    HarperDBTable.buffered_writer instead. Instances are context managers,
+    and are closed at interpreter exit.
+
+    Instance Attributes:
+      - max_buffered (int): Records buffered before write() blocks
+      - max_bytes (int): Encoded bytes per batch, or None (no limit)
+      - max_latency_ms (float): Milliseconds a record may wait in the buffer
+      - max_records (int): Records per batch
+
+    Instance Methods:
+      - close(timeout=None): Write every buffered record, then stop
+      - flush(timeout=None): Write every buffered record now, and wait for
+        them to be written
+      - write(record, timeout=None): Buffer a record, returns a Future
+    """
+
+    def __init__(
+            self,
+            write,
+            codec,
+            max_records=1000,
+            max_bytes=None,
+            max_latency_ms=100,
+            max_buffered=None,
+            on_error=None):
+        self.max_records = max_records
+        self.max_bytes = max_bytes
+        self.max_latency_ms = max_latency_ms
+        self.max_buffered = max_buffered or max_records * 10
+        self.__write = write
+        self.__codec = codec
+        self.__on_error = on_error
+        # (record, future, encoded size, time buffered) in order written
+        self.__buffer = collections.deque()
+        self.__bytes = 0
+        # records taken from the buffer which are being written
+        self.__writing = 0
+        self.__flushing = 0
+        self.__closed = False
+        self.__condition = threading.Condition()
+        self.__thread = threading.Thread(
+            target=self.__run,
+            name='HarperDB BufferedWriter',
+            daemon=True)
+        self.__thread.start()
+        atexit.register(self.close)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        with self.__condition:
+            return len(self.__buffer) + self.__writing
+
+    def write(self, record, timeout=None):
+        """ Buffer a record to be written with the next batch, returns a
+        concurrent.futures.Future. Blocks while max_buffered records are
+        waiting, and raises queue.Full if none are taken within timeout
+        seconds.
+        """
+        size = len(self.__codec.dumps(record)) if self.max_bytes else 0
+        future = concurrent.futures.Future()
+        with self.__condition:
+            if not self.__condition.wait_for(
+                    lambda: self.__closed
+                    or len(self.__buffer) < self.max_buffered,
+                    timeout):
+                raise queue.Full(
+                    '{} records are waiting to be written'.format(
+                        len(self.__buffer)))
+            if self.__closed:
+                raise RuntimeError('cannot write to a closed BufferedWriter')
+            self.__buffer.append((record, future, size, time.monotonic()))
+            self.__bytes += size
+            # the first record starts the wait for max_latency_ms
+            if len(self.__buffer) == 1 or self.__is_due():
+                self.__condition.notify_all()
+        return future
+
+    def flush(self, timeout=None):
+        """ Write every buffered record without waiting for max_latency_ms,
+        and wait until they are written. Returns False if they aren't written
+        within timeout seconds.
+        """
+        with self.__condition:
+            self.__flushing += 1
+            self.__condition.notify_all()
+            try:
+                return self.__condition.wait_for(
+                    lambda: not self.__buffer and not self.__writing,
+                    timeout)
+            finally:
+                self.__flushing -= 1
+
+    def close(self, timeout=None):
+        """ Write every buffered record, then stop the background thread.
+        Records can't be written once closed.
+        """
+        with self.__condition:
+            self.__closed = True
+            self.__condition.notify_all()
+        self.__thread.join(timeout)
+        atexit.unregister(self.close)
+
+    def __is_due(self):
+        """ Returns True if a batch should be written now.
+        """
+        if not self.__buffer:
+            return False
+        if self.__closed or self.__flushing \
+                or len(self.__buffer) >= self.max_records:
+            return True
+        if self.max_bytes and self.__bytes >= self.max_bytes:
+            return True
+        return self.__wait_time() <= 0
+
+    def __wait_time(self):
+        """ Returns seconds until the oldest buffered record is due.
+        """
+        buffered_time = self.__buffer[0][3]
+        return buffered_time + self.max_latency_ms / 1000 - time.monotonic()
+
+    def __take_batch(self):
+        """ Remove the next batch from the buffer, skipping records whose
+        future was cancelled.
+        """
+        batch = list()
+        batch_bytes = 0
+        while self.__buffer and len(batch) < self.max_records:
+            record, future, size, buffered_time = self.__buffer[0]
+            # a batch holds at least one record, however large
+            if batch and self.max_bytes \
+                    and batch_bytes + size > self.max_bytes:
+                break
+            self.__buffer.popleft()
+            self.__bytes -= size
+            if future.set_running_or_notify_cancel():
+                batch.append((record, future))
+                batch_bytes += size
+        return batch
+
+    def __run(self):
+        while True:
+            with self.__condition:
+                while not self.__is_due():
+                    if self.__closed and not self.__buffer:
+                        return
+                    self.__condition.wait(
+                        self.__wait_time() if self.__buffer else None)
+                batch = self.__take_batch()
+                self.__writing = len(batch)
+                # producers blocked by a full buffer may continue
+                self.__condition.notify_all()
+            try:
+                if batch:
+                    self.__write_batch(batch)
+            finally:
+                with self.__condition:
+                    self.__writing = 0
+                    self.__condition.notify_all()
+
+    def __write_batch(self, batch):
+        records = [record for record, future in batch]
+        try:
+            hashes = self.__write(records)
+        except Exception as error:
+            for record, future in batch:
+                future.set_exception(error)
+            self.__report(error, records)
+            return
+        hashes = list(hashes)
+        if len(hashes) != len(batch):
+            # hashes can't be matched to records, so none are resolved
+            error = HarperDBError(
+                'write returned {} hashes for {} records'.format(
+                    len(hashes), len(batch)))
+            for record, future in batch:
+                future.set_exception(error)
+            self.__report(error, records)
+            return
+        skipped = list()
+        for (record, future), hash_value in zip(batch, hashes):
+            if hash_value is None:
+                future.set_exception(
+                    HarperDBError('record was skipped by the server'))
+                skipped.append(record)
+            else:
+                future.set_result(hash_value)
+        if skipped:
+            self.__report(
+                HarperDBError('{} of {} records were skipped by the '
+                              'server'.format(len(skipped), len(records))),
+                skipped)
+
+    def __report(self, error, records):
+        """ Call on_error with records which were not written.
+        """
+        if self.__on_error is not None:
+            try:
+                self.__on_error(error, records)
+            except Exception:
+                # the writer keeps writing whatever the callback does
+                pass
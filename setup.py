@@ -17,11 +17,16 @@ setuptools.setup(
     url="https://github.com/harperdb/harperdb-sdk-python",
     packages=setuptools.find_packages(),
     install_requires=['requests~=2.0'],
+    extras_require={
+        'async': ['aiohttp~=3.0'],
+    },
     tests_require=['responses~=0.10'],
     classifiers=[
         "Programming Language :: Python :: 3",
+        "Programming Language :: Python :: 3 :: Only",
+        "Programming Language :: Python :: 3.6",
         "License :: OSI Approved :: MIT License",
         "Operating System :: OS Independent",
     ],
-    python_requires='>=3.4',
+    python_requires='>=3.6',
 )
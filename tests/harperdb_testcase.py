@@ -312,6 +312,16 @@ class HarperDBTestCase(unittest.TestCase):
             '2'
         ],
     }
+    RECORDS_UPSERTED_NATIVE = {
+        'message': 'upserted 2 of 2 records',
+        'upserted_hashes': [
+            '1',
+            '2',
+        ],
+    }
+    UPSERT_NOT_SUPPORTED = {
+        'error': 'Operation \'upsert\' not found',
+    }
     DOG_RECORD = [
         {
             'id': '2',
@@ -22,13 +22,18 @@ class TestHarperDB(harperdb_testcase.HarperDBTestCase):
         db.drop_attribute
         db.insert
         db.update
+        db.upsert
         db.delete
         db.search_by_hash
         db.search_by_value
+        db.insert_many
+        db.update_many
+        db.delete_many
         db.sql
         db.csv_data_load
         db.csv_file_load
         db.csv_url_load
+        db.csv_bulk_load
         db.get_job
         db.add_user
         db.add_role
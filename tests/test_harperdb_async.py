@@ -0,0 +1,321 @@
+import asyncio
+import unittest
+
+import harperdb
+import harperdb_testcase
+
+try:
+    from aiohttp import web
+    from aiohttp.test_utils import TestServer
+except ImportError:
+    web = None
+
+
+@unittest.skipIf(web is None, 'aiohttp is not installed')
+class AsyncHarperDBTestCase(
+        harperdb_testcase.HarperDBTestCase,
+        unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        """ Start an in-process HTTP server standing in for HarperDB.
+        """
+        # map operation names to (body, status) for the stand-in to return
+        self.operations = dict()
+        self.requests = list()
+        self.authorization = list()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.delay = 0
+        app = web.Application()
+        app.router.add_post('/', self.handle)
+        self.server = TestServer(app)
+        await self.server.start_server()
+        self.url = str(self.server.make_url('/'))
+
+    async def asyncTearDown(self):
+        await self.server.close()
+
+    async def handle(self, request):
+        payload = await request.json()
+        self.requests.append(payload)
+        self.authorization.append(request.headers.get('Authorization'))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+        body, status = self.operations.get(
+            payload['operation'],
+            ({'error': 'unknown operation'}, 500))
+        return web.json_response(body, status=status)
+
+
+class TestAsyncHarperDB(AsyncHarperDBTestCase):
+
+    async def test_operations_are_awaitable(self):
+        """ API Functions are exposed as coroutines.
+        """
+        self.operations['describe_all'] = (self.DESCRIBE_ALL, 200)
+        self.operations['insert'] = (self.RECORD_INSERTED, 200)
+
+        async with harperdb.AsyncHarperDB(self.url) as db:
+            # no requests.Session is created, aiohttp's is opened when used
+            self.assertIsNone(db.session)
+            call = db.describe_all()
+            self.assertTrue(asyncio.iscoroutine(call))
+            self.assertEqual(await call, self.DESCRIBE_ALL)
+            self.assertEqual(
+                await db.insert('dev', 'dog', [{'name': 'Penny'}]),
+                self.RECORD_INSERTED)
+        self.assertEqual(self.requests, [
+            {'operation': 'describe_all'},
+            {
+                'operation': 'insert',
+                'schema': 'dev',
+                'table': 'dog',
+                'records': [{'name': 'Penny'}],
+            },
+        ])
+
+    async def test_basic_auth(self):
+        """ The Authorization header is sent with each request.
+        """
+        self.operations['list_users'] = (self.LIST_USERS, 200)
+
+        db = harperdb.AsyncHarperDB(self.url, self.USERNAME, self.PASSWORD)
+        self.assertEqual(await db.list_users(), self.LIST_USERS)
+        await db.close()
+        self.assertEqual(self.authorization, [db.token])
+
+    async def test_harperdb_error(self):
+        """ HarperDBError is raised when the server returns an error.
+        """
+        self.operations['create_schema'] = (self.SCHEMA_EXISTS, 500)
+
+        async with harperdb.AsyncHarperDB(self.url) as db:
+            with self.assertRaises(harperdb.HarperDBError) as assertion:
+                await db.create_schema('dev')
+        self.assertEqual(
+            assertion.exception.args[0],
+            self.SCHEMA_EXISTS['error'])
+
+    async def test_concurrency_cap(self):
+        """ No more than max_concurrency requests are in flight at once.
+        """
+        self.operations['describe_all'] = (self.DESCRIBE_ALL, 200)
+        self.delay = 0.01
+
+        async with harperdb.AsyncHarperDB(
+                self.url,
+                max_concurrency=10) as db:
+            results = await asyncio.gather(
+                *[db.describe_all() for _ in range(1000)])
+        self.assertEqual(len(results), 1000)
+        self.assertEqual(len(self.requests), 1000)
+        self.assertLessEqual(self.max_in_flight, 10)
+        self.assertGreater(self.max_in_flight, 1)
+
+    async def test_insert_many(self):
+        """ Bulk operations send chunks concurrently.
+        """
+        self.operations['insert'] = (self.RECORDS_INSERTED, 200)
+        self.delay = 0.01
+
+        async with harperdb.AsyncHarperDB(self.url) as db:
+            response = await db.insert_many(
+                'dev',
+                'dog',
+                ({'name': index} for index in range(10)),
+                chunk_size=2)
+        self.assertEqual(len(self.requests), 5)
+        self.assertGreater(self.max_in_flight, 1)
+        self.assertEqual(response['message'], 'inserted 10 of 10 records')
+        self.assertEqual(
+            response['inserted_hashes'],
+            self.RECORDS_INSERTED['inserted_hashes'] * 5)
+
+    async def test_sql_many(self):
+        """ Statements rendered from one template are sent concurrently.
+        """
+        self.operations['sql'] = (self.RECORDS, 200)
+        self.delay = 0.01
+
+        async with harperdb.AsyncHarperDB(self.url) as db:
+            responses = await db.sql_many(
+                'SELECT * FROM dev.dog WHERE id = ?',
+                ([index] for index in range(6)))
+        self.assertEqual(responses, [self.RECORDS] * 6)
+        self.assertEqual(
+            sorted(payload['sql'] for payload in self.requests),
+            [
+                'SELECT * FROM dev.dog WHERE id = {}'.format(index)
+                for index in range(6)
+            ])
+        self.assertGreater(self.max_in_flight, 1)
+
+    async def test_stream(self):
+        """ With stream=True, records are yielded by an async generator.
+        """
+        self.operations['sql'] = (self.RECORDS, 200)
+        self.operations['search_by_value'] = (self.SCHEMA_EXISTS, 500)
+
+        async with harperdb.AsyncHarperDB(self.url) as db:
+            records = [
+                record async for record in db.sql(
+                    'SELECT * FROM dev.dog',
+                    stream=True)]
+            self.assertEqual(records, self.RECORDS)
+            with self.assertRaises(harperdb.HarperDBError):
+                async for record in db.search_by_value(
+                        'dev',
+                        'dog',
+                        'name',
+                        'P*',
+                        stream=True):
+                    pass
+
+    async def test_csv_bulk_load(self):
+        """ CSV chunks are loaded as concurrent jobs.
+        """
+        self.operations['csv_data_load'] = (self.START_JOB, 200)
+        self.operations['get_job'] = (self.GET_JOB, 200)
+
+        async with harperdb.AsyncHarperDB(self.url) as db:
+            response = await db.csv_bulk_load(
+                'dev',
+                'dog',
+                'tests/test.csv',
+                chunk_size=1)
+        self.assertEqual(response['message'], 'loaded 2 of 2 chunks')
+        self.assertEqual(response['rows'], 2)
+        self.assertEqual(response['errors'], [])
+        loads = [
+            payload['data'] for payload in self.requests
+            if payload['operation'] == 'csv_data_load']
+        self.assertEqual(sorted(loads), [
+            'id,name,age,color\n1,Duke,5,Brown\n',
+            'id,name,age,color\n2,Dino,3,Gray\n',
+        ])
+
+    async def test_job_future(self):
+        """ Job operations return an asyncio.Task with future=True.
+        """
+        self.operations['csv_file_load'] = (self.START_JOB, 200)
+        self.operations['get_job'] = (self.GET_JOB, 200)
+
+        async with harperdb.AsyncHarperDB(self.url) as db:
+            task = db.csv_file_load(
+                'dev',
+                'dog',
+                'path/to/file/on/host.csv',
+                future=True)
+            self.assertIsInstance(task, asyncio.Future)
+            self.assertEqual(await task, self.GET_JOB[0])
+            self.operations['get_job'] = (
+                [dict(self.GET_JOB[0], status='ERROR')],
+                200)
+            with self.assertRaises(harperdb.HarperDBError):
+                await db.csv_file_load(
+                    'dev',
+                    'dog',
+                    'path/to/file/on/host.csv',
+                    future=True)
+
+    async def test_sync_context_manager_is_rejected(self):
+        """ AsyncHarperDB must be used with async with.
+        """
+        db = harperdb.AsyncHarperDB(self.url)
+        with self.assertRaises(TypeError):
+            with db:
+                pass
+
+
+class TestAsyncHarperDBWrapper(AsyncHarperDBTestCase):
+
+    async def test_schemas_and_tables(self):
+        """ Schemas and tables are available through coroutines.
+        """
+        self.operations['describe_all'] = (self.DESCRIBE_ALL, 200)
+        self.operations['describe_schema'] = (self.DESCRIBE_SCHEMA_1, 200)
+        self.operations['create_schema'] = (self.SCHEMA_CREATED, 200)
+        self.operations['create_table'] = (self.TABLE_CREATED, 200)
+
+        async with harperdb.AsyncHarperDBWrapper(self.url) as db:
+            schema = await db.create_schema('test_schema_1')
+            self.assertIsInstance(schema, harperdb.AsyncHarperDBSchema)
+            table = await schema.create_table('dog', hash_attribute='id')
+            self.assertIsInstance(table, harperdb.AsyncHarperDBTable)
+            self.assertEqual(table.hash_attribute, 'id')
+            schemas = await db.schemas()
+            self.assertEqual(
+                [schema.name for schema in schemas],
+                list(self.DESCRIBE_ALL))
+            tables = await db['test_schema_1'].tables()
+            self.assertEqual(tables[0].name, 'test_table_1')
+            self.assertEqual(tables[0].hash_attribute, 'id')
+
+    async def test_upsert(self):
+        """ AsyncHarperDBTable.upsert uses the upsert operation.
+        """
+        self.operations['upsert'] = (self.RECORDS_UPSERTED_NATIVE, 200)
+
+        async with harperdb.AsyncHarperDBWrapper(self.url) as db:
+            hashes = await db['dev']['dog'].upsert(self.DOG_RECORDS)
+        self.assertEqual(hashes, ['1', '2'])
+        self.assertEqual(len(self.requests), 1)
+        self.assertEqual(self.requests[0]['records'], self.DOG_RECORDS)
+
+    async def test_upsert_fallback(self):
+        """ Skipped records are updated when upsert is not supported.
+        """
+        self.operations['upsert'] = (self.UPSERT_NOT_SUPPORTED, 400)
+        self.operations['insert'] = (self.RECORDS_NOT_INSERTED, 200)
+        self.operations['update'] = (self.RECORD_UPSERTED, 200)
+
+        async with harperdb.AsyncHarperDBWrapper(self.url) as db:
+            table = db['dev']['dog']
+            table.hash_attribute = 'id'
+            hashes = await table.upsert(self.DOG_RECORDS)
+            self.assertFalse(db.native_upsert)
+        self.assertEqual(hashes, ['1', '2'])
+        self.assertEqual(
+            [payload['operation'] for payload in self.requests],
+            ['upsert', 'insert', 'update'])
+        self.assertEqual(self.requests[-1]['records'], self.DOG_RECORD)
+
+    async def test_get_and_search(self):
+        """ Records are read as dictionaries.
+        """
+        self.operations['search_by_hash'] = (self.RECORDS, 200)
+        self.operations['search_by_value'] = (self.RECORDS, 200)
+
+        async with harperdb.AsyncHarperDBWrapper(self.url) as db:
+            table = db['test_schema_1']['test_table_1']
+            self.assertEqual(
+                await table.get('uniqueHash'),
+                self.RECORDS[0])
+            self.assertEqual(
+                await table.search_by_value('pi', 3.14159),
+                self.RECORDS)
+            self.operations['search_by_hash'] = (self.NO_RECORDS, 200)
+            with self.assertRaises(harperdb.HarperDBError):
+                await table.get('invalid_hash')
+
+    async def test_scan(self):
+        """ Tables are iterated with async for, a batch at a time.
+        """
+        self.operations['describe_table'] = (self.DESCRIBE_TABLE, 200)
+        self.operations['sql'] = (self.RECORDS * 2, 200)
+
+        async with harperdb.AsyncHarperDBWrapper(self.url) as db:
+            table = db['test_schema_1']['test_table_1']
+            records = [record async for record in table.scan(batch_size=3)]
+        self.assertEqual(records, self.RECORDS * 2)
+        self.assertEqual(
+            [payload['operation'] for payload in self.requests],
+            ['describe_table', 'sql'])
+        self.assertEqual(
+            self.requests[-1]['sql'],
+            'SELECT * FROM `test_schema_1`.`test_table_1` '
+            'ORDER BY `id` LIMIT 3')
@@ -1,7 +1,14 @@
+import csv
+import io
+import json
+import os
 import responses
+import tempfile
+import threading
 import unittest
 
 import harperdb
+import harperdb.cache
 import harperdb_testcase
 
 
@@ -33,6 +40,80 @@ class TestHarperDBBase(harperdb_testcase.HarperDBTestCase):
             'Basic {}'.format(mock_b64encode.return_value.decode('utf-8')))
         self.assertEqual(db.timeout, 3)
 
+    def test_connection_pool(self):
+        """ Each instance owns a session with a sized connection pool.
+        """
+        db = harperdb.HarperDBBase(
+            self.URL,
+            pool_connections=2,
+            pool_maxsize=20)
+        adapter = db.session.get_adapter(self.URL)
+        self.assertEqual(adapter._pool_connections, 2)
+        self.assertEqual(adapter._pool_maxsize, 20)
+        self.assertIsNot(db.session, self.db.session)
+
+    @responses.activate
+    def test_requests_reuse_session(self):
+        """ Requests are made through the instance's session.
+        """
+        # mock the server response to describe_all
+        responses.add(
+            'POST',
+            self.URL,
+            json=self.DESCRIBE_ALL,
+            status=200)
+        responses.add(
+            'POST',
+            self.URL,
+            json=self.DESCRIBE_ALL,
+            status=200)
+
+        with unittest.mock.patch.object(
+                self.db.session,
+                'request',
+                wraps=self.db.session.request) as mock_request:
+            self.db._describe_all()
+            self.db._describe_all()
+        self.assertEqual(mock_request.call_count, 2)
+        self.assertEqual(len(responses.calls), 2)
+
+    def test_close(self):
+        """ Pooled connections are released by close() or a with block.
+        """
+        db = harperdb.HarperDBBase(self.URL)
+        with unittest.mock.patch.object(db.session, 'close') as mock_close:
+            db.close()
+            mock_close.assert_called_once_with()
+        with unittest.mock.patch.object(db.session, 'close') as mock_close:
+            with db as context_db:
+                self.assertIs(context_db, db)
+                mock_close.assert_not_called()
+            mock_close.assert_called_once_with()
+
+    @responses.activate
+    @unittest.mock.patch('time.monotonic')
+    def test_idle_timeout(self, mock_monotonic):
+        """ The connection pool is reset after idle_timeout seconds.
+        """
+        for _ in range(3):
+            responses.add(
+                'POST',
+                self.URL,
+                json=self.DESCRIBE_ALL,
+                status=200)
+
+        db = harperdb.HarperDBBase(self.URL, idle_timeout=30)
+        with unittest.mock.patch.object(db.session, 'close') as mock_close:
+            mock_monotonic.return_value = 0
+            db._describe_all()
+            mock_monotonic.return_value = 10
+            db._describe_all()
+            mock_close.assert_not_called()
+            mock_monotonic.return_value = 100
+            db._describe_all()
+            mock_close.assert_called_once_with()
+        self.assertEqual(len(responses.calls), 3)
+
     @responses.activate
     def test_create_schema(self):
         # define the expected JSON body in POST request
@@ -268,6 +349,63 @@ class TestHarperDBBase(harperdb_testcase.HarperDBTestCase):
         self.assertLastRequestMatchesSpec(spec)
         self.assertEqual(len(responses.calls), 1)
 
+    @responses.activate
+    def test_writes_invalidate(self):
+        """ _invalidate is called after operations which change tables,
+        including failed ones.
+        """
+        responses.add(
+            'POST',
+            self.URL,
+            json=self.RECORDS_INSERTED,
+            status=200)
+        responses.add(
+            'POST',
+            self.URL,
+            json=self.RECORDS,
+            status=200)
+        responses.add(
+            'POST',
+            self.URL,
+            json=self.SCHEMA_EXISTS,
+            status=500)
+
+        with unittest.mock.patch.object(self.db, '_invalidate') as invalidate:
+            self.db._insert('test_schema', 'test_table', [{'name': 'foo'}])
+            invalidate.assert_called_once_with('test_schema', 'test_table')
+            self.db._search_by_hash('test_schema', 'test_table', [1])
+            self.assertEqual(invalidate.call_count, 1)
+            with self.assertRaises(harperdb.HarperDBError):
+                self.db._drop_schema('test_schema')
+            invalidate.assert_called_with('test_schema', None)
+
+    @responses.activate
+    def test_upsert(self):
+        """ Upsert a list of records.
+        """
+        # define the expected JSON body in POST request
+        spec = {
+            'operation': 'upsert',
+            'schema': 'test_schema',
+            'table': 'test_table',
+            'records': self.DOG_RECORDS,
+        }
+        # mock the server response
+        responses.add(
+            'POST',
+            self.URL,
+            json=self.RECORDS_UPSERTED_NATIVE,
+            status=200)
+
+        self.assertEqual(
+            self.db._upsert(
+                schema=spec['schema'],
+                table=spec['table'],
+                records=spec['records']),
+            self.RECORDS_UPSERTED_NATIVE)
+        self.assertLastRequestMatchesSpec(spec)
+        self.assertEqual(len(responses.calls), 1)
+
     @responses.activate
     def test_delete(self):
         """ Delete a list of records by hash.
@@ -295,6 +433,143 @@ class TestHarperDBBase(harperdb_testcase.HarperDBTestCase):
         self.assertLastRequestMatchesSpec(spec)
         self.assertEqual(len(responses.calls), 1)
 
+    def bulk_callback(self, key, hashes_key):
+        """ Returns a responses callback which acknowledges every hash sent in
+        the request, skipping the hash "skip".
+        """
+        def callback(request):
+            items = json.loads(request.body)[key]
+            hashes = [item['id'] if key == 'records' else item
+                      for item in items]
+            return (200, {}, json.dumps({
+                'message': 'done',
+                hashes_key: [hash for hash in hashes if hash != 'skip'],
+                'skipped_hashes': [hash for hash in hashes if hash == 'skip'],
+            }))
+        return callback
+
+    @responses.activate
+    def test_insert_many(self):
+        """ Records from any iterable are inserted in chunks.
+        """
+        responses.add_callback(
+            'POST',
+            self.URL,
+            callback=self.bulk_callback('records', 'inserted_hashes'))
+
+        records = ({'id': index} for index in range(5))
+        response = self.db._insert_many(
+            'test_schema',
+            'test_table',
+            records,
+            chunk_size=2)
+        self.assertEqual(response, {
+            'message': 'inserted 5 of 5 records',
+            'inserted_hashes': [0, 1, 2, 3, 4],
+            'skipped_hashes': [],
+        })
+        self.assertEqual(len(responses.calls), 3)
+        chunks = [json.loads(call.request.body) for call in responses.calls]
+        for chunk in chunks:
+            self.assertEqual(chunk['operation'], 'insert')
+            self.assertEqual(chunk['schema'], 'test_schema')
+            self.assertEqual(chunk['table'], 'test_table')
+        self.assertEqual(
+            sorted(len(chunk['records']) for chunk in chunks),
+            [1, 2, 2])
+
+    @responses.activate
+    def test_insert_many_max_bytes(self):
+        """ Chunks are limited by the size of their encoded records.
+        """
+        responses.add_callback(
+            'POST',
+            self.URL,
+            callback=self.bulk_callback('records', 'inserted_hashes'))
+
+        # each record encodes to 8 bytes, plus one for a separator
+        records = [{'id': index} for index in range(6)]
+        response = self.db._insert_many(
+            'test_schema',
+            'test_table',
+            records,
+            max_bytes=20)
+        self.assertEqual(response['inserted_hashes'], [0, 1, 2, 3, 4, 5])
+        self.assertEqual(len(responses.calls), 3)
+        for call in responses.calls:
+            self.assertEqual(len(json.loads(call.request.body)['records']), 2)
+
+    @responses.activate
+    def test_update_many(self):
+        """ Records from any iterable are updated in chunks.
+        """
+        responses.add_callback(
+            'POST',
+            self.URL,
+            callback=self.bulk_callback('records', 'update_hashes'))
+
+        records = [{'id': 1}, {'id': 'skip'}, {'id': 3}]
+        response = self.db._update_many(
+            'test_schema',
+            'test_table',
+            iter(records),
+            chunk_size=1,
+            max_workers=2)
+        self.assertEqual(response, {
+            'message': 'updated 2 of 3 records',
+            'update_hashes': [1, 3],
+            'skipped_hashes': ['skip'],
+        })
+        self.assertEqual(len(responses.calls), 3)
+        for call in responses.calls:
+            self.assertEqual(
+                json.loads(call.request.body)['operation'],
+                'update')
+
+    @responses.activate
+    def test_delete_many(self):
+        """ Records are deleted in chunks of hash values.
+        """
+        responses.add_callback(
+            'POST',
+            self.URL,
+            callback=self.bulk_callback('hash_values', 'deleted_hashes'))
+
+        response = self.db._delete_many(
+            'test_schema',
+            'test_table',
+            range(1000),
+            chunk_size=300)
+        self.assertEqual(
+            response['message'],
+            '1000 of 1000 records successfully deleted')
+        self.assertEqual(response['deleted_hashes'], list(range(1000)))
+        self.assertEqual(response['skipped_hashes'], [])
+        self.assertEqual(len(responses.calls), 4)
+
+    @responses.activate
+    def test_bulk_operation_errors(self):
+        """ HarperDBError is raised if any chunk fails.
+        """
+        responses.add(
+            'POST',
+            self.URL,
+            json=self.RECORDS_INSERTED,
+            status=200)
+        responses.add(
+            'POST',
+            self.URL,
+            json=self.TABLE_NOT_EXISTS,
+            status=500)
+
+        with self.assertRaises(harperdb.HarperDBError):
+            self.db._insert_many(
+                'test_schema',
+                'test_table',
+                [{'id': 1}, {'id': 2}],
+                chunk_size=1,
+                max_workers=1)
+
     @responses.activate
     def test_search_by_hash(self):
         """ Search records by hash value.
@@ -334,6 +609,77 @@ class TestHarperDBBase(harperdb_testcase.HarperDBTestCase):
         self.assertLastRequestMatchesSpec(spec)
         self.assertEqual(len(responses.calls), 2)
 
+    @responses.activate
+    def test_record_cache(self):
+        """ search_by_hash is served from record_cache, requesting only
+        hashes which are not cached, until the table is written to.
+        """
+        dogs = {
+            1: {'id': 1, 'name': 'Penny'},
+            2: {'id': 2, 'name': 'Kato'},
+            3: {'id': 3, 'name': 'Riley'},
+        }
+
+        def callback(request):
+            payload = json.loads(request.body)
+            if payload['operation'] == 'describe_table':
+                return (200, {}, json.dumps(self.DESCRIBE_TABLE))
+            if payload['operation'] == 'update':
+                return (200, {}, json.dumps(self.RECORD_UPSERTED))
+            if payload['operation'] == 'drop_table':
+                return (200, {}, json.dumps(self.TABLE_DROPPED))
+            return (200, {}, json.dumps([
+                dogs[hash_value] for hash_value in payload['hash_values']
+                if hash_value in dogs]))
+
+        responses.add_callback('POST', self.URL, callback=callback)
+        cache = harperdb.cache.LRUCache()
+        db = harperdb.HarperDBBase(self.URL, record_cache=cache)
+
+        def requests():
+            return [
+                json.loads(call.request.body) for call in responses.calls
+                if b'search_by_hash' in call.request.body]
+
+        self.assertEqual(
+            db._search_by_hash('dev', 'dog', [1, 2]),
+            [dogs[1], dogs[2]])
+        self.assertEqual(
+            db._search_by_hash('dev', 'dog', [3, 2, 1, 4]),
+            [dogs[3], dogs[2], dogs[1]])
+        self.assertEqual(
+            [payload['hash_values'] for payload in requests()],
+            [[1, 2], [3, 4]])
+        self.assertEqual((cache.hits, cache.misses), (2, 4))
+        # the hash attribute is read once
+        self.assertEqual(len(responses.calls), 3)
+        # records returned are copies
+        db._search_by_hash('dev', 'dog', [1])[0]['name'] = 'changed'
+        self.assertEqual(db._search_by_hash('dev', 'dog', [1]), [dogs[1]])
+        self.assertEqual(len(requests()), 2)
+        # projections are cached separately
+        db._search_by_hash('dev', 'dog', [1], ['id', 'name'])
+        self.assertEqual(len(requests()), 3)
+        # without the hash attribute records are not cached
+        db._search_by_hash('dev', 'dog', [1], ['name'])
+        db._search_by_hash('dev', 'dog', [1], ['name'])
+        self.assertEqual(len(requests()), 5)
+        # writes invalidate the table
+        db._update('dev', 'dog', [{'id': 1, 'name': 'Penny Lane'}])
+        db._search_by_hash('dev', 'dog', [1, 2])
+        self.assertEqual(requests()[-1]['hash_values'], [1, 2])
+        # the hash attribute is read again after the table is dropped
+        describes = len([
+            call for call in responses.calls
+            if b'describe_table' in call.request.body])
+        db._drop_table('dev', 'dog')
+        db._search_by_hash('dev', 'dog', [1])
+        self.assertEqual(
+            len([
+                call for call in responses.calls
+                if b'describe_table' in call.request.body]),
+            describes + 1)
+
     @responses.activate
     def test_search_by_value(self):
         """ Search records by value.
@@ -376,6 +722,59 @@ class TestHarperDBBase(harperdb_testcase.HarperDBTestCase):
         self.assertLastRequestMatchesSpec(spec)
         self.assertEqual(len(responses.calls), 2)
 
+    @responses.activate
+    def test_search_by_conditions(self):
+        """ Search records by several conditions.
+        """
+        conditions = [
+            {
+                'search_attribute': 'age',
+                'search_type': 'between',
+                'search_value': [5, 8],
+            },
+            {
+                'search_attribute': 'name',
+                'search_type': 'starts_with',
+                'search_value': 'P',
+            },
+        ]
+        responses.add('POST', self.URL, json=self.RECORDS, status=200)
+
+        self.assertEqual(
+            self.db._search_by_conditions(
+                'test_schema',
+                'test_table',
+                conditions),
+            self.RECORDS)
+        self.assertLastRequestMatchesSpec({
+            'operation': 'search_by_conditions',
+            'schema': 'test_schema',
+            'table': 'test_table',
+            'operator': 'and',
+            'conditions': conditions,
+            'get_attributes': ['*'],
+        })
+        self.db._search_by_conditions(
+            'test_schema',
+            'test_table',
+            conditions,
+            operator='or',
+            get_attributes=['id'],
+            offset=10,
+            limit=5,
+            sort={'attribute': 'age', 'descending': True})
+        self.assertLastRequestMatchesSpec({
+            'operation': 'search_by_conditions',
+            'schema': 'test_schema',
+            'table': 'test_table',
+            'operator': 'or',
+            'conditions': conditions,
+            'get_attributes': ['id'],
+            'offset': 10,
+            'limit': 5,
+            'sort': {'attribute': 'age', 'descending': True},
+        })
+
     @responses.activate
     def test_sql(self):
         """ Accept SQL strings.
@@ -398,6 +797,185 @@ class TestHarperDBBase(harperdb_testcase.HarperDBTestCase):
         self.assertLastRequestMatchesSpec(spec)
         self.assertEqual(len(responses.calls), 1)
 
+    @responses.activate
+    def test_group_commit(self):
+        """ Concurrent inserts to a table are sent as one request, and each
+        returns its own hashes.
+        """
+        assigned = list()
+
+        def callback(request):
+            payload = json.loads(request.body)
+            if payload['operation'] == 'describe_table':
+                return (200, {}, json.dumps(self.DESCRIBE_TABLE))
+            hashes = list()
+            for record in payload['records']:
+                if 'id' not in record:
+                    assigned.append('assigned{}'.format(len(assigned)))
+                    record['id'] = assigned[-1]
+                hashes.append(record['id'])
+            return (200, {}, json.dumps({
+                'message': 'done',
+                'inserted_hashes': [hash for hash in hashes if hash != 'skip'],
+                'skipped_hashes': [hash for hash in hashes if hash == 'skip'],
+            }))
+
+        responses.add_callback('POST', self.URL, callback=callback)
+        db = harperdb.HarperDBBase(self.URL, group_commit_ms=500)
+        requests = [[{'id': index}] for index in range(6)] + [
+            [{'id': 'skip'}, {'id': 6}],
+            [{'name': 'Penny'}],
+        ]
+        results = [None] * len(requests)
+        barrier = threading.Barrier(len(requests))
+
+        def insert(index):
+            barrier.wait()
+            results[index] = db._insert('dev', 'dog', requests[index])
+
+        threads = [
+            threading.Thread(target=insert, args=(index,))
+            for index in range(len(requests))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        inserts = [
+            json.loads(call.request.body) for call in responses.calls
+            if json.loads(call.request.body)['operation'] == 'insert']
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(len(inserts[0]['records']), 9)
+        for index in range(6):
+            self.assertEqual(results[index], {
+                'message': 'inserted 1 of 1 records',
+                'inserted_hashes': [index],
+                'skipped_hashes': [],
+            })
+        self.assertEqual(results[6]['inserted_hashes'], [6])
+        self.assertEqual(results[6]['skipped_hashes'], ['skip'])
+        self.assertEqual(results[7]['inserted_hashes'], assigned)
+
+        # the same hash is not written twice in one request
+        db.group_commit_ms = 50
+        responses.calls.reset()
+        threads = [
+            threading.Thread(
+                target=db._insert,
+                args=('dev', 'dog', [{'id': 1}]))
+            for index in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(responses.calls), 2)
+
+    @responses.activate
+    def test_sql_params(self):
+        """ SQL templates are rendered with escaped params.
+        """
+        responses.add('POST', self.URL, json=self.RECORDS, status=200)
+
+        self.assertEqual(
+            self.db._sql(
+                'SELECT * FROM dev.dog WHERE id IN ? AND name = ?',
+                [[1, 2], "O'Brien"]),
+            self.RECORDS)
+        self.assertLastRequestMatchesSpec({
+            'operation': 'sql',
+            'sql': "SELECT * FROM dev.dog WHERE id IN (1, 2) "
+                   "AND name = 'O''Brien'",
+        })
+
+    @responses.activate
+    def test_stream(self):
+        """ With stream=True, records are yielded as the response is read.
+        """
+        responses.add('POST', self.URL, json=self.RECORDS, status=200)
+
+        records = self.db._sql('SELECT * FROM dev.dog', stream=True)
+        self.assertNotIsInstance(records, list)
+        self.assertEqual(list(records), self.RECORDS)
+        self.assertLastRequestMatchesSpec({
+            'operation': 'sql',
+            'sql': 'SELECT * FROM dev.dog',
+        })
+
+        responses.replace(
+            'POST',
+            self.URL,
+            json=self.SCHEMA_EXISTS,
+            status=500)
+        with self.assertRaises(harperdb.HarperDBError):
+            self.db._search_by_value('dev', 'dog', 'name', 'P*', stream=True)
+
+    @responses.activate
+    def test_sql_many(self):
+        """ One template is rendered with many sets of params.
+        """
+        responses.add('POST', self.URL, json=self.RECORD_UPSERTED, status=200)
+
+        self.assertEqual(
+            self.db._sql_many(
+                'UPDATE dev.dog SET age = :age WHERE id = :id',
+                ({'id': index, 'age': index * 2} for index in range(10)),
+                max_workers=2),
+            [self.RECORD_UPSERTED] * 10)
+        self.assertEqual(
+            sorted(
+                json.loads(call.request.body)['sql']
+                for call in responses.calls),
+            sorted(
+                'UPDATE dev.dog SET age = {} WHERE id = {}'.format(
+                    index * 2,
+                    index)
+                for index in range(10)))
+
+    @responses.activate
+    def test_sql_cache(self):
+        """ SELECT statements are served from sql_cache until a table they
+        read is written to.
+        """
+        def callback(request):
+            payload = json.loads(request.body)
+            if payload['operation'] == 'sql' \
+                    and payload['sql'].startswith('SELECT'):
+                return (200, {}, json.dumps(self.RECORDS))
+            return (200, {}, json.dumps(self.RECORD_UPSERTED))
+
+        responses.add_callback('POST', self.URL, callback=callback)
+        cache = harperdb.cache.LRUCache()
+        db = harperdb.HarperDBBase(self.URL, sql_cache=cache)
+        dogs = 'SELECT d.name, o.name FROM dev.dog AS d ' \
+            'JOIN `dev`.`owner` AS o ON d.owner_id = o.id'
+        breeds = "SELECT * FROM dev.breed WHERE name = 'x.y'"
+
+        def selects():
+            return len([
+                call for call in responses.calls
+                if b'SELECT' in call.request.body])
+
+        self.assertEqual(db._sql(dogs), self.RECORDS)
+        # whitespace outside quotes is normalized
+        db._sql(dogs.replace(' ', '\n  ') + ';')[0]['name'] = 'changed'
+        db._sql(breeds)
+        db._sql(breeds.replace("'x.y'", "'x.y '"))
+        self.assertEqual(db._sql(dogs), self.RECORDS)
+        self.assertEqual(selects(), 3)
+        self.assertEqual((cache.hits, cache.misses), (2, 3))
+        # writes to a table discard results which read it
+        db._update('dev', 'owner', [{'id': 1}])
+        db._sql(dogs)
+        db._sql(breeds)
+        self.assertEqual(selects(), 4)
+        db._sql("UPDATE dev.breed SET name = 'dev.dog' WHERE id = 1")
+        db._sql(dogs)
+        db._sql(breeds)
+        self.assertEqual(selects(), 5)
+        # a statement without schema.table names discards everything
+        db._sql('DELETE FROM breed')
+        db._sql(dogs)
+        self.assertEqual(selects(), 6)
+
     @responses.activate
     def test_csv_data_load(self):
         """ Records are inserted from a CSV file path.
@@ -453,6 +1031,123 @@ class TestHarperDBBase(harperdb_testcase.HarperDBTestCase):
         self.assertLastRequestMatchesSpec(spec)
         self.assertEqual(len(responses.calls), 1)
 
+    def job_server(self, fail_chunk=None):
+        """ Returns a responses callback which starts a job for each
+        csv_data_load request, and reports each job in progress once before
+        it completes. The job loading the chunk starting with fail_chunk
+        fails.
+        """
+        lock = threading.Lock()
+        jobs = dict()
+
+        def read(job_id):
+            job = jobs[job_id]
+            job['polls'] += 1
+            status = 'IN_PROGRESS'
+            if job['polls'] > 1:
+                status = 'ERROR' if job['fail'] else 'COMPLETE'
+            return {
+                'id': job_id,
+                'status': status,
+                'message': 'job {}'.format(status.lower()),
+            }
+
+        def callback(request):
+            payload = json.loads(request.body)
+            with lock:
+                if payload['operation'] == 'csv_data_load':
+                    job_id = 'job{}'.format(len(jobs))
+                    rows = list(csv.reader(io.StringIO(payload['data'])))
+                    failed = fail_chunk is not None \
+                        and rows[1][0] == fail_chunk
+                    jobs[job_id] = {'polls': 0, 'rows': rows, 'fail': failed}
+                    return (200, {}, json.dumps({
+                        'message': 'Starting job with id {}'.format(job_id),
+                        'job_id': job_id,
+                    }))
+                if payload['operation'] == 'search_jobs_by_start_date':
+                    return (200, {}, json.dumps([
+                        read(job_id) for job_id in jobs
+                        if jobs[job_id]['polls'] < 2]))
+                return (200, {}, json.dumps([read(payload['id'])]))
+
+        return callback, jobs
+
+    @responses.activate
+    def test_csv_bulk_load(self):
+        """ CSV files are loaded in chunks of rows, as parallel jobs.
+        """
+        callback, jobs = self.job_server(fail_chunk='4')
+        responses.add_callback('POST', self.URL, callback=callback)
+        self.db.jobs.poll_interval = 0
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'dogs.csv')
+            with open(path, 'w', newline='') as csv_file:
+                csv_writer = csv.writer(csv_file)
+                csv_writer.writerow(['id', 'name'])
+                for index in range(5):
+                    # quoted newlines are kept within a row
+                    csv_writer.writerow([index, 'dog\n{}'.format(index)])
+
+            response = self.db._csv_bulk_load(
+                schema='test_schema',
+                table='test_table',
+                path=path,
+                action='update',
+                chunk_size=2)
+
+        self.assertEqual(response['message'], 'loaded 2 of 3 chunks')
+        self.assertEqual(response['rows'], 5)
+        self.assertEqual(
+            [(chunk['chunk'], chunk['rows']) for chunk in response['chunks']],
+            [(0, 2), (1, 2), (2, 1)])
+        self.assertEqual(len(response['errors']), 1)
+        self.assertEqual(response['errors'][0]['chunk'], 2)
+        self.assertEqual(response['errors'][0]['error'], 'job error')
+        # every chunk repeats the header row
+        for job in jobs.values():
+            self.assertEqual(job['rows'][0], ['id', 'name'])
+            self.assertGreaterEqual(job['polls'], 2)
+        self.assertEqual(
+            sorted(row for job in jobs.values() for row in job['rows'][1:]),
+            [[str(index), 'dog\n{}'.format(index)] for index in range(5)])
+        loads = [
+            json.loads(call.request.body)
+            for call in responses.calls
+            if b'csv_data_load' in call.request.body]
+        self.assertEqual(len(loads), 3)
+        for load in loads:
+            self.assertEqual(load['action'], 'update')
+            self.assertEqual(load['schema'], 'test_schema')
+            self.assertEqual(load['table'], 'test_table')
+
+    @responses.activate
+    def test_csv_bulk_load_timeout(self):
+        """ Chunks whose job does not finish within timeout are errors.
+        """
+        responses.add(
+            'POST',
+            self.URL,
+            json=self.START_JOB,
+            status=200)
+        responses.add(
+            'POST',
+            self.URL,
+            json=[dict(self.GET_JOB[0], status='IN_PROGRESS')],
+            status=200)
+        self.db.jobs.poll_interval = 0.01
+
+        response = self.db._csv_bulk_load(
+            schema='test_schema',
+            table='test_table',
+            path='tests/test.csv',
+            timeout=0.1)
+        self.assertEqual(response['chunks'][0]['job_id'], 'aUniqueID')
+        self.assertIn('0.1 seconds', response['errors'][0]['error'])
+        # the job is no longer tracked
+        self.assertEqual(len(self.db.jobs), 0)
+
     @responses.activate
     def test_csv_file_load(self):
         """ Records are inserted from a CSV file path on the HarperDB host.
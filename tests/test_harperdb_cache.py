@@ -0,0 +1,75 @@
+import unittest
+import unittest.mock
+
+import harperdb.cache
+
+
+class TestLRUCache(unittest.TestCase):
+
+    def test_entry_bound(self):
+        """ The least recently used entry is evicted first.
+        """
+        cache = harperdb.cache.LRUCache(max_entries=2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        self.assertEqual(cache.get('a'), 1)
+        cache.put('c', 3)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.get('c'), 3)
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.evictions, 1)
+        self.assertEqual(cache.hits, 3)
+        self.assertEqual(cache.misses, 1)
+
+    def test_byte_bound(self):
+        """ Entries are evicted to stay within max_bytes.
+        """
+        cache = harperdb.cache.LRUCache(max_bytes=10)
+        cache.put('a', 1, size=4)
+        cache.put('b', 2, size=4)
+        cache.put('c', 3, size=4)
+        self.assertNotIn('a', cache)
+        self.assertEqual(cache.size, 8)
+        # replacing an entry replaces its size
+        cache.put('c', 3, size=2)
+        self.assertEqual(cache.size, 6)
+        # entries larger than max_bytes are not kept
+        cache.put('d', 4, size=11)
+        self.assertNotIn('d', cache)
+        self.assertEqual(cache.size, 6)
+
+    @unittest.mock.patch('time.monotonic')
+    def test_ttl(self, mock_monotonic):
+        """ Entries expire after ttl seconds, or the TTL of their tag.
+        """
+        mock_monotonic.return_value = 0
+        cache = harperdb.cache.LRUCache(ttl=10, tag_ttls={'short': 1})
+        cache.put('a', 1)
+        cache.put('b', 2, tags=['short'])
+        cache.put('c', 3, tags=['other', 'short'])
+        mock_monotonic.return_value = 1
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNone(cache.get('c'))
+        mock_monotonic.return_value = 10
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(len(cache), 0)
+
+    def test_invalidate(self):
+        """ Entries are discarded by tag.
+        """
+        cache = harperdb.cache.LRUCache()
+        cache.put('a', 1, size=1, tags=['dev', ('dev', 'dog')])
+        cache.put('b', 2, size=1, tags=['dev', ('dev', 'cat')])
+        cache.put('c', 3, size=1, tags=['prod', ('prod', 'dog')])
+        cache.invalidate(('dev', 'dog'))
+        self.assertNotIn('a', cache)
+        self.assertIn('b', cache)
+        cache.invalidate('dev')
+        self.assertNotIn('b', cache)
+        self.assertIn('c', cache)
+        self.assertEqual(cache.size, 1)
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.size, 0)
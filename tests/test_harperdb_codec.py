@@ -0,0 +1,106 @@
+import json
+import responses
+import unittest
+
+import harperdb
+import harperdb_testcase
+from harperdb import codec
+
+
+class TestJSONCodec(harperdb_testcase.HarperDBTestCase):
+
+    def assertRoundTrip(self, json_codec):
+        """ Helper method to assert that a codec encodes to bytes, and decodes
+        from bytes.
+        """
+        encoded = json_codec.dumps(self.DOG_RECORDS)
+        self.assertIsInstance(encoded, bytes)
+        self.assertEqual(json_codec.loads(encoded), self.DOG_RECORDS)
+        self.assertEqual(
+            json_codec.loads('{"name": "Penñy"}'.encode('utf-8')),
+            {'name': 'Penñy'})
+
+    def test_json_codec(self):
+        """ The standard library codec encodes to and decodes from bytes.
+        """
+        self.assertRoundTrip(codec.JSONCodec())
+
+    @unittest.skipIf(codec.orjson is None, 'orjson is not installed')
+    def test_orjson_codec(self):
+        """ The orjson codec encodes to and decodes from bytes.
+        """
+        self.assertRoundTrip(codec.OrjsonCodec())
+        # non-string keys are converted like the standard library does
+        self.assertEqual(codec.OrjsonCodec().dumps({1: 'one'}), b'{"1":"one"}')
+
+    @unittest.skipIf(codec.ujson is None, 'ujson is not installed')
+    def test_ujson_codec(self):
+        """ The ujson codec encodes to and decodes from bytes.
+        """
+        self.assertRoundTrip(codec.UjsonCodec())
+
+    def test_get_codec(self):
+        """ get_codec() prefers orjson, then ujson, then the standard library.
+        """
+        with unittest.mock.patch.object(codec, 'orjson', object()):
+            self.assertIsInstance(codec.get_codec(), codec.OrjsonCodec)
+        with unittest.mock.patch.object(codec, 'orjson', None), \
+                unittest.mock.patch.object(codec, 'ujson', object()):
+            self.assertIsInstance(codec.get_codec(), codec.UjsonCodec)
+        with unittest.mock.patch.object(codec, 'orjson', None), \
+                unittest.mock.patch.object(codec, 'ujson', None):
+            self.assertIsInstance(codec.get_codec(), codec.JSONCodec)
+
+    @responses.activate
+    def test_harperdb_uses_codec(self):
+        """ Requests are encoded and responses decoded with the codec.
+        """
+        # mock the server response to search_by_hash
+        responses.add(
+            'POST',
+            self.URL,
+            json=self.RECORDS,
+            status=200)
+
+        json_codec = codec.JSONCodec()
+        db = harperdb.HarperDB(self.URL, codec=json_codec)
+        self.assertIs(db.codec, json_codec)
+        with unittest.mock.patch.object(
+                json_codec,
+                'loads',
+                wraps=json_codec.loads) as mock_loads:
+            self.assertEqual(
+                db.search_by_hash('dev', 'dog', ['uniqueHash']),
+                self.RECORDS)
+        # decoded from the raw bytes of the response
+        mock_loads.assert_called_once_with(responses.calls[0].response.content)
+        self.assertIsInstance(responses.calls[0].request.body, bytes)
+        self.assertLastRequestMatchesSpec({
+            'operation': 'search_by_hash',
+            'schema': 'dev',
+            'table': 'dog',
+            'hash_values': ['uniqueHash'],
+            'get_attributes': ['*'],
+        })
+
+    def test_json_array_parser(self):
+        """ Items of a JSON array are decoded as soon as each is complete.
+        """
+        records = self.RECORDS + [
+            {'nested': {'list': [1, '[', {'}': '"'}]}, 'escaped': 'a\\"b'},
+            'text',
+            [],
+            None,
+        ]
+        encoded = json.dumps(records).encode('utf-8')
+        for size in (1, 3, 7, len(encoded)):
+            parser = codec._JSONArrayParser(codec.JSONCodec())
+            items = list()
+            for start in range(0, len(encoded), size):
+                items.extend(parser.feed(encoded[start:start + size]))
+            items.extend(parser.close())
+            self.assertEqual(items, records)
+        parser = codec._JSONArrayParser(codec.JSONCodec())
+        self.assertEqual(parser.feed(b' [{"a": 1}, {"b"'), [{'a': 1}])
+        with self.assertRaises(ValueError):
+            parser.close()
@@ -0,0 +1,187 @@
+import concurrent.futures
+import json
+import responses
+import unittest
+
+import harperdb
+import harperdb.jobs
+import harperdb_testcase
+
+
+class TestJobs(harperdb_testcase.HarperDBTestCase):
+
+    def setUp(self):
+        """ This method is called before each test.
+        """
+        self.db = harperdb.HarperDBBase(self.URL)
+        self.db.jobs.poll_interval = 0.01
+
+    def job(self, job_id, status):
+        return dict(self.GET_JOB[0], id=job_id, status=status)
+
+    @responses.activate
+    def test_job_future(self):
+        """ Job operations return a JobFuture when called with future=True.
+        """
+        responses.add('POST', self.URL, json=self.START_JOB, status=200)
+        responses.add(
+            'POST',
+            self.URL,
+            json=[self.job('aUniqueID', 'IN_PROGRESS')],
+            status=200)
+        responses.add('POST', self.URL, json=self.GET_JOB, status=200)
+        finished = list()
+
+        future = self.db._csv_file_load(
+            'test_schema',
+            'test_table',
+            'path/to/file/on/host.csv',
+            future=True)
+        future.add_done_callback(finished.append)
+        self.assertIsInstance(future, harperdb.jobs.JobFuture)
+        self.assertEqual(future.job_id, 'aUniqueID')
+        self.assertEqual(future.result(timeout=5), self.GET_JOB[0])
+        self.assertEqual(finished, [future])
+        self.assertEqual(
+            [json.loads(call.request.body) for call in responses.calls[1:]],
+            [{'operation': 'get_job', 'id': 'aUniqueID'}] * 2)
+
+    @responses.activate
+    def test_job_future_error(self):
+        """ result() raises HarperDBError when the job fails.
+        """
+        responses.add('POST', self.URL, json=self.START_JOB, status=200)
+        responses.add(
+            'POST',
+            self.URL,
+            json=[dict(self.job('aUniqueID', 'ERROR'), message='bad csv')],
+            status=200)
+
+        future = self.db._csv_url_load(
+            'test_schema',
+            'test_table',
+            's3.amazonaws.com/mydata/dogs.csv',
+            future=True)
+        with self.assertRaises(harperdb.HarperDBError) as assertion:
+            future.result(timeout=5)
+        self.assertEqual(assertion.exception.args[0], 'bad csv')
+        self.assertEqual(future.job['status'], 'ERROR')
+
+    @responses.activate
+    def test_poll_batches_jobs(self):
+        """ Outstanding jobs are read with one search_jobs_by_start_date.
+        """
+        responses.add('POST', self.URL, json=[
+            self.job('job0', 'COMPLETE'),
+            self.job('job1', 'IN_PROGRESS'),
+            self.job('job2', 'ERROR'),
+            self.job('untracked', 'COMPLETE'),
+        ], status=200)
+        poller = harperdb.jobs.JobPoller(self.db)
+
+        with unittest.mock.patch('threading.Thread'):
+            futures = [
+                poller.track('job{}'.format(index)) for index in range(3)]
+        self.assertEqual(poller.poll(), 2)
+        self.assertEqual(len(responses.calls), 1)
+        request = json.loads(responses.calls[0].request.body)
+        self.assertEqual(request['operation'], 'search_jobs_by_start_date')
+        self.assertLess(request['from_date'], request['to_date'])
+        self.assertTrue(request['from_date'].endswith('+0000'))
+        self.assertEqual(futures[0].result(0)['id'], 'job0')
+        self.assertFalse(futures[1].done())
+        self.assertEqual(futures[1].job['status'], 'IN_PROGRESS')
+        self.assertIsInstance(futures[2].exception(0), harperdb.HarperDBError)
+        self.assertEqual(len(poller), 1)
+
+    @responses.activate
+    def test_poll_missing_job(self):
+        """ Jobs missing from the search are read with get_job, and fail when
+        the server does not know them.
+        """
+        responses.add('POST', self.URL, json=[], status=200)
+        responses.add('POST', self.URL, json=self.GET_JOB, status=200)
+        responses.add('POST', self.URL, json=[], status=200)
+        poller = harperdb.jobs.JobPoller(self.db)
+
+        with unittest.mock.patch('threading.Thread'):
+            found = poller.track('aUniqueID')
+            missing = poller.track('missing')
+        self.assertEqual(poller.poll(), 2)
+        self.assertEqual(found.result(0), self.GET_JOB[0])
+        self.assertEqual(
+            str(missing.exception(0)),
+            'job "missing" not found')
+
+    @responses.activate
+    def test_adaptive_interval(self):
+        """ The poll interval doubles while no job finishes, and is reset when
+        a job finishes or is added.
+        """
+        responses.add(
+            'POST',
+            self.URL,
+            json=[self.job('aUniqueID', 'IN_PROGRESS')],
+            status=200)
+        poller = harperdb.jobs.JobPoller(
+            self.db,
+            poll_interval=1,
+            max_poll_interval=3)
+
+        with unittest.mock.patch('threading.Thread'):
+            future = poller.track('aUniqueID')
+            intervals = list()
+            for _ in range(3):
+                poller.poll()
+                intervals.append(poller.interval)
+            self.assertEqual(intervals, [2, 3, 3])
+            poller.track('another')
+            self.assertEqual(poller.interval, 1)
+        future.cancel()
+        poller.interval = 3
+        responses.replace(
+            'POST',
+            self.URL,
+            json=[self.job('another', 'COMPLETE')],
+            status=200)
+        self.assertEqual(poller.poll(), 1)
+        self.assertEqual(poller.interval, 1)
+
+    @responses.activate
+    def test_wait_all_and_as_completed(self):
+        """ Many jobs are waited for together.
+        """
+        def callback(request):
+            payload = json.loads(request.body)
+            if payload['operation'] == 'get_job':
+                return (200, {}, json.dumps(
+                    [self.job(payload['id'], 'COMPLETE')]))
+            return (200, {}, json.dumps([
+                self.job('job0', 'COMPLETE'),
+                self.job('job1', 'COMPLETE'),
+            ]))
+
+        responses.add_callback('POST', self.URL, callback=callback)
+        futures = [self.db.jobs.track('job0'), self.db.jobs.track('job1')]
+        self.assertEqual(
+            [job['id'] for job in harperdb.jobs.wait_all(futures, timeout=5)],
+            ['job0', 'job1'])
+        self.assertEqual(
+            set(harperdb.jobs.as_completed(futures, timeout=5)),
+            set(futures))
+
+    @responses.activate
+    def test_wait_all_timeout(self):
+        """ wait_all raises TimeoutError when jobs don't finish.
+        """
+        responses.add(
+            'POST',
+            self.URL,
+            json=[self.job('aUniqueID', 'IN_PROGRESS')],
+            status=200)
+
+        future = self.db.jobs.track('aUniqueID')
+        with self.assertRaises(concurrent.futures.TimeoutError):
+            harperdb.jobs.wait_all([future], timeout=0.05)
+        self.assertTrue(future.cancel())
+        self.assertEqual(len(self.db.jobs), 0)
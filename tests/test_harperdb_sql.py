@@ -0,0 +1,80 @@
+import unittest
+
+import harperdb.sql
+
+
+class TestSQL(unittest.TestCase):
+
+    def test_escape(self):
+        """ Values are escaped as SQL literals by type.
+        """
+        escape = harperdb.sql.escape
+        self.assertEqual(escape("O'Brien"), "'O''Brien'")
+        self.assertEqual(escape('back\\slash'), "'back\\\\slash'")
+        self.assertEqual(escape(42), '42')
+        self.assertEqual(escape(0.5), '0.5')
+        self.assertEqual(escape(True), 'TRUE')
+        self.assertEqual(escape(None), 'NULL')
+        self.assertEqual(escape([1, 'a', None]), "(1, 'a', NULL)")
+        self.assertEqual(escape(()), '(NULL)')
+        with self.assertRaises(ValueError):
+            escape(float('nan'))
+        with self.assertRaises(TypeError):
+            escape(object())
+
+    def test_positional_template(self):
+        """ ? placeholders are filled from a sequence, except in quotes.
+        """
+        template = harperdb.sql.SQLTemplate(
+            "SELECT '?' AS q FROM dev.dog WHERE id IN ? AND name = ?")
+        self.assertIsNone(template.names)
+        self.assertEqual(template.placeholders, 2)
+        self.assertEqual(
+            template.render([[1, 2], "it's"]),
+            "SELECT '?' AS q FROM dev.dog WHERE id IN (1, 2) "
+            "AND name = 'it''s'")
+        with self.assertRaises(ValueError):
+            template.render([1])
+
+    def test_named_template(self):
+        """ :name placeholders are filled from a mapping, and may repeat.
+        """
+        template = harperdb.sql.SQLTemplate(
+            'SELECT * FROM dev.dog WHERE id = :id OR parent = :id '
+            'AND age::int > :age')
+        self.assertEqual(template.names, ['id', 'id', 'age'])
+        self.assertEqual(
+            template.render({'id': 1, 'age': 2}),
+            'SELECT * FROM dev.dog WHERE id = 1 OR parent = 1 '
+            'AND age::int > 2')
+        with self.assertRaises(ValueError):
+            template.render({'id': 1})
+        with self.assertRaises(ValueError):
+            harperdb.sql.SQLTemplate('SELECT ? WHERE :id')
+
+    def test_prepare(self):
+        """ Templates are parsed once.
+        """
+        sql_string = 'SELECT * FROM dev.dog WHERE id = ?'
+        self.assertIs(
+            harperdb.sql.prepare(sql_string),
+            harperdb.sql.prepare(sql_string))
+
+    def test_compare_and_set_statement(self):
+        """ Attributes are only set if __updatedtime__ is unchanged.
+        """
+        self.assertEqual(
+            harperdb.sql._compare_and_set_statement(
+                'dev',
+                'dog',
+                'id',
+                'a1',
+                1234567890002,
+                {'age': 6, 'name': "O'Brien"}),
+            "UPDATE `dev`.`dog` SET `age` = 6, `name` = 'O''Brien' "
+            "WHERE `id` = 'a1' AND `__updatedtime__` <= 1234567890002")
+        # lists and dictionaries can't be set in SQL
+        for value in (['ball'], {'name': 'Kato'}, {'ball'}):
+            with self.assertRaises(TypeError):
+                harperdb.sql._compare_and_set_statement(
+                    'dev', 'dog', 'id', 1, 1, {'toys': value})
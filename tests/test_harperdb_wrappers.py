@@ -1,5 +1,11 @@
+import csv
 import datetime
+import json
+import os
+import re
 import responses
+import tempfile
+import unittest
 
 import harperdb
 import harperdb_testcase
@@ -50,6 +56,46 @@ class TestHarperDBWrapper(harperdb_testcase.HarperDBTestCase):
         self.assertEqual(len(self.db), len(self.DESCRIBE_ALL_UPDATED))
         self.assertEqual(len(responses.calls), 3)
 
+    @responses.activate
+    def test_catalog_snapshot(self):
+        """ With metadata_ttl, one describe_all backs schemas, tables and
+        table metadata, and is refreshed incrementally.
+        """
+        bodies = {
+            'describe_all': self.DESCRIBE_ALL,
+            'describe_schema': self.DESCRIBE_SCHEMA_1,
+            'insert': self.RECORD_INSERTED,
+        }
+        responses.add_callback('POST', self.URL, callback=lambda request: (
+            200,
+            {},
+            json.dumps(bodies[json.loads(request.body)['operation']])))
+
+        def operations():
+            return [
+                json.loads(call.request.body)['operation']
+                for call in responses.calls]
+
+        db = harperdb.wrappers.HarperDBWrapper(self.URL, metadata_ttl=None)
+        self.assertEqual(len(db), 1)
+        for schema in db:
+            self.assertEqual(len(schema), 1)
+            for table in schema:
+                self.assertEqual(table.hash_attribute, 'id')
+                self.assertEqual(table.record_count, 3)
+                self.assertEqual(table.attributes, ['id'])
+        self.assertEqual(operations(), ['describe_all'])
+        # a write discards the table and its schema's list of tables only
+        db._insert('test_schema_1', 'test_table_1', [{'name': 'foo'}])
+        self.assertEqual(len(db), 1)
+        self.assertEqual(len(db['test_schema_1']), 1)
+        self.assertEqual(db['test_schema_1']['test_table_1'].record_count, 3)
+        self.assertEqual(
+            operations(),
+            ['describe_all', 'insert', 'describe_schema'])
+        db.catalog.refresh()
+        self.assertEqual(operations()[-1], 'describe_all')
+
     @responses.activate
     def test_create_schema(self):
         """ create_schema() returns an instance of HarperDBSchema.
@@ -138,12 +184,7 @@ class TestHarperDBRecord(harperdb_testcase.HarperDBTestCase):
     def test_harperdbrecord_is_subscriptable(self):
         """ HarperDBRecord is subscriptable.
         """
-        # mock the server responses to search_by_hash requests
-        responses.add(
-            'POST',
-            self.URL,
-            json=self.RECORDS,
-            status=200)
+        # mock the server response to search_by_hash request
         responses.add(
             'POST',
             self.URL,
@@ -159,10 +200,105 @@ class TestHarperDBRecord(harperdb_testcase.HarperDBTestCase):
         self.assertEqual(self.record['pi'], self.RECORDS[0]['pi'])
         with self.assertRaises(KeyError):
             self.record['invalid_key']
-        self.assertEqual(len(responses.calls), 2)
+        # data is read from the server once
+        self.assertEqual(len(responses.calls), 1)
         with self.assertRaises(harperdb.exceptions.HarperDBError):
-            self.record['pi']
-        self.assertEqual(len(responses.calls), 3)
+            self.record.refresh()
+        self.assertEqual(len(responses.calls), 2)
+
+    @responses.activate
+    def test_record_with_data(self):
+        """ HarperDBRecord created with data makes no requests to read it.
+        """
+        record = harperdb.wrappers.HarperDBRecord(
+            table=self.table,
+            hash_value=self.RECORDS[0]['id'],
+            data=dict(self.RECORDS[0]))
+
+        self.assertEqual(record['pi'], self.RECORDS[0]['pi'])
+        self.assertEqual(
+            record.__createdtime__,
+            self.RECORDS[0]['__createdtime__'])
+        self.assertEqual(record.to_dict(), {
+            'id': 'uniqueHash',
+            'pi': 3.14159,
+        })
+        self.assertEqual(len(responses.calls), 0)
+
+    @responses.activate
+    def test_projection(self):
+        """ Only some attributes are read with fetch, and other attributes of
+        a partial record are read when used.
+        """
+        def callback(request):
+            payload = json.loads(request.body)
+            if payload['operation'] == 'describe_table':
+                return (200, {}, json.dumps(self.DESCRIBE_TABLE))
+            if payload['get_attributes'] == ['*']:
+                return (200, {}, json.dumps(self.RECORDS))
+            return (200, {}, json.dumps([{
+                key: self.RECORDS[0][key]
+                for key in payload['get_attributes']}]))
+
+        responses.add_callback('POST', self.URL, callback=callback)
+
+        self.assertEqual(self.record.fetch(['pi']), {'pi': 3.14159})
+        self.assertEqual(
+            json.loads(responses.calls[-1].request.body)['get_attributes'],
+            ['id', 'pi'])
+        self.assertEqual(self.record['pi'], 3.14159)
+        searches = len(responses.calls)
+        # other attributes are read on their own
+        self.assertEqual(
+            self.record.__updatedtime__,
+            self.RECORDS[0]['__updatedtime__'])
+        self.assertEqual(len(responses.calls), searches + 1)
+        self.assertEqual(
+            json.loads(responses.calls[-1].request.body)['get_attributes'],
+            ['id', '__updatedtime__'])
+        # to_dict reads the whole record
+        self.assertEqual(self.record.to_dict(), {
+            'id': 'uniqueHash',
+            'pi': 3.14159,
+        })
+        self.assertEqual(
+            json.loads(responses.calls[-1].request.body)['get_attributes'],
+            ['*'])
+        self.record['__createdtime__']
+        self.assertEqual(len(responses.calls), searches + 2)
+
+    @responses.activate
+    def test_to_dict_keeps_changes(self):
+        """ Reading the whole of a partial record keeps values changed
+        locally, or in a session.
+        """
+        def callback(request):
+            payload = json.loads(request.body)
+            if payload['operation'] == 'describe_table':
+                return (200, {}, json.dumps(self.DESCRIBE_TABLE))
+            return (200, {}, json.dumps([{
+                key: value for key, value in self.RECORDS[0].items()
+                if '*' in payload['get_attributes']
+                or key in payload['get_attributes']}]))
+
+        responses.add_callback('POST', self.URL, callback=callback)
+
+        self.record.fetch(['pi'])
+        self.record.update({'pi': 3, 'name': 'Penny'})
+        self.assertEqual(self.record.to_dict(), {
+            'id': 'uniqueHash',
+            'pi': 3,
+            'name': 'Penny',
+        })
+        self.assertEqual(self.record.changes(), {'pi': 3, 'name': 'Penny'})
+
+        with self.table.session() as session:
+            record = self.table['uniqueHash']
+            record.fetch(['id'])
+            record['pi'] = 4
+            self.assertEqual(record.to_dict()['pi'], 4)
+            self.assertEqual(record.changes(), {'pi': 4})
+            session.discard()
 
     @responses.activate
     def test_time_properties(self):
@@ -174,11 +310,6 @@ class TestHarperDBRecord(harperdb_testcase.HarperDBTestCase):
             self.URL,
             json=self.RECORDS,
             status=200)
-        responses.add(
-            'POST',
-            self.URL,
-            json=self.RECORDS,
-            status=200)
         responses.add(
             'POST',
             self.URL,
@@ -191,10 +322,12 @@ class TestHarperDBRecord(harperdb_testcase.HarperDBTestCase):
         self.assertEqual(
             self.record.__updatedtime__,
             self.RECORDS[0]['__updatedtime__'])
+        self.assertEqual(len(responses.calls), 1)
+        self.record.refresh()
         self.assertEqual(
             self.record.__updatedtime__,
             self.RECORDS_UPDATED[0]['__updatedtime__'])
-        self.assertEqual(len(responses.calls), 3)
+        self.assertEqual(len(responses.calls), 2)
 
     @responses.activate
     def test_delete(self):
@@ -214,6 +347,12 @@ class TestHarperDBRecord(harperdb_testcase.HarperDBTestCase):
     def test_item_assignment_updates_record_values(self):
         """ Item assignment updates record values.
         """
+        # mock server response to describe_table, for the hash attribute
+        responses.add(
+            'POST',
+            self.URL,
+            json=self.DESCRIBE_TABLE,
+            status=200)
         # mock server response to update
         responses.add(
             'POST',
@@ -228,19 +367,50 @@ class TestHarperDBRecord(harperdb_testcase.HarperDBTestCase):
             status=200)
 
         self.record['foo'] = 'bar'
+        self.assertEqual(
+            json.loads(responses.calls[1].request.body)['records'],
+            [{'id': self.RECORDS[0]['id'], 'foo': 'bar'}])
         self.assertEqual(self.record['foo'], 'bar')
-        self.assertEqual(len(responses.calls), 2)
+        self.assertEqual(len(responses.calls), 3)
 
     @responses.activate
-    def test_datetime_helpers(self):
-        """ Helpers are implemented which return datetime objects.
+    def test_save(self):
+        """ save() updates only the attributes which changed.
         """
-        # mock server responses to search_by_hash requests
+        # mock server response to describe_table, for the hash attribute
         responses.add(
             'POST',
             self.URL,
-            json=self.RECORDS,
+            json=self.DESCRIBE_TABLE,
+            status=200)
+        responses.add(
+            'POST',
+            self.URL,
+            json=self.RECORD_UPSERTED,
             status=200)
+
+        record = harperdb.wrappers.HarperDBRecord(
+            table=self.table,
+            hash_value=self.RECORDS[0]['id'],
+            data=dict(self.RECORDS[0]))
+        data = record.to_dict()
+        data['pi'] = 3.14
+        data['foo'] = 'bar'
+        self.assertEqual(record.save(data), self.RECORD_UPSERTED)
+        self.assertEqual(
+            json.loads(responses.calls[1].request.body)['records'],
+            [{'pi': 3.14, 'foo': 'bar', 'id': self.RECORDS[0]['id']}])
+        self.assertEqual(record['pi'], 3.14)
+        self.assertEqual(record.changes(), {})
+        # nothing changed, nothing is sent
+        self.assertIsNone(record.save(record.to_dict()))
+        self.assertEqual(len(responses.calls), 2)
+
+    @responses.activate
+    def test_datetime_helpers(self):
+        """ Helpers are implemented which return datetime objects.
+        """
+        # mock server response to search_by_hash request
         responses.add(
             'POST',
             self.URL,
@@ -250,7 +420,7 @@ class TestHarperDBRecord(harperdb_testcase.HarperDBTestCase):
         created_time = self.record.created_time
         updated_time = self.record.updated_time
 
-        self.assertEqual(len(responses.calls), 2)
+        self.assertEqual(len(responses.calls), 1)
         self.assertIsInstance(created_time, datetime.datetime)
         self.assertIsInstance(updated_time, datetime.datetime)
         self.assertEqual(
@@ -515,6 +685,77 @@ class TestHarperDBTable(harperdb_testcase.HarperDBTestCase):
             self.DESCRIBE_TABLE['record_count'])
         self.assertEqual(len(responses.calls), 3)
 
+    @responses.activate
+    @unittest.mock.patch('time.monotonic')
+    def test_metadata_cache(self, mock_monotonic):
+        """ Table metadata is cached for metadata_ttl seconds, and discarded
+        when the table is changed through the same client.
+        """
+        bodies = {
+            'describe_table': self.DESCRIBE_TABLE,
+            'upsert': self.RECORDS_UPSERTED_NATIVE,
+            'drop_attribute': self.DROP_ATTRIBUTE,
+            'drop_schema': self.SCHEMA_DROPPED,
+        }
+        responses.add_callback('POST', self.URL, callback=lambda request: (
+            200,
+            {},
+            json.dumps(bodies[json.loads(request.body)['operation']])))
+
+        def describe_calls():
+            return sum(
+                1 for call in responses.calls
+                if b'describe_table' in call.request.body)
+
+        mock_monotonic.return_value = 0
+        self.db.catalog.ttl = 60
+
+        self.assertEqual(self.table.id, self.DESCRIBE_TABLE['id'])
+        self.assertEqual(self.table.attributes, ['id'])
+        self.assertEqual(
+            self.table.record_count,
+            self.DESCRIBE_TABLE['record_count'])
+        self.table.created_time
+        self.table.__updatedtime__
+        self.assertEqual(describe_calls(), 1)
+        # entries expire
+        mock_monotonic.return_value = 60
+        self.table.id
+        self.assertEqual(describe_calls(), 2)
+        # writes through this client invalidate the table
+        self.table.upsert(self.DOG_RECORDS)
+        self.table.id
+        self.assertEqual(describe_calls(), 3)
+        self.table.refresh()
+        self.table.id
+        self.assertEqual(describe_calls(), 4)
+        # DDL on another table of the schema leaves this table cached
+        self.db._drop_attribute(self.schema.name, 'another_table', 'name')
+        self.table.id
+        self.assertEqual(describe_calls(), 4)
+        self.db._drop_schema(self.schema.name)
+        self.table.id
+        self.assertEqual(describe_calls(), 5)
+
+    @responses.activate
+    def test_metadata_cache_disabled(self):
+        """ Table metadata is read for every property by default.
+        """
+        responses.add(
+            'POST',
+            self.URL,
+            json=self.DESCRIBE_TABLE,
+            status=200)
+
+        db = harperdb.wrappers.HarperDBWrapper(self.URL, metadata_ttl=None)
+        table = db['test_schema_1']['test_table_1']
+        table.id
+        table.id
+        self.assertEqual(len(responses.calls), 1)
+        self.table.id
+        self.table.id
+        self.assertEqual(len(responses.calls), 3)
+
     def test_harperdbtable_is_subscriptable_by_hash_attribute(self):
         """ HarperDBTable is subscriptable by hash.
         """
@@ -681,6 +922,8 @@ class TestHarperDBTable(harperdb_testcase.HarperDBTestCase):
     def test_upsert(self):
         """ HarperDBTable.upsert accepts a list, or a single record.
         """
+        # servers without the upsert operation insert, then update
+        self.db.native_upsert = False
         # mock server response to insert requests
         responses.add(
             'POST',
@@ -749,6 +992,114 @@ class TestHarperDBTable(harperdb_testcase.HarperDBTestCase):
         self.assertEqual(len(records), 2)
         self.assertEqual(len(responses.calls), 4)
 
+    @responses.activate
+    def test_upsert_native(self):
+        """ HarperDBTable.upsert makes one upsert request.
+        """
+        # mock server response to upsert requests
+        responses.add(
+            'POST',
+            self.URL,
+            json=self.RECORDS_UPSERTED_NATIVE,
+            status=200)
+        responses.add(
+            'POST',
+            self.URL,
+            json=self.RECORDS_UPSERTED_NATIVE,
+            status=200)
+
+        records = self.table.upsert(self.DOG_RECORDS)
+        self.assertLastRequestMatchesSpec({
+            'operation': 'upsert',
+            'schema': self.schema.name,
+            'table': self.table.name,
+            'records': self.DOG_RECORDS,
+        })
+        self.assertEqual(len(responses.calls), 1)
+        self.assertEqual(
+            [record._hash_value for record in records],
+            self.RECORDS_UPSERTED_NATIVE['upserted_hashes'])
+        record = self.table.upsert(self.DOG_RECORDS[0])
+        self.assertIsInstance(record, harperdb.HarperDBRecord)
+        self.assertEqual(len(responses.calls), 2)
+
+    @responses.activate
+    def test_upsert_not_supported(self):
+        """ HarperDBTable.upsert falls back to insert and update.
+        """
+        # mock server error to upsert request
+        responses.add(
+            'POST',
+            self.URL,
+            json=self.UPSERT_NOT_SUPPORTED,
+            status=400)
+        # mock server response to insert+update requests
+        responses.add(
+            'POST',
+            self.URL,
+            json=self.RECORDS_NOT_INSERTED,
+            status=200)
+        responses.add(
+            'POST',
+            self.URL,
+            json=self.RECORD_UPSERTED,
+            status=200)
+        responses.add(
+            'POST',
+            self.URL,
+            json=self.RECORDS_INSERTED,
+            status=200)
+
+        # hash values are integers, the server returns strings
+        dogs = [
+            {'id': 1, 'name': 'Duke'},
+            {'id': 2, 'name': 'Dino'},
+        ]
+        records = self.table.upsert(dogs)
+        self.assertFalse(self.db.native_upsert)
+        self.assertEqual(len(responses.calls), 3)
+        self.assertLastRequestMatchesSpec({
+            'operation': 'update',
+            'schema': self.schema.name,
+            'table': self.table.name,
+            'records': [
+                {'id': 2, 'name': 'Dino'},
+            ],
+        })
+        self.assertEqual([record._hash_value for record in records], [1, 2])
+        # upsert isn't attempted again
+        self.table.upsert([{'name': 'Penny'}, {'name': 'Kato'}])
+        self.assertEqual(len(responses.calls), 4)
+        self.assertEqual(
+            json.loads(responses.calls[-1].request.body)['operation'],
+            'insert')
+
+    @responses.activate
+    def test_upsert_error(self):
+        """ Other errors from the upsert request are raised.
+        """
+        # mock server error to upsert request
+        responses.add(
+            'POST',
+            self.URL,
+            json=self.TABLE_NOT_EXISTS,
+            status=500)
+
+        with self.assertRaises(harperdb.HarperDBError):
+            self.table.upsert(self.DOG_RECORDS)
+        self.assertTrue(self.db.native_upsert)
+        self.assertEqual(len(responses.calls), 1)
+        # an error which only mentions upsert doesn't disable it
+        responses.replace(
+            'POST',
+            self.URL,
+            json={'error': "upsert failed: attribute 'upsert' not found"},
+            status=500)
+        with self.assertRaises(harperdb.HarperDBError):
+            self.table.upsert(self.DOG_RECORDS)
+        self.assertTrue(self.db.native_upsert)
+        self.assertEqual(len(responses.calls), 2)
+
     @responses.activate
     def test_search_by_value(self):
         """ HarperDBTable.search_by_value returns a list of HarperDBRecords
@@ -768,6 +1119,242 @@ class TestHarperDBTable(harperdb_testcase.HarperDBTestCase):
         self.assertEqual(len(records), 1)
         self.assertEqual(len(responses.calls), 1)
         self.assertIsInstance(records[0], harperdb.HarperDBRecord)
+        # records are read from the search response
+        self.assertEqual(records[0]['pi'], self.RECORDS[0]['pi'])
+        self.assertEqual(records[0].to_dict()['id'], self.RECORDS[0]['id'])
+        self.assertEqual(len(responses.calls), 1)
+
+    @responses.activate
+    def test_query(self):
+        """ HarperDBTable.query builds a search_by_conditions request.
+        """
+        responses.add('POST', self.URL, json=self.RECORDS, status=200)
+
+        adults = self.table.query().where('age', 'greater_than', 2)
+        query = adults \
+            .where_any(
+                ('name', 'starts_with', 'P'),
+                ('age', 'between', (5, 8))) \
+            .select('name') \
+            .order_by('age', descending=True) \
+            .order_by('name') \
+            .offset(10) \
+            .limit(5)
+        records = list(query)
+        self.assertEqual(json.loads(responses.calls[0].request.body), {
+            'operation': 'search_by_conditions',
+            'schema': 'test_schema_1',
+            'table': 'test_table_1',
+            'operator': 'and',
+            'conditions': [
+                {
+                    'search_attribute': 'age',
+                    'search_type': 'greater_than',
+                    'search_value': 2,
+                },
+                {
+                    'operator': 'or',
+                    'conditions': [
+                        {
+                            'search_attribute': 'name',
+                            'search_type': 'starts_with',
+                            'search_value': 'P',
+                        },
+                        {
+                            'search_attribute': 'age',
+                            'search_type': 'between',
+                            'search_value': [5, 8],
+                        },
+                    ],
+                },
+            ],
+            'get_attributes': ['id', 'name'],
+            'offset': 10,
+            'limit': 5,
+            'sort': {
+                'attribute': 'age',
+                'descending': True,
+                'next': {'attribute': 'name', 'descending': False},
+            },
+        })
+        self.assertIsInstance(records[0], harperdb.HarperDBRecord)
+        self.assertEqual(records[0]['pi'], self.RECORDS[0]['pi'])
+        # refining a query leaves the original unchanged
+        self.assertEqual(adults.first().to_dict()['id'], 'uniqueHash')
+        payload = json.loads(responses.calls[1].request.body)
+        self.assertEqual(len(payload['conditions']), 1)
+        self.assertEqual(payload['limit'], 1)
+        self.assertEqual(payload['get_attributes'], ['*'])
+        with self.assertRaises(ValueError):
+            adults.where('age', 'about', 3)
+
+    @responses.activate
+    def test_search_by_value_attributes(self):
+        """ HarperDBTable.search_by_value reads only the given attributes.
+        """
+        responses.add(
+            'POST',
+            self.URL,
+            json=[{'id': 'uniqueHash', 'pi': 3.14159}],
+            status=200)
+        responses.add('POST', self.URL, json=self.RECORDS, status=200)
+
+        records = self.table.search_by_value(
+            search_attribute='pi',
+            search_value=3.14159,
+            attributes=['pi'])
+        self.assertEqual(
+            json.loads(responses.calls[0].request.body)['get_attributes'],
+            ['id', 'pi'])
+        self.assertEqual(records[0]['pi'], 3.14159)
+        self.assertEqual(len(responses.calls), 1)
+        self.assertEqual(
+            records[0].__createdtime__,
+            self.RECORDS[0]['__createdtime__'])
+        self.assertEqual(
+            json.loads(responses.calls[1].request.body)['get_attributes'],
+            ['id', '__createdtime__'])
+
+    @responses.activate
+    def test_scan(self):
+        """ Iterating a table pages through its records by hash value.
+        """
+        dogs = [{'id': index, 'name': str(index)} for index in range(1, 8)]
+
+        def callback(request):
+            payload = json.loads(request.body)
+            if payload['operation'] == 'describe_table':
+                # list() reads the length of the table
+                return (200, {}, json.dumps(self.DESCRIBE_TABLE))
+            sql_string = payload['sql']
+            after = re.search(r'`id` > (\d+)', sql_string)
+            limit = int(re.search(r'LIMIT (\d+)', sql_string).group(1))
+            records = [
+                dog for dog in dogs
+                if after is None or dog['id'] > int(after.group(1))]
+            return (200, {}, json.dumps(records[:limit]))
+
+        responses.add_callback('POST', self.URL, callback=callback)
+
+        records = list(self.table.scan(batch_size=3))
+        self.assertEqual([record.to_dict() for record in records], dogs)
+        self.assertIsInstance(records[0], harperdb.HarperDBRecord)
+        self.assertEqual(
+            [json.loads(call.request.body)['sql'] for call in responses.calls],
+            [
+                'SELECT * FROM `test_schema_1`.`test_table_1` '
+                'ORDER BY `id` LIMIT 3',
+                'SELECT * FROM `test_schema_1`.`test_table_1` '
+                'WHERE `id` > 3 ORDER BY `id` LIMIT 3',
+                'SELECT * FROM `test_schema_1`.`test_table_1` '
+                'WHERE `id` > 6 ORDER BY `id` LIMIT 3',
+            ])
+        self.assertEqual(len([record for record in self.table]), 7)
+        # the hash attribute is always read, where is rendered with params
+        list(self.table.scan(
+            batch_size=10,
+            get_attributes=['name'],
+            where='name <> ?',
+            params=["it's"]))
+        self.assertEqual(
+            json.loads(responses.calls[-1].request.body)['sql'],
+            "SELECT `id`, `name` FROM `test_schema_1`.`test_table_1` "
+            "WHERE (name <> 'it''s') ORDER BY `id` LIMIT 10")
+
+    def scan_server(self, dogs):
+        """ Serve SQL requests of scans over dogs.
+        """
+        def literal(match):
+            return json.loads(match.replace("'", '"'))
+
+        def callback(request):
+            sql_string = json.loads(request.body)['sql']
+            after = re.search(r"`id` > ('[^']*'|\d+)", sql_string)
+            until = re.search(r"`id` <= ('[^']*'|\d+)", sql_string)
+            records = sorted(dogs, key=lambda dog: dog['id'])
+            if after:
+                records = [
+                    dog for dog in records
+                    if dog['id'] > literal(after.group(1))]
+            if until:
+                records = [
+                    dog for dog in records
+                    if dog['id'] <= literal(until.group(1))]
+            if sql_string.startswith('SELECT MIN('):
+                hashes = [dog['id'] for dog in records] or [None]
+                return (200, {}, json.dumps([{
+                    'low': hashes[0],
+                    'high': hashes[-1],
+                    'count': len(records),
+                }]))
+            offset = re.search(r'OFFSET (\d+)', sql_string)
+            if offset:
+                records = records[int(offset.group(1)):]
+            limit = int(re.search(r'LIMIT (\d+)', sql_string).group(1))
+            return (200, {}, json.dumps(records[:limit]))
+
+        responses.add_callback('POST', self.URL, callback=callback)
+
+    @responses.activate
+    def test_parallel_scan(self):
+        """ Numeric hash ranges are split evenly and scanned concurrently.
+        """
+        dogs = [{'id': index} for index in range(1, 11)]
+        self.scan_server(dogs)
+
+        records = list(self.table.parallel_scan(partitions=3, batch_size=2))
+        self.assertEqual(
+            sorted(record['id'] for record in records),
+            list(range(1, 11)))
+        self.assertIsInstance(records[0], harperdb.HarperDBRecord)
+        scans = self.table.parallel_scan(
+            partitions=3,
+            batch_size=2,
+            merge=False)
+        self.assertEqual(
+            [[record['id'] for record in scan] for scan in scans],
+            [[1, 2, 3, 4], [5, 6, 7], [8, 9, 10]])
+
+    @responses.activate
+    def test_parallel_scan_quantiles(self):
+        """ Other hash values are split at quantiles.
+        """
+        dogs = [{'id': name} for name in 'abcdefgh']
+        self.scan_server(dogs)
+
+        scans = self.table.parallel_scan(partitions=4, merge=False)
+        self.assertEqual(
+            [''.join(record['id'] for record in scan) for scan in scans],
+            ['ab', 'cd', 'ef', 'gh'])
+        self.assertIn(
+            "ORDER BY `id` LIMIT 1 OFFSET 1",
+            json.loads(responses.calls[1].request.body)['sql'])
+        # fewer records than partitions
+        del dogs[2:]
+        responses.calls.reset()
+        scans = self.table.parallel_scan(partitions=4, merge=False)
+        self.assertEqual(
+            [''.join(record['id'] for record in scan) for scan in scans],
+            ['a', 'b'])
+        for call in responses.calls:
+            self.assertNotIn(
+                'OFFSET -',
+                json.loads(call.request.body)['sql'])
+        dogs.clear()
+
+    @responses.activate
+    def test_parallel_scan_empty(self):
+        """ An empty table has no partitions.
+        """
+        responses.add('POST', self.URL, json=[], status=200)
+        responses.add('POST', self.URL, json=[{'count': 0}], status=200)
+
+        self.assertEqual(list(self.table.parallel_scan()), [])
+        self.assertEqual(self.table.parallel_scan(merge=False), [])
+        self.assertEqual(len(responses.calls), 2)
+        with self.assertRaises(ValueError):
+            self.table.parallel_scan(partitions=0)
+        self.assertEqual(list(self.table.parallel_scan()), [])
 
     @responses.activate
     def test_datetime_helpers(self):
@@ -798,10 +1385,388 @@ class TestHarperDBTable(harperdb_testcase.HarperDBTestCase):
             updated_time.timestamp(),
             self.DESCRIBE_TABLE['__updatedtime__'] / 1000)
 
+    @responses.activate
+    def test_upserted_records_are_read_together(self):
+        """ Records returned by upsert are read with one search_by_hash.
+        """
+        responses.add(
+            'POST',
+            self.URL,
+            json=self.RECORDS_UPSERTED_NATIVE,
+            status=200)
+        responses.add(
+            'POST',
+            self.URL,
+            json=[
+                {'id': 2, 'name': 'Dino'},
+                {'id': 1, 'name': 'Duke'},
+            ],
+            status=200)
+
+        records = self.table.upsert(self.DOG_RECORDS)
+        self.assertEqual(records[0]['name'], 'Duke')
+        self.assertEqual(records[1]['name'], 'Dino')
+        self.assertEqual(len(responses.calls), 2)
+        self.assertLastRequestMatchesSpec({
+            'operation': 'search_by_hash',
+            'schema': self.schema.name,
+            'table': self.table.name,
+            'hash_values': ['1', '2'],
+            'get_attributes': ['*'],
+        })
+
+    @responses.activate
+    def test_load(self):
+        """ HarperDBTable.load reads records in batches, and records which
+        are not found raise HarperDBError when used.
+        """
+        responses.add(
+            'POST',
+            self.URL,
+            json=[{'id': 0}, {'id': 1}],
+            status=200)
+        responses.add(
+            'POST',
+            self.URL,
+            json=[{'id': 2}],
+            status=200)
+
+        records = [
+            harperdb.wrappers.HarperDBRecord(table=self.table, hash_value=i)
+            for i in range(4)]
+        self.table.load(records, batch_size=2)
+        self.assertEqual(len(responses.calls), 2)
+        self.assertEqual(
+            [
+                json.loads(call.request.body)['hash_values']
+                for call in responses.calls],
+            [[0, 1], [2, 3]])
+        self.assertEqual([record['id'] for record in records[:3]], [0, 1, 2])
+        responses.add(
+            'POST',
+            self.URL,
+            json=self.NO_RECORDS,
+            status=200)
+        with self.assertRaises(harperdb.HarperDBError):
+            records[3].to_dict()
+        self.assertEqual(len(responses.calls), 3)
+
+    @responses.activate
+    def test_batch_load(self):
+        """ Records created within batch_load are read together.
+        """
+        responses.add(
+            'POST',
+            self.URL,
+            json=[{'id': index} for index in range(5)],
+            status=200)
+
+        with self.table.batch_load():
+            records = [self.table[index] for index in range(5)]
+        self.assertEqual(len(responses.calls), 0)
+        self.assertEqual([record['id'] for record in records], list(range(5)))
+        self.assertEqual(len(responses.calls), 1)
+        # outside of batch_load records are read one at a time
+        self.assertIsNone(self.table['uniqueHash']._loader)
+
+    @responses.activate
+    def test_save_all(self):
+        """ The changes of many records are sent with one update request.
+        """
+        responses.add(
+            'POST',
+            self.URL,
+            json={'message': 'updated 1 of 2 records',
+                  'update_hashes': [0],
+                  'skipped_hashes': [2]},
+            status=200)
+
+        records = [
+            harperdb.wrappers.HarperDBRecord(
+                table=self.table,
+                hash_value=index,
+                data={'id': index, 'name': 'dog', 'age': index})
+            for index in range(3)]
+        # unchanged records are not sent
+        records[0].update({'age': 1})
+        records[1].update({'name': 'dog'})
+        records[2].update({'age': 3})
+        with self.assertRaises(harperdb.HarperDBError):
+            self.table.save_all(records)
+        self.assertEqual(
+            json.loads(responses.calls[0].request.body)['records'],
+            [{'age': 1, 'id': 0}, {'age': 3, 'id': 2}])
+        # the record which was not found is still changed
+        self.assertEqual(records[0].changes(), {})
+        self.assertEqual(records[2].changes(), {'age': 3})
+        self.assertIsNone(self.table.save_all(records[:2]))
+
+    @responses.activate
+    def test_save_nested_changes(self):
+        """ Values changed in place, such as lists, are saved.
+        """
+        responses.add(
+            'POST',
+            self.URL,
+            json=[{'id': 1, 'tags': ['a'], 'owner': {'name': 'Kato'}}],
+            status=200)
+        responses.add(
+            'POST',
+            self.URL,
+            json={'message': 'updated 1 of 1 records',
+                  'update_hashes': [1],
+                  'skipped_hashes': []},
+            status=200)
+
+        record = self.table[1]
+        data = record.to_dict()
+        data['tags'].append('b')
+        record.save(data)
+        self.assertEqual(
+            json.loads(responses.calls[1].request.body)['records'],
+            [{'tags': ['a', 'b'], 'id': 1}])
+        self.assertEqual(record.changes(), {})
+
+        record['owner']['name'] = 'Sam'
+        self.assertEqual(record.changes(), {'owner': {'name': 'Sam'}})
+        record.save()
+        self.assertEqual(
+            json.loads(responses.calls[2].request.body)['records'],
+            [{'owner': {'name': 'Sam'}, 'id': 1}])
+        self.assertEqual(record.changes(), {})
+
+    @responses.activate
+    def test_compare_and_set(self):
+        """ Records are only written if they were not written since read,
+        and modify() applies a function again on conflict.
+        """
+        stored = {'id': 1, 'age': 5, '__updatedtime__': 100}
+
+        def callback(request):
+            payload = json.loads(request.body)
+            if payload['operation'] == 'search_by_hash':
+                return (200, {}, json.dumps([{
+                    attribute: value for attribute, value in stored.items()
+                    if '*' in payload['get_attributes']
+                    or attribute in payload['get_attributes']}]))
+            match = re.match(
+                r'UPDATE `test_schema_1`.`test_table_1` SET `age` = (\d+) '
+                r'WHERE `id` = 1 AND `__updatedtime__` <= (\d+)$',
+                payload['sql'])
+            if int(match.group(2)) < stored['__updatedtime__']:
+                return (200, {}, json.dumps({
+                    'message': 'updated 0 of 0 records',
+                    'update_hashes': [],
+                    'skipped_hashes': [],
+                }))
+            stored['age'] = int(match.group(1))
+            stored['__updatedtime__'] += 1
+            return (200, {}, json.dumps({
+                'message': 'updated 1 of 1 records',
+                'update_hashes': [1],
+                'skipped_hashes': [],
+            }))
+
+        responses.add_callback('POST', self.URL, callback=callback)
+
+        record = self.table[1]
+        updated_time = record.__updatedtime__
+        record.save({'age': 6}, if_unmodified_since=updated_time)
+        self.assertEqual(stored['age'], 6)
+        # the new __updatedtime__ is read again
+        self.assertEqual(record.__updatedtime__, 101)
+        with self.assertRaises(harperdb.HarperDBConflictError):
+            record.save({'age': 7}, if_unmodified_since=updated_time)
+        self.assertEqual(stored['age'], 6)
+
+        calls = list()
+
+        def birthday(data):
+            calls.append(data['age'])
+            if len(calls) == 1:
+                # another writer gets there first
+                stored['__updatedtime__'] += 1
+            data['age'] += 1
+
+        record = self.table.modify(1, birthday)
+        self.assertEqual(calls, [6, 6])
+        self.assertEqual(stored['age'], 7)
+        self.assertEqual(record['age'], 7)
+
+    @responses.activate
+    def test_compare_and_set_fractional_time(self):
+        """ __updatedtime__ with fractional milliseconds is compared as
+        stored.
+        """
+        stored = {'id': 1, 'age': 5, '__updatedtime__': 1697476398427.3108}
+
+        def callback(request):
+            payload = json.loads(request.body)
+            if payload['operation'] == 'search_by_hash':
+                return (200, {}, json.dumps([stored]))
+            match = re.search(
+                r'SET `age` = (\d+) .* `__updatedtime__` <= ([\d.]+)$',
+                payload['sql'])
+            if float(match.group(2)) < stored['__updatedtime__']:
+                hashes = []
+            else:
+                stored['age'] = int(match.group(1))
+                stored['__updatedtime__'] += 1.5
+                hashes = [1]
+            return (200, {}, json.dumps({
+                'message': 'updated {0} of {0} records'.format(len(hashes)),
+                'update_hashes': hashes,
+                'skipped_hashes': [],
+            }))
+
+        responses.add_callback('POST', self.URL, callback=callback)
+
+        def birthday(data):
+            data['age'] += 1
+
+        self.table.modify(1, birthday, max_attempts=1)
+        self.assertEqual(stored['age'], 6)
+        self.table.compare_and_set(
+            1,
+            datetime.datetime.fromtimestamp(stored['__updatedtime__'] / 1000),
+            {'age': 7})
+        self.assertEqual(stored['age'], 7)
+
+    @responses.activate
+    def test_modify_nested(self):
+        """ Lists changed in place by modify's function are set to NULL by
+        the compare-and-set statement, then written with an update.
+        """
+        responses.add(
+            'POST',
+            self.URL,
+            json=[{'id': 1, 'toys': ['ball'], '__updatedtime__': 100}],
+            status=200)
+        responses.add(
+            'POST',
+            self.URL,
+            json={'message': 'updated 1 of 1 records',
+                  'update_hashes': [1],
+                  'skipped_hashes': []},
+            status=200)
+
+        record = self.table.modify(1, lambda dog: dog['toys'].append('bone'))
+        self.assertEqual(len(responses.calls), 3)
+        self.assertEqual(
+            json.loads(responses.calls[1].request.body)['sql'],
+            'UPDATE `test_schema_1`.`test_table_1` SET `toys` = NULL '
+            'WHERE `id` = 1 AND `__updatedtime__` <= 100')
+        request = json.loads(responses.calls[2].request.body)
+        self.assertEqual(request['operation'], 'update')
+        self.assertEqual(request['records'], [{'toys': ['ball', 'bone'],
+                                               'id': 1}])
+        self.assertEqual(record['toys'], ['ball', 'bone'])
+
+    @responses.activate
+    def test_session(self):
+        """ Changes within a session are written with one update request.
+        """
+        responses.add(
+            'POST',
+            self.URL,
+            json=[{'id': index, 'age': 1} for index in range(3)],
+            status=200)
+        responses.add(
+            'POST',
+            self.URL,
+            json={'message': 'updated 3 of 3 records',
+                  'update_hashes': [0, 1, 2],
+                  'skipped_hashes': []},
+            status=200)
+
+        with self.table.batch_load(), self.table.session() as session:
+            records = [self.table[index] for index in range(3)]
+            self.assertIs(self.table[0], records[0])
+            self.assertIs(session['0'], records[0])
+            for record in records:
+                record['age'] = record['age'] + 1
+                record['name'] = 'dog {}'.format(record['id'])
+            records[0]['age'] = 5
+            self.assertEqual(session.dirty, records)
+        self.assertEqual(len(responses.calls), 2)
+        self.assertEqual(
+            json.loads(responses.calls[1].request.body)['records'],
+            [
+                {'age': 5, 'name': 'dog 0', 'id': 0},
+                {'age': 2, 'name': 'dog 1', 'id': 1},
+                {'age': 2, 'name': 'dog 2', 'id': 2},
+            ])
+        self.assertEqual(records[0]['age'], 5)
+        self.assertIsNone(records[0]._session)
+
+        # nothing is written when the session exits with an exception
+        with self.assertRaises(KeyError):
+            with self.table.session():
+                self.table[0]['age'] = 6
+                raise KeyError('age')
+        self.assertEqual(len(responses.calls), 2)
+
+    @responses.activate
+    def test_session_searched_records(self):
+        """ Records found by searches and queries within a session are
+        held by it, and written in its batch.
+        """
+        dogs = [{'id': 0, 'age': 1}, {'id': 1, 'age': 2}]
+
+        def callback(request):
+            payload = json.loads(request.body)
+            if payload['operation'] == 'update':
+                return (200, {}, json.dumps({
+                    'message': 'updated 2 of 2 records',
+                    'update_hashes': [0, 1],
+                    'skipped_hashes': [],
+                }))
+            if payload['operation'] == 'search_by_conditions':
+                return (200, {}, json.dumps(dogs[1:]))
+            return (200, {}, json.dumps(dogs))
+
+        responses.add_callback('POST', self.URL, callback=callback)
+
+        with self.table.session() as session:
+            records = self.table.search_by_value('age', '*')
+            queried = self.table.query().where('age', 'equals', 2).all()
+            self.assertIs(queried[0], records[1])
+            self.assertIs(self.table[0], records[0])
+            for record in records:
+                record['age'] = record['age'] + 1
+            self.assertEqual(session.dirty, records)
+            self.assertEqual(len(responses.calls), 2)
+        self.assertEqual(len(responses.calls), 3)
+        self.assertEqual(
+            json.loads(responses.calls[2].request.body)['records'],
+            [{'age': 2, 'id': 0}, {'age': 3, 'id': 1}])
+
+    @responses.activate
+    def test_session_read_after_assign(self):
+        """ Values assigned to a record of a session before it is read are
+        kept when it is read.
+        """
+        responses.add(
+            'POST',
+            self.URL,
+            json=[{'id': 0, 'age': 1, 'name': 'Penny'}],
+            status=200)
+
+        with self.table.session() as session:
+            record = self.table[0]
+            record['age'] = 2
+            self.assertEqual(len(responses.calls), 0)
+            self.assertEqual(record['age'], 2)
+            self.assertEqual(record['name'], 'Penny')
+            self.assertEqual(record.changes(), {'age': 2})
+            session.discard()
+
     @responses.activate
     def test_upsert_from_csv(self):
         """ Records can be upserted from a CSV file path.
         """
+        # servers without the upsert operation insert, then update
+        self.db.native_upsert = False
         # mock server response to insert request
         responses.add(
             'POST',
@@ -864,3 +1829,52 @@ class TestHarperDBTable(harperdb_testcase.HarperDBTestCase):
                 },
             ],
         })
+
+    @responses.activate
+    def test_upsert_from_csv_in_batches(self):
+        """ CSV files are streamed and upserted in batches.
+        """
+        def upsert_callback(request):
+            records = json.loads(request.body)['records']
+            return (200, {}, json.dumps({
+                'message': 'upserted',
+                'upserted_hashes': [record['id'] for record in records],
+            }))
+
+        responses.add_callback('POST', self.URL, callback=upsert_callback)
+        progress = unittest.mock.Mock()
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'dogs.csv')
+            with open(path, 'w', newline='') as csv_file:
+                csv_writer = csv.writer(csv_file)
+                csv_writer.writerow(['id', 'name'])
+                for index in range(25):
+                    csv_writer.writerow([index, 'dog {}'.format(index)])
+
+            counts = self.table.upsert_from_csv(
+                path,
+                batch_size=10,
+                progress=progress,
+                return_records=False)
+            self.assertEqual(counts, {
+                'rows': 25,
+                'upserted': 25,
+                'skipped': 0,
+            })
+            self.assertEqual(len(responses.calls), 3)
+            batches = [
+                json.loads(call.request.body)['records']
+                for call in responses.calls]
+            self.assertEqual(
+                sorted(len(batch) for batch in batches),
+                [5, 10, 10])
+            self.assertEqual(progress.call_count, 3)
+            progress.assert_called_with(25, 25)
+
+            records = self.table.upsert_from_csv(path, batch_size=10)
+            self.assertEqual(len(responses.calls), 6)
+            # records are returned in the order of the file
+            self.assertEqual(
+                [record._hash_value for record in records],
+                [str(index) for index in range(25)])
@@ -0,0 +1,183 @@
+import json
+import queue
+import responses
+import threading
+
+import harperdb
+import harperdb_testcase
+from harperdb import codec
+from harperdb.writer import BufferedWriter
+
+
+class TestBufferedWriter(harperdb_testcase.HarperDBTestCase):
+
+    def setUp(self):
+        """ This method is called before each test.
+        """
+        self.db = harperdb.HarperDBWrapper(self.URL)
+        self.table = self.db['dev']['dog']
+        self.table._hash_attribute = 'id'
+
+    def write_callback(self, hashes_key):
+        """ Returns a responses callback which writes every record, skipping
+        the hash "skip".
+        """
+        def callback(request):
+            hashes = [
+                record['id']
+                for record in json.loads(request.body)['records']]
+            return (200, {}, json.dumps({
+                'message': 'done',
+                hashes_key: [hash for hash in hashes if hash != 'skip'],
+                'skipped_hashes': [hash for hash in hashes if hash == 'skip'],
+            }))
+        return callback
+
+    @responses.activate
+    def test_batches(self):
+        """ Records are upserted in batches of max_records.
+        """
+        responses.add_callback(
+            'POST',
+            self.URL,
+            callback=self.write_callback('upserted_hashes'))
+
+        with self.table.buffered_writer(
+                max_records=2,
+                max_latency_ms=60000) as writer:
+            futures = [
+                writer.write({'id': index}) for index in range(5)]
+        self.assertEqual(
+            [json.loads(call.request.body)['records']
+             for call in responses.calls],
+            [[{'id': 0}, {'id': 1}], [{'id': 2}, {'id': 3}], [{'id': 4}]])
+        # each record's future has its own hash
+        self.assertEqual(
+            [future.result() for future in futures],
+            list(range(5)))
+        with self.assertRaises(RuntimeError):
+            writer.write({'id': 5})
+
+    @responses.activate
+    def test_latency(self):
+        """ Buffered records are written after max_latency_ms.
+        """
+        responses.add('POST', self.URL, json=self.RECORD_INSERTED, status=200)
+
+        writer = self.table.buffered_writer(
+            max_latency_ms=10,
+            operation='insert')
+        future = writer.write({'name': 'Penny'})
+        self.assertEqual(
+            future.result(timeout=5),
+            self.RECORD_INSERTED['inserted_hashes'][0])
+        self.assertEqual(
+            json.loads(responses.calls[0].request.body)['operation'],
+            'insert')
+        writer.close()
+        with self.assertRaises(ValueError):
+            self.table.buffered_writer(operation='delete')
+
+    @responses.activate
+    def test_max_bytes(self):
+        """ A batch holds at most max_bytes of encoded records.
+        """
+        responses.add(
+            'POST',
+            self.URL,
+            json=self.RECORDS_UPSERTED_NATIVE,
+            status=200)
+
+        writer = self.table.buffered_writer(
+            max_bytes=30,
+            max_latency_ms=60000)
+        for index in range(3):
+            writer.write({'name': 'x' * 10})
+        self.assertTrue(writer.flush(timeout=5))
+        self.assertEqual(
+            [len(json.loads(call.request.body)['records'])
+             for call in responses.calls],
+            [1, 1, 1])
+        writer.close()
+
+    @responses.activate
+    def test_error(self):
+        """ A failed batch raises from its futures, and calls on_error.
+        """
+        responses.add('POST', self.URL, json=self.SCHEMA_EXISTS, status=500)
+        errors = list()
+
+        with self.table.buffered_writer(
+                on_error=lambda error, records: errors.append(records)) \
+                as writer:
+            future = writer.write({'id': 1})
+        with self.assertRaises(harperdb.HarperDBError):
+            future.result()
+        self.assertEqual(errors, [[{'id': 1}]])
+
+    @responses.activate
+    def test_skipped(self):
+        """ Records skipped by the server raise from their futures, and are
+        passed to on_error.
+        """
+        responses.add_callback(
+            'POST',
+            self.URL,
+            callback=self.write_callback('inserted_hashes'))
+        errors = list()
+
+        with self.table.buffered_writer(
+                operation='insert',
+                on_error=lambda error, records: errors.append(records)) \
+                as writer:
+            written = writer.write({'id': 1})
+            skipped = writer.write({'id': 'skip'})
+        self.assertEqual(written.result(), 1)
+        with self.assertRaises(harperdb.HarperDBError):
+            skipped.result()
+        self.assertEqual(errors, [[{'id': 'skip'}]])
+
+    def test_missing_hashes(self):
+        """ Futures raise, rather than wait forever, when write returns
+        fewer hashes than records.
+        """
+        errors = list()
+
+        with BufferedWriter(
+                lambda records: records[1:],
+                codec.JSONCodec(),
+                on_error=lambda error, records: errors.append(records)) \
+                as writer:
+            futures = [writer.write(name) for name in ('Penny', 'Kato')]
+        for future in futures:
+            with self.assertRaises(harperdb.HarperDBError):
+                future.result(timeout=5)
+        self.assertEqual(errors, [['Penny', 'Kato']])
+
+    def test_backpressure(self):
+        """ write() blocks while max_buffered records are waiting.
+        """
+        started = threading.Event()
+        release = threading.Event()
+
+        def write(records):
+            started.set()
+            release.wait(5)
+            return [index for index, record in enumerate(records)]
+
+        writer = BufferedWriter(
+            write,
+            codec.JSONCodec(),
+            max_records=1,
+            max_buffered=1)
+        writer.write('first')
+        started.wait(5)
+        cancelled = writer.write('second')
+        with self.assertRaises(queue.Full):
+            writer.write('third', timeout=0.01)
+        self.assertEqual(len(writer), 2)
+        cancelled.cancel()
+        release.set()
+        writer.close()
+        self.assertTrue(cancelled.cancelled())
+        self.assertEqual(len(writer), 0)